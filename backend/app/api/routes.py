@@ -1,20 +1,94 @@
 # backend/app/routes.py
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, HTTPException, BackgroundTasks, File, Header, Query, Response, UploadFile
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
+from typing import List, Optional
 from uuid import uuid4
-from ..services.cache import make_cache_key_for_code, get_result
-from ..workers.tasks import explain_code_task
-from .schemas import CodeRequest, ExplanationResponse, JobResponse
+import asyncio
+import json
+import re
+from fastapi.concurrency import run_in_threadpool
+from ..services.cache import (
+    make_cache_key_for_code,
+    aget_result,
+    aget_results,
+    async_redis_client,
+    codec,
+)
+from ..services.jobs import (
+    ALIAS_FIELD,
+    KIND_BATCH,
+    KIND_EXPLAIN,
+    LLM_ARTIFACT,
+    aget_job,
+    aget_jobs,
+    aresolve_artifacts,
+    artifact_etag,
+    build_result,
+    encode_job_fields,
+    job_key,
+)
+from ..services.dag_pipeline import select_artifacts
+from ..services.inline_analysis import fits_inline, try_analyze_inline
+from ..services import single_flight
+from ..services.job_events import job_event_hub
+from ..services.llm_stream import aread_explanation
+from ..workers.tasks import (
+    PIPELINE_OPTIONS,
+    analysis_handoff,
+    enqueue_explain,
+    enqueue_llm,
+    analyze_batch_task,
+)
+from ..metrics import EXPLAIN_REQUESTS, JOB_EVENT_STREAMS
+from .schemas import CodeRequest, BatchRequest, ExplanationResponse, JobResponse, StatusBatchRequest
 import logging
 from fastapi import Depends
 from ..rate_limit import rate_limit
 import time
-from ..services.cache import set_result
-from ..config import settings, CACHE_TTL
+from ..config import (
+    settings,
+    CACHE_TTL,
+    BATCH_MAX_FILES,
+    BATCH_MAX_BYTES,
+    BATCH_MAX_ARCHIVE_BYTES,
+    BATCH_INPUT_TTL,
+    JOB_EVENTS_KEEPALIVE,
+    JOB_EVENTS_MAX_SECONDS,
+    STATUS_MAX_WAIT,
+    STATUS_BATCH_MAX_JOBS,
+)
+from ..services.batch_input import (
+    BatchInputError,
+    BatchLimits,
+    files_from_list,
+    files_from_archive,
+)
 import ast 
 
 router = APIRouter()
 
+# Job ids of cache hits; the rest of the id is the result cache key
+CACHED_JOB_PREFIX = "cached:"
+
+# Job statuses after which nothing changes
+TERMINAL_STATUSES = ("finished", "failed")
+
+# Projectable fields of a status (POST /status/batch) and the job record
+# fields each is built from
+STATUS_RECORD_FIELDS = {
+    "status": ["status"],
+    "version": ["version"],
+    "job_duration_ms": ["job_duration_ms"],
+    "cached": ["cached"],
+    "result": ["kind", "error", "progress"],
+    "artifacts": [],
+}
+STATUS_BATCH_DEFAULT_FIELDS = ("status", "version", "job_duration_ms", "cached")
+
+# Record of a cache hit whose manifest has expired
+EXPIRED = object()
+
 @router.post("/explain/pyspark", response_model=JobResponse, dependencies=[Depends(rate_limit)])
 async def explain_pyspark(request: CodeRequest):
     code = request.code
@@ -28,7 +102,7 @@ async def explain_pyspark(request: CodeRequest):
 
     # 🔴 FAST FAIL: syntax validation
     try:
-        ast.parse(code)
+        tree = ast.parse(code)
     except SyntaxError as e:
         raise HTTPException(
             status_code=400,
@@ -40,13 +114,22 @@ async def explain_pyspark(request: CodeRequest):
             },
         )
 
+    artifacts = request.artifacts
+    if artifacts is not None:
+        try:
+            select_artifacts([name for name in artifacts if name != LLM_ARTIFACT])
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail={"type": "ValueError", "message": str(e)})
+
+    cache_key = make_cache_key_for_code(code, tree)
+    small = fits_inline(code, tree)
+    # Not held across the awaits below: with many requests in flight, live
+    # ASTs make every GC pass of the next parse slower
+    del tree
     
-    cache_key = make_cache_key_for_code(code)
-    
-    # 1) Check cache
-    request_start = time.time()
-    cached = get_result(cache_key)
-    if cached:
+    # 1) Check cache in one round trip. No job record is written on a hit:
+    # /status rebuilds it from the cached results.
+    if await async_redis_client.exists(cache_key):
         logging.info(
             "cache_hit",
             extra={
@@ -56,54 +139,445 @@ async def explain_pyspark(request: CodeRequest):
             },
         )
 
-        cache_job_id = f"cached:{cache_key}"
-        analysis_cache_key = f"{cache_key}:analysis"
-        cached_analysis = get_result(analysis_cache_key)
-
-        payload = {
-            "job_id": cache_job_id,
-            "status": "finished",
-            "result": {
-                "llm": cached,
-                "analysis": cached_analysis or {},
-            },
-            "job_duration_ms": 0,
-            "cached": True,
-        }
-        set_result(f"job:{cache_job_id}", payload, ttl=CACHE_TTL)
-
+        EXPLAIN_REQUESTS.labels(path="cached").inc()
         return {
-            "job_id": cache_job_id,
+            "job_id": f"{CACHED_JOB_PREFIX}{cache_key}",
             "status": "finished",
             "cached": True
         }
-    # 2) Enqueue background job
     job_id = str(uuid4())
-    explain_code_task.apply_async(kwargs={"job_id": job_id, "code": code, "cache_key": cache_key})
-    
+
+    # 2) The same code is already being explained: attach to that job
+    # instead of running the analysis and the LLM call again. Artifact
+    # subsets are not cached, so only full requests take part.
+    if artifacts is None:
+        owner_job_id = await single_flight.claim(cache_key, job_id)
+        if owner_job_id is not None:
+            await single_flight.attach(job_id, owner_job_id)
+            logging.info(
+                "request_coalesced",
+                extra={
+                    "event": "request_coalesced",
+                    "job_id": job_id,
+                    "owner_job_id": owner_job_id,
+                    "cache_key": cache_key,
+                },
+            )
+            EXPLAIN_REQUESTS.labels(path="coalesced").inc()
+            return {"job_id": job_id, "status": "pending", "cached": False}
+
+    try:
+        return await _start_explain_job(job_id, code, small, cache_key, artifacts)
+    except Exception:
+        # Nothing will compute the result: let the next identical request
+        # claim it instead of attaching to this job until the lock expires
+        if artifacts is None:
+            await run_in_threadpool(single_flight.release, cache_key, job_id)
+        raise
+
+
+async def _start_explain_job(job_id: str, code: str, small: bool, cache_key: str, artifacts):
+    """
+    Analyzes small scripts inline and queues the LLM step, or queues the
+    whole job.
+    """
+    # 3) Small script: analyze it here and return the analysis right away;
+    # only the LLM explanation is queued
+    if small:
+        try:
+            inline = await try_analyze_inline(job_id, code, PIPELINE_OPTIONS, artifacts)
+        except Exception:
+            # The queued task re-runs the analysis and records any failure
+            logging.exception(
+                "inline_analysis_failed",
+                extra={"event": "inline_analysis_failed", "job_id": job_id},
+            )
+            inline = None
+
+        if inline is not None:
+            if inline["status"] != "finished":
+                handoff = analysis_handoff(
+                    job_id,
+                    inline["refs"],
+                    inline["analysis"].get("structure"),
+                    inline["started_at_ms"],
+                )
+                await run_in_threadpool(enqueue_llm, handoff, code, cache_key, artifacts)
+            EXPLAIN_REQUESTS.labels(path="inline").inc()
+            return {
+                "job_id": job_id,
+                "status": inline["status"],
+                "cached": False,
+                "analysis": inline["analysis"],
+            }
+
+    # 4) Enqueue background job (publishing to the broker is blocking I/O)
+    await run_in_threadpool(enqueue_explain, job_id, code, cache_key, artifacts)
+    EXPLAIN_REQUESTS.labels(path="queued").inc()
     return {"job_id": job_id, "status": "pending", "cached": False}
 
-@router.get("/status/{job_id}")
-async def get_status(job_id: str):
-    job_key = f"job:{job_id}"
-    payload = get_result(job_key)
-    
-    if not payload:
+BATCH_LIMITS = BatchLimits(
+    max_files=BATCH_MAX_FILES,
+    max_bytes=BATCH_MAX_BYTES,
+    max_archive_bytes=BATCH_MAX_ARCHIVE_BYTES,
+)
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+
+
+async def _enqueue_batch(files, endpoint: str):
+    """
+    Stages the batch input in Redis and enqueues one analysis job
+    for all files.
+    """
+    job_id = str(uuid4())
+    async with async_redis_client.pipeline(transaction=False) as pipe:
+        pipe.set(f"batch:{job_id}:input", codec.encode(files), ex=BATCH_INPUT_TTL)
+        pipe.hset(job_key(job_id), mapping=encode_job_fields({
+            "job_id": job_id,
+            "kind": KIND_BATCH,
+            "status": "pending",
+            "cached": False,
+            "created_at": int(time.time() * 1000),
+            "progress": {"done": 0, "total": len(files)},
+        }))
+        pipe.expire(job_key(job_id), CACHE_TTL)
+        await pipe.execute()
+    await run_in_threadpool(analyze_batch_task.apply_async, kwargs={"job_id": job_id})
+
+    logging.info(
+        "batch_enqueued",
+        extra={
+            "event": "batch_enqueued",
+            "endpoint": endpoint,
+            "job_id": job_id,
+            "files": len(files),
+        },
+    )
+    return {"job_id": job_id, "status": "pending", "cached": False}
+
+
+@router.post("/explain/pyspark/batch", response_model=JobResponse, dependencies=[Depends(rate_limit)])
+async def explain_pyspark_batch(request: BatchRequest):
+    """
+    Analyzes many files as one job: {"files": [{"path": ..., "code": ...}]}.
+    """
+    try:
+        files = files_from_list(((f.path, f.code) for f in request.files), BATCH_LIMITS)
+    except BatchInputError as e:
+        raise HTTPException(status_code=400, detail={"type": "BatchInputError", "message": str(e)})
+    return await _enqueue_batch(files, "/explain/pyspark/batch")
+
+
+@router.post("/explain/pyspark/batch/archive", response_model=JobResponse, dependencies=[Depends(rate_limit)])
+async def explain_pyspark_batch_archive(archive: UploadFile = File(...)):
+    """
+    Analyzes every .py file of an uploaded .zip or .tar(.gz) repository archive.
+    """
+    # Read in chunks, giving up as soon as the upload is over the limit
+    data = bytearray()
+    while chunk := await archive.read(UPLOAD_CHUNK_BYTES):
+        data += chunk
+        if len(data) > BATCH_MAX_BYTES:
+            raise HTTPException(status_code=413, detail="Archive too large")
+    try:
+        # Decompression is CPU-bound: off the event loop
+        files = await run_in_threadpool(files_from_archive, bytes(data), archive.filename or "", BATCH_LIMITS)
+    except BatchInputError as e:
+        raise HTTPException(status_code=400, detail={"type": "BatchInputError", "message": str(e)})
+    return await _enqueue_batch(files, "/explain/pyspark/batch/archive")
+
+
+async def _job_record(job_id: str) -> Optional[dict]:
+    """
+    Job record; a cache-hit job's is built from the result manifest, and
+    a coalesced job's is that of the job it attached to.
+    """
+    if not job_id.startswith(CACHED_JOB_PREFIX):
+        record = await aget_job(job_id)
+        if record and ALIAS_FIELD in record:
+            # Coalesced request: the record of the job computing its result
+            owner = await aget_job(record[ALIAS_FIELD]) or {"artifacts": {}}
+            return {**owner, "job_id": job_id, ALIAS_FIELD: record[ALIAS_FIELD]}
+        return record
+
+    manifest = await aget_result(job_id[len(CACHED_JOB_PREFIX):])
+    if not manifest:
+        # Expired since the hit: resubmitting the code re-runs the analysis
+        raise HTTPException(status_code=404, detail="Cached result expired")
+    return _cached_job_record(job_id, manifest)
+
+
+def _cached_job_record(job_id: str, manifest: dict) -> dict:
+    return {
+        "job_id": job_id,
+        "kind": KIND_EXPLAIN,
+        "status": "finished",
+        "job_duration_ms": 0,
+        "cached": True,
+        "artifacts": manifest["artifacts"],
+    }
+
+
+async def _status_body(job_id: str, resolve: bool = False) -> dict:
+    return await _record_status(job_id, await _job_record(job_id), resolve)
+
+
+async def _record_status(job_id: str, record: Optional[dict], resolve: bool = False) -> dict:
+    artifacts = await aresolve_artifacts(record["artifacts"]) if resolve and record else {}
+    return _format_status(job_id, record, artifacts)
+
+
+def _format_status(job_id: str, record: Optional[dict], artifacts: dict) -> dict:
+    if not record:
         return {
             "job_id": job_id,
             "status": "pending",
             "result": None,
+            "artifacts": {},
             "job_duration_ms": None,
-            "cached": False
+            "cached": False,
+            "version": 0,
         }
     return {
-        "job_id": payload.get("job_id"),
-        "status": payload.get("status", "pending"),
-        "result": payload.get("result"),
-        "job_duration_ms": payload.get("job_duration_ms"),
-        "cached": payload.get("cached", False),
+        "job_id": record.get("job_id", job_id),
+        "status": record.get("status", "pending"),
+        "result": build_result(record, artifacts),
+        "artifacts": {
+            name: {"size": ref["size"], "url": f"/jobs/{job_id}/artifacts/{name}"}
+            for name, ref in record["artifacts"].items()
+        },
+        "job_duration_ms": record.get("job_duration_ms"),
+        "cached": record.get("cached", False),
+        "version": record.get("version", 0),
     }
 
+
+async def _events_job_id(job_id: str) -> str:
+    """
+    The job whose events a job follows: a coalesced job's are those of
+    the job it attached to.
+    """
+    owner = await async_redis_client.hget(job_key(job_id), ALIAS_FIELD)
+    return owner.decode() if owner else job_id
+
+
+@router.get("/status/{job_id}")
+async def get_status(
+    job_id: str,
+    resolve: bool = False,
+    wait: float = Query(default=0, ge=0, le=STATUS_MAX_WAIT),
+    since: Optional[int] = None,
+):
+    """
+    Status, progress/error and the list of available artifacts with their
+    sizes; fetch each from /jobs/{job_id}/artifacts/{name}.
+    `resolve=true` inlines all artifacts in `result` instead.
+
+    Long-poll: with `since` (the `version` of the last status seen) and
+    `wait` seconds, the response is held until the job changes, ends, or
+    `wait` runs out; it wakes up on the job's events, without polling.
+    """
+    if not wait or since is None:
+        return await _status_body(job_id, resolve)
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + wait
+    # Explanation chunks leave the record unchanged: not worth a re-read
+    async with job_event_hub.listen(await _events_job_id(job_id), chunks=False) as woken:
+        while True:
+            woken.clear()
+            record = await _job_record(job_id)
+            body = _format_status(job_id, record, {})
+            remaining = deadline - loop.time()
+            if body["version"] != since or body["status"] in TERMINAL_STATUSES or remaining <= 0:
+                break
+            try:
+                await asyncio.wait_for(woken.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+    # Artifacts of the record just checked, not of a newer one
+    return await _record_status(job_id, record, resolve=True) if resolve else body
+
+
+async def _job_records(job_ids: List[str], fields: Optional[List[str]]) -> List[Optional[dict]]:
+    """
+    Records of many jobs, as _job_record builds them, in one pipelined
+    round trip, plus one for the jobs coalesced ones attached to and one
+    for cache-hit manifests, when there are any. With `fields`, only
+    those fields are read (HMGET). Expired cache hits are EXPIRED.
+    """
+    cached = [job_id for job_id in job_ids if job_id.startswith(CACHED_JOB_PREFIX)]
+    manifests = await aget_results(*(job_id[len(CACHED_JOB_PREFIX):] for job_id in cached)) if cached else []
+    by_id = {
+        job_id: _cached_job_record(job_id, manifest) if manifest else EXPIRED
+        for job_id, manifest in zip(cached, manifests)
+    }
+
+    hash_ids = [job_id for job_id in job_ids if job_id not in by_id]
+    read_fields = fields and [*fields, ALIAS_FIELD]
+    records = await aget_jobs(hash_ids, read_fields)
+    by_id.update(zip(hash_ids, records))
+
+    aliased = {job_id: record[ALIAS_FIELD] for job_id, record in zip(hash_ids, records) if record and ALIAS_FIELD in record}
+    if aliased:
+        owner_ids = list(dict.fromkeys(aliased.values()))
+        owners = dict(zip(owner_ids, await aget_jobs(owner_ids, read_fields)))
+        for job_id, owner_job_id in aliased.items():
+            by_id[job_id] = {**(owners[owner_job_id] or {"artifacts": {}}), "job_id": job_id, ALIAS_FIELD: owner_job_id}
+    return [by_id[job_id] for job_id in job_ids]
+
+
+@router.post("/status/batch")
+async def get_status_batch(request: StatusBatchRequest):
+    """
+    Statuses of many jobs in a few round trips: {"job_ids": [...]}.
+    Each status is projected to `fields` (default: status, version,
+    job_duration_ms, cached); `include_result` adds the result with every
+    artifact inlined, as /status?resolve=true does.
+    """
+    if len(request.job_ids) > STATUS_BATCH_MAX_JOBS:
+        raise HTTPException(status_code=400, detail=f"At most {STATUS_BATCH_MAX_JOBS} job ids")
+    fields = request.fields or list(STATUS_BATCH_DEFAULT_FIELDS)
+    unknown = set(fields) - STATUS_RECORD_FIELDS.keys()
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown status fields: {sorted(unknown)}")
+    if request.include_result and "result" not in fields:
+        fields.append("result")
+
+    # Artifact references are fields of their own: reading them takes HGETALL
+    read_fields = None
+    if "artifacts" not in fields and not request.include_result:
+        read_fields = sorted({name for field in fields for name in STATUS_RECORD_FIELDS[field]})
+    job_ids = list(dict.fromkeys(request.job_ids))
+    records = await _job_records(job_ids, read_fields)
+
+    artifacts = [{} for _ in records]
+    if request.include_result:
+        refs = [
+            (i, name, ref["key"])
+            for i, record in enumerate(records) if record and record is not EXPIRED
+            for name, ref in record["artifacts"].items()
+        ]
+        values = await aget_results(*(key for _, _, key in refs)) if refs else []
+        for (i, name, _), value in zip(refs, values):
+            artifacts[i][name] = value
+
+    statuses = []
+    for job_id, record, resolved in zip(job_ids, records, artifacts):
+        if record is EXPIRED:
+            statuses.append({"job_id": job_id, "status": "expired"})
+            continue
+        status = _format_status(job_id, record, resolved)
+        statuses.append({"job_id": job_id, **{field: status[field] for field in fields}})
+    return {"jobs": statuses}
+
+
+def _sse(event: str, data: dict, event_id: Optional[str] = None) -> str:
+    id_line = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{id_line}event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+# Explanation stream entry ids, as sent in the SSE id field
+STREAM_ENTRY_ID = re.compile(r"\d+-\d+")
+
+
+async def _job_event_stream(job_id: str, last_event_id: Optional[str] = None):
+    events_job_id = await _events_job_id(job_id)
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + JOB_EVENTS_MAX_SECONDS
+    last = None
+    # A reconnecting client resumes after the last explanation chunk it got
+    last_chunk = last_event_id if last_event_id and STREAM_ENTRY_ID.fullmatch(last_event_id) else "-"
+    JOB_EVENT_STREAMS.inc()
+    try:
+        # Listening before the first read: no update is missed in between
+        async with job_event_hub.listen(events_job_id) as woken:
+            while True:
+                woken.clear()
+                try:
+                    body = await _status_body(job_id)
+                except HTTPException as e:
+                    yield _sse("error", {"job_id": job_id, "detail": e.detail})
+                    return
+
+                # Explanation text streamed so far; read after the status,
+                # so a finished job's last chunks come before "finished"
+                if body["status"] in ("analysis_complete", *TERMINAL_STATUSES):
+                    for entry_id, entry in await aread_explanation(events_job_id, after=last_chunk):
+                        last_chunk = entry_id
+                        yield _sse("explanation", {"job_id": job_id, **entry}, entry_id)
+
+                if body != last:
+                    last = body
+                    yield _sse(body["status"], body)
+                if body["status"] in TERMINAL_STATUSES:
+                    return
+
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    # The client reconnects
+                    return
+                try:
+                    await asyncio.wait_for(woken.wait(), min(JOB_EVENTS_KEEPALIVE, remaining))
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+    finally:
+        JOB_EVENT_STREAMS.dec()
+
+
+@router.get("/jobs/{job_id}/events")
+async def job_events(job_id: str, last_event_id: Optional[str] = Header(default=None)):
+    """
+    Server-Sent Events of a job, pushed as the worker updates it: one
+    event per change, named after the status (pending, running,
+    analysis_complete, finished, failed) with the /status body as data.
+    "explanation" events carry the LLM explanation as it is generated:
+    {"text": chunk}, or {"reset": "1"} to discard the text so far. Their
+    id lets a client reconnecting with Last-Event-ID resume the text
+    instead of receiving it again. The stream ends when the job does.
+    """
+    return StreamingResponse(
+        _job_event_stream(job_id, last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+@router.get("/jobs/{job_id}/artifacts/{name}")
+async def get_artifact(job_id: str, name: str, if_none_match: Optional[str] = Header(default=None)):
+    """
+    One artifact of a job (dag_dot, lineage_dot, stage_summary, llm, ...).
+    The ETag is the artifact's content address. A real job's artifacts
+    never change once listed, so clients may cache them for good. A
+    "cached:" id names whatever result is cached for that code, which is
+    recomputed (possibly differently) once it expires: always revalidate.
+    """
+    record = await _job_record(job_id)
+    ref = record["artifacts"].get(name) if record else None
+    if ref is None:
+        raise HTTPException(status_code=404, detail="Artifact not available")
+
+    if job_id.startswith(CACHED_JOB_PREFIX):
+        cache_control = "private, no-cache"
+    else:
+        cache_control = f"private, max-age={CACHE_TTL}, immutable"
+    headers = {"ETag": artifact_etag(ref), "Cache-Control": cache_control}
+    if _etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    value = await aget_result(ref["key"])
+    if value is None:
+        raise HTTPException(status_code=404, detail="Artifact expired")
+    return JSONResponse(value, headers=headers)
+
 @router.get("/health")
 async def health():
     return {"status": "ok"}
@@ -1,12 +1,31 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 
 class CodeRequest(BaseModel):
     code: str
+    # Subset of artifacts to produce, e.g. ["antipatterns.json"]; default all
+    artifacts: Optional[List[str]] = None
+
+class BatchFile(BaseModel):
+    path: str
+    code: str
+
+class BatchRequest(BaseModel):
+    files: List[BatchFile]
+
+class StatusBatchRequest(BaseModel):
+    job_ids: List[str]
+    # Status fields to return per job; default: status, version,
+    # job_duration_ms, cached
+    fields: Optional[List[str]] = None
+    # Inline every artifact in `result`, as /status?resolve=true
+    include_result: bool = False
 
 class ExplanationResult(BaseModel):
     explanation: str | None = None
     latency_ms: int
+    # Time to the first streamed chunk, when streamed
+    ttft_ms: int | None = None
     tokens_used: int | None = None
     prompt_tokens: int | None = None
     completion_tokens: int | None = None
@@ -16,6 +35,8 @@ class JobResponse(BaseModel):
     job_id: str
     status: str
     cached: bool = False
+    # Small scripts are analyzed inline: their analysis comes right away
+    analysis: Optional[dict] = None
     
 class ExplanationResponse(BaseModel):
     job_id: str
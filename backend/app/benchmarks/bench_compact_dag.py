@@ -0,0 +1,93 @@
+# backend/app/benchmarks/bench_compact_dag.py
+"""
+Memory footprint of OperationDAG vs CompactOperationDAG on a synthetic
+100k-node DAG, plus the cost of running stage assignment on each.
+
+Run from backend/:
+    python -m app.benchmarks.bench_compact_dag [nodes]
+"""
+
+import gc
+import random
+import sys
+import time
+import tracemalloc
+
+from app.parsers.spark_semantics import SPARK_OPS, SHUFFLE_OPS, OpType
+from app.graphs.operation.operation_graph_builder import OperationDAG, OperationDAGNode
+from app.graphs.operation.compact_dag import CompactOperationDAG
+from app.graphs.operation.stage_assignment import assign_stages
+
+LABELS = ["select", "filter", "withColumn", "groupBy", "join", "distinct", "count", "show"]
+
+
+def build_synthetic(dag, nodes: int, seed: int = 7):
+    """
+    Mostly chained operations, with a join-like second parent every 10 nodes.
+    """
+    rng = random.Random(seed)
+    for i in range(nodes):
+        label = rng.choice(LABELS)
+        dag.add_node(
+            OperationDAGNode(
+                id=f"df_{i // 3}_{label}_{i}",
+                label=label,
+                op_type=SPARK_OPS.get(label, OpType.TRANSFORMATION),
+                causes_shuffle=label in SHUFFLE_OPS,
+                lineno=i,
+            )
+        )
+    ids = list(dag.nodes)
+    for i in range(1, nodes):
+        dag.add_edge(ids[i - 1], ids[i])
+        if i % 10 == 0:
+            dag.add_edge(ids[rng.randrange(i)], ids[i])
+    return dag
+
+
+def build(factory, nodes: int):
+    dag = build_synthetic(factory(), nodes)
+    # Force CSR materialization for the compact backend
+    next(iter(dag.nodes.values())).children
+    return dag
+
+
+def measure(factory, nodes: int):
+    # Timings are taken outside tracemalloc, which slows allocations down
+    start = time.perf_counter()
+    dag = build(factory, nodes)
+    build_s = time.perf_counter() - start
+
+    stages_s = {}
+    for strategy in ("queue", "levels"):
+        start = time.perf_counter()
+        assign_stages(dag, strategy=strategy)
+        stages_s[strategy] = time.perf_counter() - start
+    del dag
+
+    gc.collect()
+    tracemalloc.start()
+    dag = build(factory, nodes)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current, peak, build_s, stages_s
+
+
+def main(nodes: int = 100_000):
+    print(f"nodes: {nodes}")
+    results = {}
+    for name, factory in (("object", OperationDAG), ("compact", CompactOperationDAG)):
+        current, peak, build_s, stages_s = measure(factory, nodes)
+        results[name] = current
+        print(
+            f"{name:8s} retained={current / 2**20:7.1f} MiB "
+            f"({current / nodes:6.0f} B/node) peak={peak / 2**20:7.1f} MiB "
+            f"build={build_s * 1000:7.1f} ms "
+            f"stages(queue)={stages_s['queue'] * 1000:7.1f} ms "
+            f"stages(levels)={stages_s['levels'] * 1000:7.1f} ms"
+        )
+    print(f"memory reduction: {results['object'] / results['compact']:.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
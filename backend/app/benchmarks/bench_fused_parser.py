@@ -0,0 +1,57 @@
+# backend/app/benchmarks/bench_fused_parser.py
+"""
+Compares the legacy front-end (PySparkASTParser + build_operation_dag +
+build_data_lineage_graph) against the single-pass FusedPySparkParser.
+
+Run from backend/:
+    python -m app.benchmarks.bench_fused_parser [statements]
+"""
+
+import ast
+import sys
+import time
+
+from app.benchmarks.synthetic import generate_etl_script
+from app.parsers.ast_parser import PySparkASTParser
+from app.parsers.fused_parser import parse_to_graphs
+from app.graphs.operation.operation_graph_builder import build_operation_dag
+from app.graphs.lineage.lineage_graph_builder import build_data_lineage_graph
+
+
+def legacy_front_end(tree):
+    parser = PySparkASTParser()
+    parser.visit(tree)
+    dag = build_operation_dag(parser.operations)
+    lineage = build_data_lineage_graph(parser.operations)
+    return dag, lineage
+
+
+def best_of(fn, tree, repeats: int = 5) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(tree)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main(statements: int = 20_000):
+    code = generate_etl_script(statements)
+    tree = ast.parse(code)
+
+    legacy_dag, _ = legacy_front_end(tree)
+    fused_dag, _ = parse_to_graphs(tree)
+    assert legacy_dag.nodes.keys() == fused_dag.nodes.keys()
+
+    legacy = best_of(legacy_front_end, tree)
+    fused = best_of(parse_to_graphs, tree)
+
+    print(f"statements:      {statements}")
+    print(f"operations:      {len(fused_dag.nodes)}")
+    print(f"legacy front-end: {legacy * 1000:.1f} ms")
+    print(f"fused front-end:  {fused * 1000:.1f} ms")
+    print(f"speedup:          {legacy / fused:.2f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000)
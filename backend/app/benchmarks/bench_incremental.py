@@ -0,0 +1,53 @@
+# backend/app/benchmarks/bench_incremental.py
+"""
+Edit-resubmit latency of the statement-level parse cache.
+
+Cold run: empty statement store. Resubmit: same script with one line
+edited, so every other statement hits the cache.
+
+Run from backend/:
+    python -m app.benchmarks.bench_incremental [statements]
+"""
+
+import ast
+import sys
+import time
+
+from app.benchmarks.synthetic import generate_etl_script
+from app.parsers.fused_parser import parse_to_graphs
+from app.parsers.incremental import InMemoryStatementStore, parse_to_graphs_incremental
+
+
+def edit_one_line(code: str) -> str:
+    lines = code.splitlines()
+    middle = len(lines) // 2
+    lines[middle] = lines[middle].replace("(", "(\"edited\", ", 1)
+    return "\n".join(lines) + "\n"
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main(statements: int = 20_000):
+    code = generate_etl_script(statements)
+    edited = edit_one_line(code)
+
+    _, uncached_ms = timed(lambda: parse_to_graphs(ast.parse(edited)))
+
+    store = InMemoryStatementStore()
+    (_, _, cold), cold_ms = timed(lambda: parse_to_graphs_incremental(code, store))
+    (_, _, warm), warm_ms = timed(lambda: parse_to_graphs_incremental(edited, store))
+
+    print(f"statements:           {statements}")
+    print(f"no statement cache:   {uncached_ms:8.1f} ms")
+    print(f"cold (empty cache):   {cold_ms:8.1f} ms  hits {cold.hits}/{cold.statements}")
+    print(f"edit + resubmit:      {warm_ms:8.1f} ms  hits {warm.hits}/{warm.statements}")
+    print(f"resubmit vs cold:     {cold_ms / warm_ms:.2f}x")
+    print(f"resubmit vs no cache: {uncached_ms / warm_ms:.2f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000)
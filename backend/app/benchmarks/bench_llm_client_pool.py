@@ -0,0 +1,57 @@
+# backend/app/benchmarks/bench_llm_client_pool.py
+"""
+Per-call overhead of the LLM client against a local stub server
+(app.benchmarks.stub_llm, no model latency): a new client per call
+(genai.configure + GenerativeModel, as before GeminiClientPool) vs the
+pooled client, and the connections each opens.
+
+Run from backend/:
+    python -m app.benchmarks.bench_llm_client_pool [calls]
+"""
+
+import sys
+import time
+
+import google.generativeai as genai
+
+from app.benchmarks.stub_llm import StubLLMServer
+from app.services.llm_clients import GeminiClient, GeminiClientPool
+
+MODEL = "stub"
+
+
+def timed(fn, calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) * 1000 / calls
+
+
+def main(calls: int = 200):
+    server = StubLLMServer().start()
+    client_options = {"api_endpoint": server.endpoint}
+
+    def per_call_client():
+        genai.configure(api_key="bench", transport="rest", client_options=client_options)
+        GeminiClient(MODEL).explain_pyspark("df.show()")
+
+    start = time.perf_counter()
+    pool = GeminiClientPool(api_key="bench", api_endpoint=server.endpoint, transport="rest")
+    pool.get(MODEL)
+    startup_ms = (time.perf_counter() - start) * 1000
+
+    print(f"calls: {calls}, pool startup (configure + first client): {startup_ms:.2f} ms")
+    print(f"  {'client':16} {'ms/call':>8} {'connections':>12}")
+    # Pooled first: per_call_client replaces the clients genai was configured with
+    for name, fn in (
+        ("pooled", lambda: pool.get(MODEL).explain_pyspark("df.show()")),
+        ("new per call", per_call_client),
+    ):
+        connections = server.connections
+        ms = timed(fn, calls)
+        print(f"  {name:16} {ms:8.2f} {server.connections - connections:12}")
+    server.stop()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
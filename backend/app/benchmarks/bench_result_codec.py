@@ -0,0 +1,60 @@
+# backend/app/benchmarks/bench_result_codec.py
+"""
+Size and encode/decode time of a job's analysis result per codec:
+JSON (the previous format) vs msgpack, msgpack + zlib, msgpack + zstd.
+
+The analysis result is the largest cached value; the worker writes it
+to `{cache_key}:analysis` and into the job record.
+
+Run from backend/:
+    python -m app.benchmarks.bench_result_codec [statements ...]
+"""
+
+import json
+import sys
+import time
+
+from app.benchmarks.synthetic import generate_etl_script
+from app.services.codec import ResultCodec
+from app.services.dag_pipeline import run_dag_pipeline
+
+CODECS = {
+    "msgpack": ResultCodec(compression=None),
+    "msgpack+zlib": ResultCodec(compression="zlib"),
+    "msgpack+zstd": ResultCodec(compression="zstd"),
+}
+
+
+def best_of(fn, repeat: int = 5) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+
+def main(sizes=(50, 500, 5000)):
+    for statements in sizes:
+        result = run_dag_pipeline(generate_etl_script(statements))
+        baseline = json.dumps(result).encode("utf-8")
+
+        print(f"statements: {statements}")
+        print(f"  {'codec':14} {'bytes':>10} {'ratio':>7} {'encode ms':>10} {'decode ms':>10}")
+        print(
+            f"  {'json':14} {len(baseline):10} {1.0:7.2f} "
+            f"{best_of(lambda: json.dumps(result).encode('utf-8')):10.2f} "
+            f"{best_of(lambda: json.loads(baseline)):10.2f}"
+        )
+        for name, codec in CODECS.items():
+            encoded = codec.encode(result)
+            assert codec.decode(encoded) == json.loads(baseline)
+            print(
+                f"  {name:14} {len(encoded):10} {len(baseline) / len(encoded):7.2f} "
+                f"{best_of(lambda: codec.encode(result)):10.2f} "
+                f"{best_of(lambda: codec.decode(encoded)):10.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main(tuple(int(arg) for arg in sys.argv[1:]) or (50, 500, 5000))
@@ -0,0 +1,59 @@
+# backend/app/benchmarks/redis_latency_proxy.py
+"""
+TCP proxy that delays everything it forwards by a fixed time in each
+direction, for load tests against a Redis with network latency where
+`tc netem` is not available. Each round trip through it takes at
+least 2 x delay.
+
+Run from backend/:
+    python -m app.benchmarks.redis_latency_proxy [listen port] [redis port] [one-way delay ms]
+and point the API at it, e.g. REDIS_URL=redis://127.0.0.1:6380/0.
+"""
+
+import asyncio
+import sys
+
+
+async def _pump(reader, writer, delay: float):
+    loop = asyncio.get_running_loop()
+    pending: asyncio.Queue = asyncio.Queue()
+
+    async def forward():
+        while True:
+            due, data = await pending.get()
+            if data is None:
+                writer.close()
+                return
+            wait = due - loop.time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            writer.write(data)
+            await writer.drain()
+
+    forwarder = asyncio.create_task(forward())
+    while data := await reader.read(65536):
+        pending.put_nowait((loop.time() + delay, data))
+    pending.put_nowait((0.0, None))
+    await forwarder
+
+
+async def serve(listen_port: int, target_port: int, delay: float, target_host: str = "127.0.0.1"):
+    async def handle(client_reader, client_writer):
+        server_reader, server_writer = await asyncio.open_connection(target_host, target_port)
+        await asyncio.gather(
+            _pump(client_reader, server_writer, delay),
+            _pump(server_reader, client_writer, delay),
+            return_exceptions=True,
+        )
+
+    server = await asyncio.start_server(handle, "127.0.0.1", listen_port)
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    asyncio.run(serve(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 6380,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 6379,
+        (float(sys.argv[3]) if len(sys.argv) > 3 else 0.5) / 1000,
+    ))
@@ -0,0 +1,102 @@
+# backend/app/benchmarks/stub_llm.py
+"""
+Local stand-in for the Gemini REST API, for tests, benchmarks and load
+tests without a real model: point the client at it with
+GEMINI_API_ENDPOINT=http://127.0.0.1:<port> and GEMINI_TRANSPORT=rest.
+
+Answers generateContent and streamGenerateContent with a fixed
+explanation, after `latency` seconds; models named in `rate_limited`
+answer 429, and those in `failing` 400.
+
+Run from backend/:
+    python -m app.benchmarks.stub_llm [port]
+"""
+
+import json
+import re
+import socket
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PATH = re.compile(r"/v1beta/models/(?P<model>[^/:]+):(?P<method>generateContent|streamGenerateContent)")
+
+CHUNKS = ["This job reads a table, ", "filters it ", "and writes the result."]
+
+
+def _response(text: str) -> dict:
+    return {
+        "candidates": [{"content": {"parts": [{"text": text}], "role": "model"}, "finishReason": "STOP", "index": 0}],
+        "usageMetadata": {"promptTokenCount": 12, "candidatesTokenCount": 9, "totalTokenCount": 21},
+    }
+
+
+class StubLLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port: int = 0, latency: float = 0.0, rate_limited=(), failing=()):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.latency = latency
+        self.rate_limited = set(rate_limited)
+        self.failing = set(failing)
+        self.requests = 0
+        self.connections = 0
+
+    @property
+    def endpoint(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def start(self) -> "StubLLMServer":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so connection reuse shows
+
+    def setup(self):
+        super().setup()
+        # Headers and body are separate writes: without this, Nagle's
+        # algorithm and delayed ACKs stall every response on a kept-alive
+        # connection by ~40 ms
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.server.connections += 1
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.server.requests += 1
+        match = PATH.match(self.path)
+        if not match:
+            return self._send(404, {"error": {"code": 404, "message": "Not found", "status": "NOT_FOUND"}})
+        if match["model"] in self.server.rate_limited:
+            return self._send(429, {"error": {"code": 429, "message": "Quota exceeded", "status": "RESOURCE_EXHAUSTED"}})
+        if match["model"] in self.server.failing:
+            return self._send(400, {"error": {"code": 400, "message": "Invalid request", "status": "INVALID_ARGUMENT"}})
+
+        time.sleep(self.server.latency)
+        if match["method"] == "generateContent":
+            return self._send(200, _response("".join(CHUNKS)))
+        # Streamed: a JSON array of partial responses
+        return self._send(200, [_response(chunk) for chunk in CHUNKS])
+
+    def _send(self, status: int, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+if __name__ == "__main__":
+    server = StubLLMServer(port=int(sys.argv[1]) if len(sys.argv) > 1 else 8089)
+    print(f"Stub LLM server on {server.endpoint}")
+    server.serve_forever()
@@ -0,0 +1,40 @@
+# backend/app/benchmarks/synthetic.py
+"""
+Synthetic PySpark scripts shaped like our generated ETL jobs.
+Shared by the benchmark scripts in this folder.
+"""
+
+import random
+
+TRANSFORMATIONS = ["select", "filter", "withColumn", "drop", "coalesce"]
+WIDE = ["groupBy", "distinct", "repartition"]
+ACTIONS = ["count", "show", "collect"]
+
+
+def generate_etl_script(statements: int, seed: int = 7) -> str:
+    """
+    Generates a script with `statements` lines of chained DataFrame calls,
+    joins between earlier DataFrames and occasional actions.
+    """
+    rng = random.Random(seed)
+    lines = ['df_0 = spark.read.parquet("s3://bucket/input")']
+    produced = ["df_0"]
+
+    for i in range(1, statements):
+        roll = rng.random()
+        if roll < 0.1 and len(produced) > 1:
+            left, right = rng.sample(produced[-50:], 2)
+            lines.append(f'df_{i} = {left}.join({right}, on="id").select("id", "value")')
+        elif roll < 0.2:
+            lines.append(f"{rng.choice(produced[-50:])}.{rng.choice(ACTIONS)}()")
+            continue
+        else:
+            base = rng.choice(produced[-50:])
+            ops = rng.sample(TRANSFORMATIONS, rng.randint(1, 3))
+            if rng.random() < 0.25:
+                ops.append(rng.choice(WIDE))
+            chain = "".join(f'.{op}("c{i}")' for op in ops)
+            lines.append(f"df_{i} = {base}{chain}")
+        produced.append(f"df_{i}")
+
+    return "\n".join(lines) + "\n"
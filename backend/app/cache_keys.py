@@ -0,0 +1,86 @@
+# backend/app/cache_keys.py
+"""
+Content-addressed cache key derivation.
+
+Keys hash the canonical AST of the submitted code (whitespace, comments
+and quote style do not matter) together with a fingerprint of the
+analyzer, so upgrading Spark semantics or anti-pattern rules
+invalidates old entries.
+"""
+
+import ast
+import hashlib
+import inspect
+from functools import lru_cache
+
+from app.parsers.spark_semantics import SPARK_OPS, SHUFFLE_OPS
+from app.parsers.fused_parser import FusedPySparkParser
+from app.graphs.antipatterns.registry import RULES
+
+# Bump when the shape of stored analysis results changes
+ANALYSIS_SCHEMA_VERSION = 2
+
+
+def _digest(parts) -> str:
+    return hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=4).hexdigest()
+
+
+@lru_cache(maxsize=None)
+def parser_fingerprint() -> str:
+    """
+    Everything that decides which operations are extracted from a statement.
+    """
+    return _digest((
+        sorted((op, op_type.value) for op, op_type in SPARK_OPS.items()),
+        sorted(SHUFFLE_OPS),
+        sorted(FusedPySparkParser.MULTI_PARENT_OPS),
+    ))
+
+
+def _rule_fingerprint(rule) -> tuple:
+    patterns = getattr(rule, "patterns", None)
+    if patterns:
+        definition = repr(patterns)
+    else:
+        # Hand-written rules: their source is the definition
+        try:
+            definition = inspect.getsource(type(rule))
+        except (OSError, TypeError):
+            definition = type(rule).__qualname__
+    return rule.rule_id, rule.severity, definition
+
+
+@lru_cache(maxsize=None)
+def analyzer_fingerprint() -> str:
+    """
+    Parser fingerprint plus the registered anti-pattern rules and the
+    result schema version: anything that changes a cached analysis.
+    """
+    return _digest((
+        ANALYSIS_SCHEMA_VERSION,
+        parser_fingerprint(),
+        [_rule_fingerprint(rule) for rule in RULES],
+    ))
+
+
+def canonical_code_hash(code: str, tree: ast.AST | None = None) -> str:
+    """
+    Hash of the code's AST without positions, plus the line of every
+    statement: node ids and explanations refer to line numbers, so
+    moving statements must miss while intra-line edits hit.
+    Code that does not parse falls back to its raw text.
+    """
+    if tree is None:
+        try:
+            tree = ast.parse(code)
+        except SyntaxError:
+            raw = hashlib.blake2b(code.encode("utf-8"), digest_size=16).hexdigest()
+            return f"raw:{raw}"
+
+    linenos = [node.lineno for node in ast.walk(tree) if isinstance(node, ast.stmt)]
+    canonical = f"{ast.dump(tree)}|{linenos}"
+    return hashlib.blake2b(canonical.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def code_cache_key(code: str, tree: ast.AST | None = None) -> str:
+    return f"explain:code:{analyzer_fingerprint()}:{canonical_code_hash(code, tree)}"
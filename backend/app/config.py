@@ -6,8 +6,21 @@ class Settings(BaseSettings):
     backend_port: int = 8050  # default port for Docker network
     timeout_seconds: int = 15
     redis_url: str = "redis://redis:6379/0"
+    redis_max_connections: int = 50  # async pool size per API worker
+    rate_limit_enabled: bool = True  # off for load tests (app.benchmarks.load_test_api)
+    api_keys: str | None = None  # comma-separated client keys, rate-limited per key instead of per IP
     gemini_model: str
     gemini_fallback_model: str | None = None
+    gemini_api_endpoint: str | None = None  # e.g. a local stub server (app.benchmarks.stub_llm)
+    gemini_transport: str | None = None  # "grpc" (default) | "rest"
+    dag_backend: str = "object"  # "object" | "compact" (array-backed, for large scripts)
+    stage_strategy: str = "queue"  # "queue" | "levels" (frontier sweep with cycle detection)
+    # Per-statement parse cache (parsers.incremental): edit-resubmit runs
+    # only re-parse edited statements, but scripts seen for the first time
+    # parse 1.5-2x slower and write one Redis key per statement
+    statement_cache_enabled: bool = False
+    worker_metrics_port: int = 9100
+    batch_processes: int | None = None  # batch worker process pool size (default: CPU count)
 
     class Config:
         env_file = ".env"
@@ -16,5 +29,80 @@ settings = Settings()
 
 # --- Application behavior (policy) ---
 CACHE_TTL = 3600
+# Restarted whenever a job record or result manifest is (re)written with a
+# reference to the artifact (services.jobs.refresh_artifacts), so it
+# outlives them
+ARTIFACT_TTL = CACHE_TTL + 300
+STATEMENT_CACHE_TTL = 86400  # per-statement parsed operations
+# Per-process cache of decoded results in front of Redis (services.cache),
+# invalidated over pub/sub; the TTL bounds staleness if a message is lost
+LOCAL_CACHE_ENABLED = True
+LOCAL_CACHE_MAX_ENTRIES = 1024
+LOCAL_CACHE_MAX_BYTES = 32 * 1024 * 1024  # uncompressed encoded size of cached values
+LOCAL_CACHE_TTL = 30
+# Results are stored as msgpack, compressed ("zstd", "zlib" or None)
+# when at least this many bytes
+RESULT_COMPRESSION = "zstd"
+RESULT_COMPRESS_MIN_BYTES = 1024
 RATE_LIMIT = 5
-RATE_LIMIT_WINDOW = 60
\ No newline at end of file
+RATE_LIMIT_WINDOW = 60
+# Per-endpoint token buckets: route path -> (requests, per seconds).
+# Endpoints not listed use (RATE_LIMIT, RATE_LIMIT_WINDOW).
+RATE_LIMITS = {
+    "/explain/pyspark": (RATE_LIMIT, RATE_LIMIT_WINDOW),
+    "/explain/pyspark/batch": (2, 60),
+    "/explain/pyspark/batch/archive": (2, 60),
+}
+# Reject clients Redis just rejected without asking Redis again
+RATE_LIMIT_LOCAL_PRECHECK = True
+
+# Anti-pattern detection time budgets (ms); a rule over budget is cut off
+ANTIPATTERN_RULE_BUDGET_MS = 500
+ANTIPATTERN_JOB_BUDGET_MS = 2000
+# Consecutive truncations before a rule is skipped, and for how long (s)
+ANTIPATTERN_BREAKER_THRESHOLD = 3
+ANTIPATTERN_BREAKER_COOLDOWN = 300
+
+# Reuse LLM explanations of structurally identical scripts, with DataFrame
+# names re-mapped. Off by default: literals (tables, paths) are not re-mapped.
+STRUCTURAL_LLM_REUSE = False
+
+# Small scripts are analyzed by the API itself (only the LLM is queued):
+# at most this large, on a pool of this many threads per API worker
+INLINE_ANALYSIS_MAX_BYTES = 20_000
+INLINE_ANALYSIS_MAX_STATEMENTS = 200
+INLINE_ANALYSIS_WORKERS = 2
+
+# Identical submissions attach to the in-flight job computing their result;
+# the claim expires after this long if its worker dies (s)
+INFLIGHT_LOCK_TTL = 600
+
+# Job event streams (GET /jobs/{job_id}/events): keepalive comment interval,
+# and the longest a stream stays open before the client reconnects (s)
+JOB_EVENTS_KEEPALIVE = 15
+JOB_EVENTS_MAX_SECONDS = 300
+# Longest a long-poll (GET /status/{job_id}?wait=&since=) is held (s)
+STATUS_MAX_WAIT = 30
+# Job ids per POST /status/batch
+STATUS_BATCH_MAX_JOBS = 1000
+
+# Stream LLM explanations chunk by chunk to job event streams
+# (services.llm_stream); entries kept per job, and how long the stream
+# outlives the end of the explanation (s)
+LLM_STREAMING = True
+LLM_STREAM_MAXLEN = 10_000
+LLM_STREAM_TTL = 60
+
+# An LLM model rate-limited, or failing this many times in a row, is tried
+# after the other models for a cooldown (s)
+LLM_BREAKER_THRESHOLD = 3
+LLM_BREAKER_COOLDOWN = 30
+
+# Batch / repository analysis limits
+BATCH_MAX_FILES = 5000
+BATCH_MAX_BYTES = 50 * 1024 * 1024  # uncompressed source
+# Uncompressed size of all members of an uploaded archive, Python or not:
+# reading stops at the first member past it. The upload itself may be at
+# most BATCH_MAX_BYTES.
+BATCH_MAX_ARCHIVE_BYTES = 200 * 1024 * 1024
+BATCH_INPUT_TTL = 3600  # staged input, until the batch worker picks it up
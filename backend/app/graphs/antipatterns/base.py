@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import List, Optional
 from app.graphs.operation.operation_graph_builder import OperationDAG
+from app.graphs.antipatterns.context import AnalysisContext
 from dataclasses import dataclass
 
 
@@ -17,5 +18,11 @@ class AntiPatternRule(ABC):
     severity: str
 
     @abstractmethod
-    def detect(self, dag: OperationDAG) -> List[AntiPatternFinding]:
+    def detect(
+        self, dag: OperationDAG, ctx: Optional[AnalysisContext] = None
+    ) -> List[AntiPatternFinding]:
+        """
+        `ctx` is the shared graph index built by detect_antipatterns;
+        rules build their own when called standalone.
+        """
         pass
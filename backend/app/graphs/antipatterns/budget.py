@@ -0,0 +1,79 @@
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from app.graphs.antipatterns.base import AntiPatternFinding
+
+
+@dataclass(frozen=True)
+class RuleBudget:
+    """
+    Time limits for anti-pattern detection.
+
+    - rule_ms: wall time one rule may spend on a DAG before it is cut off
+    - job_ms: wall time for all rules together (including the shared index)
+    - breaker_threshold: consecutive truncations before a rule is disabled
+    - breaker_cooldown_s: how long a disabled rule stays skipped
+    """
+
+    rule_ms: Optional[float] = None
+    job_ms: Optional[float] = None
+    breaker_threshold: int = 3
+    breaker_cooldown_s: float = 300.0
+
+
+@dataclass
+class RuleRun:
+    """
+    Outcome of one rule on one DAG.
+    """
+
+    rule_id: str
+    findings: List[AntiPatternFinding] = field(default_factory=list)
+    elapsed_ms: float = 0.0
+    truncated: bool = False
+    # Truncated by its own rule_ms limit, which counts toward the circuit
+    # breaker; a run cut off by the job limit is not the rule's fault
+    over_budget: bool = False
+    skipped: bool = False
+
+
+def truncated_finding(rule, reason: str) -> AntiPatternFinding:
+    """
+    Marker returned instead of blocking the job when a rule is cut off.
+    """
+    return AntiPatternFinding(
+        rule_id=rule.rule_id,
+        severity="INFO",
+        message=f"Analysis truncated: {reason}. Findings for this rule may be incomplete.",
+        nodes=[],
+    )
+
+
+class CircuitBreaker:
+    """
+    Per-process breaker: a rule that keeps running over budget is skipped
+    for a cooldown period instead of being retried on every job.
+    """
+
+    def __init__(self):
+        self._failures: Dict[str, int] = {}
+        self._open_until: Dict[str, float] = {}
+
+    def allow(self, rule_id: str) -> bool:
+        return time.monotonic() >= self._open_until.get(rule_id, 0.0)
+
+    def record(self, rule_id: str, truncated: bool, budget: RuleBudget):
+        if not truncated:
+            self._failures.pop(rule_id, None)
+            return
+
+        failures = self._failures.get(rule_id, 0) + 1
+        self._failures[rule_id] = failures
+        if failures >= budget.breaker_threshold:
+            self._open_until[rule_id] = time.monotonic() + budget.breaker_cooldown_s
+            self._failures.pop(rule_id, None)
+
+    def reset(self):
+        self._failures.clear()
+        self._open_until.clear()
@@ -0,0 +1,239 @@
+from typing import Dict, List, Optional, Tuple
+from collections import defaultdict
+
+from app.parsers.spark_semantics import OpType, DependencyType
+
+
+class AnalysisContext:
+    """
+    Graph index shared by all anti-pattern rules for one DAG.
+
+    Built once per detect_antipatterns call, so rules query precomputed
+    structure instead of traversing the graph themselves:
+    - topological order (cycles are collapsed into strongly connected
+      components, so every node gets a position)
+    - ancestor reachability as integer bitsets
+    - fan-out counts
+    - per-stage membership and minimum parent stage
+    """
+
+    def __init__(self, dag):
+        self.dag = dag
+        self.ids: List[str] = list(dag.nodes)
+        self.index: Dict[str, int] = {node_id: i for i, node_id in enumerate(self.ids)}
+
+        nodes = list(dag.nodes.values())
+        self.parents: List[List[int]] = [
+            [self.index[p] for p in node.parents] for node in nodes
+        ]
+        self.children: List[List[int]] = [
+            [self.index[c] for c in node.children] for node in nodes
+        ]
+        self.fan_out: List[int] = [len(c) for c in self.children]
+
+        self.actions: List[int] = [
+            i for i, node in enumerate(nodes) if node.op_type == OpType.ACTION
+        ]
+        self.wide: List[int] = [
+            i for i, node in enumerate(nodes)
+            if node.dependency_type == DependencyType.WIDE
+        ]
+
+        self.stage_ids: List[Optional[int]] = [node.stage_id for node in nodes]
+        self.stage_members: Dict[int, List[str]] = defaultdict(list)
+        for node in nodes:
+            if node.stage_id is not None:
+                self.stage_members[node.stage_id].append(node.id)
+
+        self.components = _strongly_connected_components(self.children)
+        self.topological_order: List[int] = [i for comp in self.components for i in comp]
+
+        # Named node sets that reachability can be computed against
+        self.node_sets: Dict[str, List[int]] = {
+            "all": list(range(len(self.ids))),
+            "actions": self.actions,
+            "wide": self.wide,
+            # Nodes whose lineage feeds more than one consumer
+            "reused": [i for i, count in enumerate(self.fan_out) if count > 1],
+        }
+
+        self._reachability: Dict[Tuple[str, bool], Tuple[List[int], List[int]]] = {}
+        self._lineage_roots: Dict[int, int] = {}
+
+    # ------------------------------------------------------------------
+    # Reachability
+    # ------------------------------------------------------------------
+    def ancestor_bits(self, node_set: str) -> Tuple[List[int], List[int]]:
+        """
+        For every node, the set of its ancestors that belong to the named
+        node set.
+
+        Returns (bits, members): bit k of bits[i] is set when members[k]
+        is an ancestor of node i. Bits are dense over the set members, so
+        the integers stay as small as the set, not the whole graph.
+        Computed once per set in a single topological pass.
+        """
+        return self._reachability_bits(node_set, upstream=True)
+
+    def descendant_bits(self, node_set: str) -> Tuple[List[int], List[int]]:
+        """
+        Same as ancestor_bits, for downstream nodes (reverse topological pass).
+        """
+        return self._reachability_bits(node_set, upstream=False)
+
+    def _reachability_bits(self, node_set: str, upstream: bool) -> Tuple[List[int], List[int]]:
+        cache_key = (node_set, upstream)
+        if cache_key in self._reachability:
+            return self._reachability[cache_key]
+
+        members = self.node_sets[node_set]
+        own = [0] * len(self.ids)
+        for k, node in enumerate(members):
+            own[node] = 1 << k
+
+        if upstream:
+            components, edges = self.components, self.parents
+        else:
+            components, edges = reversed(self.components), self.children
+
+        bits = [0] * len(self.ids)
+        for comp in components:
+            reach = 0
+            cyclic = len(comp) > 1
+            comp_set = set(comp)
+            for node in comp:
+                for other in edges[node]:
+                    # Includes self-loops of single-node components
+                    if other in comp_set:
+                        cyclic = True
+                    else:
+                        reach |= bits[other] | own[other]
+            # Inside a cycle every member reaches every member
+            if cyclic:
+                for node in comp:
+                    reach |= own[node]
+            for node in comp:
+                bits[node] = reach
+
+        self._reachability[cache_key] = (bits, members)
+        return bits, members
+
+    def ancestors(self, node_id: str) -> List[str]:
+        """
+        All upstream operation ids of a node.
+        """
+        bits, members = self.ancestor_bits("all")
+        value = bits[self.index[node_id]]
+        return [self.ids[members[k]] for k in range(value.bit_length()) if value >> k & 1]
+
+    def has_reused_ancestor(self, node_id: str) -> bool:
+        bits, _ = self.ancestor_bits("reused")
+        return bits[self.index[node_id]] != 0
+
+    # ------------------------------------------------------------------
+    # Lineage / stages
+    # ------------------------------------------------------------------
+    def lineage_root(self, node_id: str) -> str:
+        """
+        Walk upstream from a node through actions until the first
+        transformation (or a root of the DAG). Memoized per node and
+        safe on cycles of actions.
+        """
+        start = self.index[node_id]
+        if start in self._lineage_roots:
+            return self.ids[self._lineage_roots[start]]
+
+        nodes = self.dag.nodes
+        current = start
+        visited = {current}
+
+        while True:
+            parents = nodes[self.ids[current]].parents
+            if not parents:
+                root = current
+                break
+
+            parent = self.index[next(iter(parents))]
+            if nodes[self.ids[parent]].op_type == OpType.ACTION:
+                if parent in self._lineage_roots:
+                    root = self._lineage_roots[parent]
+                    break
+                if parent in visited:
+                    root = current
+                    break
+                visited.add(parent)
+                current = parent
+                continue
+
+            root = parent
+            break
+
+        for node in visited:
+            self._lineage_roots[node] = root
+        return self.ids[root]
+
+    def min_parent_stage(self, node_id: str) -> Optional[int]:
+        stages = [
+            self.stage_ids[p]
+            for p in self.parents[self.index[node_id]]
+            if self.stage_ids[p] is not None
+        ]
+        return min(stages, default=None)
+
+
+def _strongly_connected_components(children: List[List[int]]) -> List[List[int]]:
+    """
+    Iterative Tarjan. Returns components in topological order
+    (a component only depends on components listed before it).
+    """
+    n = len(children)
+    index = [-1] * n
+    low = [0] * n
+    on_stack = [False] * n
+    stack: List[int] = []
+    components: List[List[int]] = []
+    counter = 0
+
+    for root in range(n):
+        if index[root] != -1:
+            continue
+
+        work = [(root, 0)]
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+
+        while work:
+            node, child_pos = work[-1]
+            if child_pos < len(children[node]):
+                work[-1] = (node, child_pos + 1)
+                child = children[node][child_pos]
+                if index[child] == -1:
+                    index[child] = low[child] = counter
+                    counter += 1
+                    stack.append(child)
+                    on_stack[child] = True
+                    work.append((child, 0))
+                elif on_stack[child]:
+                    low[node] = min(low[node], index[child])
+                continue
+
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[node])
+
+            if low[node] == index[node]:
+                comp = []
+                while True:
+                    member = stack.pop()
+                    on_stack[member] = False
+                    comp.append(member)
+                    if member == node:
+                        break
+                components.append(comp)
+
+    # Tarjan emits sink components first
+    components.reverse()
+    return components
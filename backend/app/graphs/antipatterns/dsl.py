@@ -0,0 +1,279 @@
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from app.graphs.antipatterns.base import AntiPatternRule, AntiPatternFinding
+from app.graphs.antipatterns.context import AnalysisContext
+from app.graphs.antipatterns.budget import RuleRun
+from app.parsers.spark_semantics import OpType, DependencyType
+
+
+@dataclass(frozen=True)
+class NodeMatch:
+    """
+    Declarative node predicate.
+
+    Static fields (label, op_type, dependency_type) are resolved once per
+    node kind when rules are compiled. The remaining fields are evaluated
+    against the shared AnalysisContext:
+    - staged: node must have a stage_id
+    - has_ancestor_in / has_descendant_in: a named context node set
+      ("actions", "wide", "reused", ...) must be upstream / downstream
+    - max_stage_gap: stage_id - min(parent stages) must not exceed it
+    """
+
+    label: Optional[str] = None
+    op_type: Optional[OpType] = None
+    dependency_type: Optional[DependencyType] = None
+    staged: bool = False
+    has_ancestor_in: Optional[str] = None
+    has_descendant_in: Optional[str] = None
+    max_stage_gap: Optional[int] = None
+
+    def matches_kind(self, kind: Tuple[str, OpType, DependencyType]) -> bool:
+        label, op_type, dependency_type = kind
+        return (
+            (self.label is None or self.label == label)
+            and (self.op_type is None or self.op_type == op_type)
+            and (self.dependency_type is None or self.dependency_type == dependency_type)
+        )
+
+    def matches_node(self, ctx: AnalysisContext, idx: int) -> bool:
+        if self.staged and ctx.stage_ids[idx] is None:
+            return False
+
+        if self.max_stage_gap is not None:
+            stage_id = ctx.stage_ids[idx]
+            min_parent_stage = ctx.min_parent_stage(ctx.ids[idx])
+            if stage_id is None or min_parent_stage is None:
+                return False
+            if stage_id - min_parent_stage > self.max_stage_gap:
+                return False
+
+        if self.has_ancestor_in is not None:
+            bits, _ = ctx.ancestor_bits(self.has_ancestor_in)
+            if not bits[idx]:
+                return False
+
+        if self.has_descendant_in is not None:
+            bits, _ = ctx.descendant_bits(self.has_descendant_in)
+            if not bits[idx]:
+                return False
+
+        return True
+
+
+@dataclass(frozen=True)
+class NodePattern:
+    """
+    One finding per matching node.
+    `message` may reference {id}, {label} and {stage_id}.
+    """
+
+    node: NodeMatch
+    message: str
+
+
+@dataclass(frozen=True)
+class EdgePattern:
+    """
+    One finding per parent → child edge where both ends match,
+    e.g. "repartition → wide child".
+    """
+
+    parent: NodeMatch
+    child: NodeMatch
+    message: str
+
+
+@dataclass(frozen=True)
+class GroupPattern:
+    """
+    Groups matching nodes by a context key (e.g. "lineage_root") and
+    emits one finding per group with at least `min_size` members.
+    """
+
+    node: NodeMatch
+    group_by: str
+    message: str
+    min_size: int = 2
+
+
+Pattern = Union[NodePattern, EdgePattern, GroupPattern]
+
+
+def _node_kind(node) -> Tuple[str, OpType, DependencyType]:
+    return node.label, node.op_type, node.dependency_type
+
+
+def _format(message: str, ctx: AnalysisContext, idx: int) -> str:
+    node = ctx.dag.nodes[ctx.ids[idx]]
+    return message.format(id=node.id, label=node.label, stage_id=node.stage_id)
+
+
+class CompiledRuleSet:
+    """
+    All registered declarative rules compiled into one dispatch table.
+
+    The table maps a node kind (label, op_type, dependency_type) to the
+    patterns whose static predicates accept it, so a single topological
+    sweep only evaluates the patterns that can possibly fire on each node.
+    Findings are returned grouped by rule in registration order, and in
+    DAG insertion order within a rule.
+    """
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+        self._dispatch: Dict[tuple, tuple] = {}
+
+    def _entries(self, kind):
+        entries = self._dispatch.get(kind)
+        if entries is None:
+            node_entries, edge_entries, group_entries = [], [], []
+            for rule_pos, rule in enumerate(self.rules):
+                for pattern in rule.patterns:
+                    if isinstance(pattern, EdgePattern):
+                        if pattern.parent.matches_kind(kind):
+                            edge_entries.append((rule_pos, pattern))
+                    elif pattern.node.matches_kind(kind):
+                        if isinstance(pattern, GroupPattern):
+                            group_entries.append((rule_pos, pattern))
+                        else:
+                            node_entries.append((rule_pos, pattern))
+            entries = (node_entries, edge_entries, group_entries)
+            self._dispatch[kind] = entries
+        return entries
+
+    def run(self, dag, ctx: Optional[AnalysisContext] = None) -> List[AntiPatternFinding]:
+        return [f for run in self.match(dag, ctx) for f in run.findings]
+
+    def match(
+        self,
+        dag,
+        ctx: Optional[AnalysisContext] = None,
+        rule_budget_s: Optional[float] = None,
+        deadline: Optional[float] = None,
+        enabled: Optional[Sequence[bool]] = None,
+    ) -> List[RuleRun]:
+        """
+        Single topological sweep. Returns one RuleRun per rule, aligned
+        with self.rules.
+
+        Each rule's evaluation time is accumulated separately. A rule that
+        exceeds `rule_budget_s`, or every remaining rule once the absolute
+        perf_counter `deadline` passes, stops being evaluated and is
+        marked truncated (and over_budget in the first case). Rules with
+        enabled[i] == False are not evaluated.
+        """
+        ctx = ctx or AnalysisContext(dag)
+        nodes = dag.nodes
+        clock = time.perf_counter
+
+        runs = [RuleRun(rule_id=rule.rule_id) for rule in self.rules]
+        active = list(enabled) if enabled is not None else [True] * len(self.rules)
+        elapsed = [0.0] * len(self.rules)
+
+        # Per rule: (sort key, finding)
+        matched: List[list] = [[] for _ in self.rules]
+        groups: Dict[tuple, Dict[str, List[int]]] = {}
+
+        for n, idx in enumerate(ctx.topological_order):
+            node = nodes[ctx.ids[idx]]
+            node_entries, edge_entries, group_entries = self._entries(_node_kind(node))
+
+            for rule_pos, pattern in node_entries:
+                if not active[rule_pos]:
+                    continue
+                started = clock()
+                if pattern.node.matches_node(ctx, idx):
+                    message = _format(pattern.message, ctx, idx)
+                    matched[rule_pos].append(
+                        ((idx, 0), self._finding(rule_pos, message, [node.id]))
+                    )
+                elapsed[rule_pos] += clock() - started
+
+            for rule_pos, pattern in edge_entries:
+                if not active[rule_pos]:
+                    continue
+                started = clock()
+                if pattern.parent.matches_node(ctx, idx):
+                    for seq, child_id in enumerate(node.children):
+                        child_idx = ctx.index[child_id]
+                        if not pattern.child.matches_kind(_node_kind(nodes[child_id])):
+                            continue
+                        if not pattern.child.matches_node(ctx, child_idx):
+                            continue
+                        message = _format(pattern.message, ctx, idx)
+                        matched[rule_pos].append(
+                            ((idx, seq), self._finding(rule_pos, message, [node.id, child_id]))
+                        )
+                elapsed[rule_pos] += clock() - started
+
+            for rule_pos, pattern in group_entries:
+                if not active[rule_pos]:
+                    continue
+                started = clock()
+                if pattern.node.matches_node(ctx, idx):
+                    key = getattr(ctx, pattern.group_by)(node.id)
+                    groups.setdefault((rule_pos, pattern), {}).setdefault(key, []).append(idx)
+                elapsed[rule_pos] += clock() - started
+
+            # Budgets are checked every 64 nodes to keep the clock off the hot path
+            if n & 63 == 63 and (rule_budget_s is not None or deadline is not None):
+                past_deadline = deadline is not None and clock() > deadline
+                for rule_pos in range(len(self.rules)):
+                    if not active[rule_pos]:
+                        continue
+                    over_budget = rule_budget_s is not None and elapsed[rule_pos] > rule_budget_s
+                    if past_deadline or over_budget:
+                        active[rule_pos] = False
+                        runs[rule_pos].truncated = True
+                        runs[rule_pos].over_budget = over_budget
+                if past_deadline:
+                    break
+
+        for (rule_pos, pattern), by_key in groups.items():
+            started = clock()
+            for members in by_key.values():
+                if len(members) < pattern.min_size:
+                    continue
+                members.sort()
+                matched[rule_pos].append(
+                    (
+                        (members[0], 0),
+                        self._finding(rule_pos, pattern.message, [ctx.ids[i] for i in members]),
+                    )
+                )
+            elapsed[rule_pos] += clock() - started
+
+        for rule_pos, rule_matches in enumerate(matched):
+            rule_matches.sort(key=lambda item: item[0])
+            runs[rule_pos].findings = [finding for _, finding in rule_matches]
+            runs[rule_pos].elapsed_ms = elapsed[rule_pos] * 1000
+        return runs
+
+    def _finding(self, rule_pos: int, message: str, node_ids: List[str]) -> AntiPatternFinding:
+        rule = self.rules[rule_pos]
+        return AntiPatternFinding(
+            rule_id=rule.rule_id,
+            severity=rule.severity,
+            message=message,
+            nodes=node_ids,
+        )
+
+
+def compile_rules(rules) -> CompiledRuleSet:
+    return CompiledRuleSet(rules)
+
+
+class DeclarativeRule(AntiPatternRule):
+    """
+    Rule defined by declarative patterns instead of a hand-written
+    traversal. detect_antipatterns compiles all of them together;
+    detect() runs this rule alone.
+    """
+
+    patterns: Tuple[Pattern, ...] = ()
+
+    def detect(self, dag, ctx=None) -> List[AntiPatternFinding]:
+        return compile_rules([self]).run(dag, ctx)
@@ -1,7 +1,20 @@
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional
+
 from app.graphs.antipatterns.rules.multiple_actions import MultipleActionsRule
 from app.graphs.antipatterns.rules.early_shuffle import EarlyShuffleRule
 from app.graphs.antipatterns.rules.action_without_cache import ActionWithoutCacheRule
 from app.graphs.antipatterns.rules.repartition_misuse import RepartitionMisuseRule
+from app.graphs.antipatterns.base import AntiPatternFinding
+from app.graphs.antipatterns.context import AnalysisContext
+from app.graphs.antipatterns.dsl import DeclarativeRule, compile_rules
+from app.graphs.antipatterns.budget import (
+    CircuitBreaker,
+    RuleBudget,
+    RuleRun,
+    truncated_finding,
+)
 
 RULES = [
     MultipleActionsRule(),
@@ -10,9 +23,111 @@ RULES = [
     RepartitionMisuseRule(),
 ]
 
+# Declarative rules are evaluated together in one topological sweep
+COMPILED_RULES = compile_rules(
+    [rule for rule in RULES if isinstance(rule, DeclarativeRule)]
+)
 
-def detect_antipatterns(dag):
-    findings = []
+# Rules that keep running over budget are skipped for a while (per process).
+# Only runs with a per-rule limit consult and update it: an unbudgeted run
+# (e.g. detect_antipatterns) neither skips rules nor resets their counts.
+BREAKER = CircuitBreaker()
+
+
+@dataclass
+class AntiPatternReport:
+    findings: List[AntiPatternFinding]
+    runs: List[RuleRun] = field(default_factory=list)
+    context_ms: float = 0.0
+    total_ms: float = 0.0
+
+    def timings(self) -> dict:
+        return {
+            "total_ms": round(self.total_ms, 3),
+            "context_ms": round(self.context_ms, 3),
+            "rules": [
+                {
+                    "rule_id": run.rule_id,
+                    "elapsed_ms": round(run.elapsed_ms, 3),
+                    "findings": len(run.findings),
+                    "truncated": run.truncated,
+                    "over_budget": run.over_budget,
+                    "skipped": run.skipped,
+                }
+                for run in self.runs
+            ],
+        }
+
+
+def run_antipattern_rules(dag, budget: Optional[RuleBudget] = None) -> AntiPatternReport:
+    """
+    Runs every registered rule with per-rule timing.
+
+    With a budget, a rule over its own limit (or any rule still running
+    when the job limit is reached) is cut off and reports a truncated
+    finding instead of blocking the job. Rules over their own limit
+    repeatedly have their circuit opened, and are then skipped entirely
+    by runs with a rule limit.
+    """
+    budget = budget or RuleBudget()
+    started = time.perf_counter()
+    deadline = started + budget.job_ms / 1000 if budget.job_ms is not None else None
+    rule_budget_s = budget.rule_ms / 1000 if budget.rule_ms is not None else None
+    use_breaker = rule_budget_s is not None
+
+    # One graph index per DAG, shared by every rule
+    ctx = AnalysisContext(dag)
+    context_ms = (time.perf_counter() - started) * 1000
+
+    allowed = {id(rule): not use_breaker or BREAKER.allow(rule.rule_id) for rule in RULES}
+    compiled_runs = dict(zip(
+        (id(rule) for rule in COMPILED_RULES.rules),
+        COMPILED_RULES.match(
+            dag,
+            ctx,
+            rule_budget_s=rule_budget_s,
+            deadline=deadline,
+            enabled=[allowed[id(rule)] for rule in COMPILED_RULES.rules],
+        ),
+    ))
+
+    runs = []
     for rule in RULES:
-        findings.extend(rule.detect(dag))
-    return findings
+        if not allowed[id(rule)]:
+            run = RuleRun(rule_id=rule.rule_id, skipped=True)
+            run.findings = [truncated_finding(rule, "rule temporarily disabled after repeated timeouts")]
+            runs.append(run)
+            continue
+
+        if id(rule) in compiled_runs:
+            run = compiled_runs[id(rule)]
+        elif deadline is not None and time.perf_counter() > deadline:
+            run = RuleRun(rule_id=rule.rule_id, truncated=True)
+        else:
+            # Hand-written rules cannot be interrupted, only timed
+            rule_started = time.perf_counter()
+            run = RuleRun(rule_id=rule.rule_id, findings=rule.detect(dag, ctx))
+            run.elapsed_ms = (time.perf_counter() - rule_started) * 1000
+            run.truncated = rule_budget_s is not None and run.elapsed_ms > budget.rule_ms
+            run.over_budget = run.truncated
+
+        if run.over_budget:
+            run.findings.append(truncated_finding(rule, "rule time budget exceeded"))
+        elif run.truncated:
+            run.findings.append(truncated_finding(rule, "job time budget exceeded"))
+        # Only the rule's own budget counts: a job cut short by a large
+        # script would otherwise open the circuit of every rule at once
+        if use_breaker and (run.over_budget or not run.truncated):
+            BREAKER.record(rule.rule_id, run.over_budget, budget)
+        runs.append(run)
+
+    return AntiPatternReport(
+        findings=[f for run in runs for f in run.findings],
+        runs=runs,
+        context_ms=context_ms,
+        total_ms=(time.perf_counter() - started) * 1000,
+    )
+
+
+def detect_antipatterns(dag):
+    return run_antipattern_rules(dag).findings
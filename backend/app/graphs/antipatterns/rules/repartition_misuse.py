@@ -1,9 +1,8 @@
-from typing import List
-from app.graphs.antipatterns.base import AntiPatternRule, AntiPatternFinding
+from app.graphs.antipatterns.dsl import DeclarativeRule, NodeMatch, EdgePattern
 from app.parsers.spark_semantics import DependencyType
 
 
-class RepartitionMisuseRule(AntiPatternRule):
+class RepartitionMisuseRule(DeclarativeRule):
     """
     Detects repartition() followed by another shuffle,
     indicating redundant or unnecessary repartitioning.
@@ -12,32 +11,14 @@ class RepartitionMisuseRule(AntiPatternRule):
     rule_id = "REPARTITION_MISUSE"
     severity = "MEDIUM"
 
-    def detect(self, dag) -> List[AntiPatternFinding]:
-        findings = []
-
-        for node in dag.nodes.values():
-            if node.label != "repartition":
-                continue
-
-            # repartition itself is always wide
-            if node.dependency_type != DependencyType.WIDE:
-                continue
-
-            for child_id in node.children:
-                child = dag.nodes[child_id]
-
-                # If repartition is followed immediately by another shuffle
-                if child.dependency_type == DependencyType.WIDE:
-                    findings.append(
-                        AntiPatternFinding(
-                            rule_id=self.rule_id,
-                            severity=self.severity,
-                            message=(
-                                "repartition() followed by another shuffle operation. "
-                                "This repartition is likely unnecessary."
-                            ),
-                            nodes=[node.id, child.id],
-                        )
-                    )
-
-        return findings
+    patterns = (
+        # repartition itself is always wide, followed immediately by another shuffle
+        EdgePattern(
+            parent=NodeMatch(label="repartition", dependency_type=DependencyType.WIDE),
+            child=NodeMatch(dependency_type=DependencyType.WIDE),
+            message=(
+                "repartition() followed by another shuffle operation. "
+                "This repartition is likely unnecessary."
+            ),
+        ),
+    )
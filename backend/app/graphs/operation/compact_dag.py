@@ -0,0 +1,260 @@
+from array import array
+from collections.abc import Mapping
+from typing import Dict, Iterator, List, Tuple
+
+from app.parsers.spark_semantics import OpType, DependencyType
+
+# op_type is stored as a small integer code
+_OP_TYPES = (None, OpType.TRANSFORMATION, OpType.ACTION)
+_OP_TYPE_CODES = {op_type: code for code, op_type in enumerate(_OP_TYPES)}
+
+_NO_STAGE = -1
+
+
+class CompactOperationDAG:
+    """
+    Array-backed execution DAG (operation → operation).
+
+    Drop-in alternative to OperationDAG for large scripts:
+    - Nodes are integer indices, string ids are only kept for lookup/output
+    - Labels are interned into a label table
+    - Per-node attributes live in typed `array`s
+    - Parent / child adjacency is stored as CSR offset + index arrays,
+      rebuilt lazily after edges are added
+
+    `nodes` behaves like Dict[str, OperationDAGNode]: it yields lightweight
+    node views exposing the same attributes, so stage assignment,
+    anti-pattern rules and visualizers work unchanged.
+    """
+
+    def __init__(self):
+        self._ids: List[str] = []
+        self._index: Dict[str, int] = {}
+
+        self._labels: List[str] = []
+        self._label_index: Dict[str, int] = {}
+
+        self._label_ids = array("I")
+        self._op_types = array("B")
+        self._causes_shuffle = array("B")
+        self._linenos = array("I")
+        self._stage_ids = array("i")
+
+        # Edge list, compacted into CSR on first read
+        self._edge_src = array("I")
+        self._edge_dst = array("I")
+        self._csr: Tuple[array, array, array, array] | None = None
+
+        self.nodes = CompactNodeMap(self)
+
+    # ------------------------------------------------------------------
+    # OperationDAG API
+    # ------------------------------------------------------------------
+    def add_node(self, node):
+        """
+        Accepts an OperationDAGNode (or any object with the same fields).
+        Only its scalar attributes are copied.
+        """
+        self.add_operation(
+            id=node.id,
+            label=node.label,
+            op_type=node.op_type,
+            causes_shuffle=node.causes_shuffle,
+            lineno=node.lineno,
+        )
+
+    def add_edge(self, parent_id: str, child_id: str):
+        self._edge_src.append(self._index[parent_id])
+        self._edge_dst.append(self._index[child_id])
+        self._csr = None
+
+    # ------------------------------------------------------------------
+    # Compact API
+    # ------------------------------------------------------------------
+    def add_operation(
+        self,
+        id: str,
+        label: str,
+        op_type: OpType | None,
+        causes_shuffle: bool,
+        lineno: int,
+    ) -> int:
+        if id in self._index:
+            return self._index[id]
+
+        label_id = self._label_index.get(label)
+        if label_id is None:
+            label_id = len(self._labels)
+            self._labels.append(label)
+            self._label_index[label] = label_id
+
+        idx = len(self._ids)
+        self._ids.append(id)
+        self._index[id] = idx
+        self._label_ids.append(label_id)
+        self._op_types.append(_OP_TYPE_CODES[op_type])
+        self._causes_shuffle.append(1 if causes_shuffle else 0)
+        self._linenos.append(lineno)
+        self._stage_ids.append(_NO_STAGE)
+        self._csr = None
+        return idx
+
+    def children_of(self, idx: int) -> array:
+        offsets, indices, _, _ = self.adjacency()
+        return indices[offsets[idx]:offsets[idx + 1]]
+
+    def parents_of(self, idx: int) -> array:
+        _, _, offsets, indices = self.adjacency()
+        return indices[offsets[idx]:offsets[idx + 1]]
+
+    @property
+    def causes_shuffle_flags(self) -> array:
+        return self._causes_shuffle
+
+    @classmethod
+    def from_dag(cls, dag) -> "CompactOperationDAG":
+        """
+        Converts an OperationDAG into the compact representation.
+        """
+        compact = cls()
+        for node in dag.nodes.values():
+            compact.add_node(node)
+            if node.stage_id is not None:
+                compact._stage_ids[-1] = node.stage_id
+        for node in dag.nodes.values():
+            for child_id in node.children:
+                compact.add_edge(node.id, child_id)
+        return compact
+
+    # ------------------------------------------------------------------
+    # CSR construction
+    # ------------------------------------------------------------------
+    def adjacency(self) -> Tuple[array, array, array, array]:
+        """
+        Returns (child_offsets, child_index, parent_offsets, parent_index).
+        """
+        if self._csr is None:
+            n = len(self._ids)
+            child_offsets, child_index = _build_csr(n, self._edge_src, self._edge_dst)
+            parent_offsets, parent_index = _build_csr(n, self._edge_dst, self._edge_src)
+            self._csr = (child_offsets, child_index, parent_offsets, parent_index)
+        return self._csr
+
+
+def _build_csr(n: int, src: array, dst: array) -> Tuple[array, array]:
+    """
+    Counting-sort an edge list into CSR form.
+    Duplicate edges are dropped, matching the set semantics of OperationDAG.
+    """
+    offsets = array("I", [0]) * (n + 1)
+    for s in src:
+        offsets[s + 1] += 1
+    for i in range(n):
+        offsets[i + 1] += offsets[i]
+
+    cursor = array("I", offsets[:n])
+    indices = array("I", [0]) * len(src)
+    for s, d in zip(src, dst):
+        indices[cursor[s]] = d
+        cursor[s] += 1
+
+    has_duplicates = any(
+        offsets[i + 1] - offsets[i] > 1
+        and len(set(indices[offsets[i]:offsets[i + 1]])) < offsets[i + 1] - offsets[i]
+        for i in range(n)
+    )
+    if not has_duplicates:
+        return offsets, indices
+
+    # Rebuild rows without duplicates
+    deduped_offsets = array("I", [0]) * (n + 1)
+    deduped = array("I")
+    for i in range(n):
+        row = indices[offsets[i]:offsets[i + 1]]
+        deduped.extend(dict.fromkeys(row))
+        deduped_offsets[i + 1] = len(deduped)
+    return deduped_offsets, deduped
+
+
+class CompactNodeView:
+    """
+    Read/write view over one node of a CompactOperationDAG,
+    exposing the OperationDAGNode attributes.
+    """
+
+    __slots__ = ("_dag", "_idx")
+
+    def __init__(self, dag: CompactOperationDAG, idx: int):
+        self._dag = dag
+        self._idx = idx
+
+    @property
+    def index(self) -> int:
+        return self._idx
+
+    @property
+    def id(self) -> str:
+        return self._dag._ids[self._idx]
+
+    @property
+    def label(self) -> str:
+        return self._dag._labels[self._dag._label_ids[self._idx]]
+
+    @property
+    def op_type(self) -> OpType | None:
+        return _OP_TYPES[self._dag._op_types[self._idx]]
+
+    @property
+    def causes_shuffle(self) -> bool:
+        return bool(self._dag._causes_shuffle[self._idx])
+
+    @property
+    def lineno(self) -> int:
+        return self._dag._linenos[self._idx]
+
+    @property
+    def dependency_type(self) -> DependencyType:
+        return DependencyType.WIDE if self.causes_shuffle else DependencyType.NARROW
+
+    @property
+    def stage_id(self) -> int | None:
+        stage_id = self._dag._stage_ids[self._idx]
+        return None if stage_id == _NO_STAGE else stage_id
+
+    @stage_id.setter
+    def stage_id(self, value: int | None):
+        self._dag._stage_ids[self._idx] = _NO_STAGE if value is None else value
+
+    @property
+    def parents(self) -> Tuple[str, ...]:
+        ids = self._dag._ids
+        return tuple(ids[i] for i in self._dag.parents_of(self._idx))
+
+    @property
+    def children(self) -> Tuple[str, ...]:
+        ids = self._dag._ids
+        return tuple(ids[i] for i in self._dag.children_of(self._idx))
+
+    def __repr__(self) -> str:
+        return f"CompactNodeView(id={self.id!r}, label={self.label!r})"
+
+
+class CompactNodeMap(Mapping):
+    """
+    Dict-like `nodes` accessor: node id → CompactNodeView.
+    """
+
+    def __init__(self, dag: CompactOperationDAG):
+        self._dag = dag
+
+    def __getitem__(self, node_id: str) -> CompactNodeView:
+        return CompactNodeView(self._dag, self._dag._index[node_id])
+
+    def __contains__(self, node_id) -> bool:
+        return node_id in self._dag._index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._dag._ids)
+
+    def __len__(self) -> int:
+        return len(self._dag._ids)
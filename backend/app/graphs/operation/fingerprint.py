@@ -0,0 +1,98 @@
+import hashlib
+import re
+from typing import Dict, List, Optional
+
+from app.graphs.operation.stage_assignment import topological_levels
+
+
+def _digest(*parts: str) -> str:
+    return hashlib.blake2b("|".join(parts).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def structural_hashes(dag) -> Dict[str, str]:
+    """
+    Bottom-up Merkle hash of every node: its label, op type and shuffle
+    flag plus the sorted hashes of its parents. Node ids, DataFrame
+    names and line numbers are ignored, so the same pipeline shape gets
+    the same hashes whatever the variables and tables are called.
+
+    Nodes in (or downstream of) a cycle cannot be hashed bottom-up; they
+    hash their own attributes and a cycle marker instead.
+    """
+    nodes = dag.nodes
+    hashes: Dict[str, str] = {}
+    levels, unordered = topological_levels(dag)
+
+    for level in levels:
+        for node_id in level:
+            node = nodes[node_id]
+            parent_hashes = sorted(hashes[p] for p in node.parents)
+            hashes[node_id] = _digest(
+                node.label,
+                str(node.op_type and node.op_type.value),
+                str(int(node.causes_shuffle)),
+                *parent_hashes,
+            )
+
+    for node_id in unordered:
+        node = nodes[node_id]
+        hashes[node_id] = _digest(
+            node.label,
+            str(node.op_type and node.op_type.value),
+            str(int(node.causes_shuffle)),
+            "cycle",
+            str(len(node.parents)),
+        )
+
+    return hashes
+
+
+def dag_fingerprint(dag) -> str:
+    """
+    Structural fingerprint of the whole DAG: the Merkle hashes of its
+    nodes in insertion (source) order plus each node's parents by
+    position. Two DAGs with the same fingerprint are identical up to
+    renaming, and node i of one corresponds to node i of the other, so
+    results stored by node position can be re-mapped onto the new ids.
+    """
+    hashes = structural_hashes(dag)
+    position = {node_id: i for i, node_id in enumerate(dag.nodes)}
+    parts = []
+    for node_id, node in dag.nodes.items():
+        parents = ",".join(str(p) for p in sorted(position[p] for p in node.parents))
+        parts.append(f"{hashes[node_id]}<{parents}")
+    return _digest(*parts)
+
+
+def dataframe_names(dag) -> List[str]:
+    """
+    DataFrame name of every node, in node order. Node ids are built as
+    {dataframe}_{operation}_{lineno}.
+    """
+    names = []
+    for node_id, node in dag.nodes.items():
+        suffix = f"_{node.label}_{node.lineno}"
+        names.append(node_id[: -len(suffix)] if node_id.endswith(suffix) else node_id)
+    return names
+
+
+def remap_names(text: str, old_names: List[str], new_names: List[str]) -> Optional[str]:
+    """
+    Replaces whole-word occurrences of old_names[i] with new_names[i]
+    in one pass (so swapped names do not clobber each other).
+    Returns None when the mapping is ambiguous, i.e. one old name
+    corresponds to several new ones.
+    """
+    mapping: Dict[str, str] = {}
+    for old, new in zip(old_names, new_names):
+        if mapping.setdefault(old, new) != new:
+            return None
+
+    renamed = {old: new for old, new in mapping.items() if old != new}
+    if not renamed:
+        return text
+
+    pattern = re.compile(
+        r"\b(" + "|".join(re.escape(old) for old in sorted(renamed, key=len, reverse=True)) + r")\b"
+    )
+    return pattern.sub(lambda match: renamed[match.group(0)], text)
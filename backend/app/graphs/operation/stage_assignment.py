@@ -1,7 +1,24 @@
 from __future__ import annotations
+import logging
+from array import array
+from typing import List, Tuple
 from app.parsers.spark_semantics import DependencyType
 from collections import deque
 from app.graphs.operation.operation_graph_builder import OperationDAG
+
+logger = logging.getLogger(__name__)
+
+
+class DAGCycleError(ValueError):
+    """Raised when stage assignment finds nodes that can never be ordered."""
+
+    def __init__(self, node_ids: List[str]):
+        self.node_ids = node_ids
+        super().__init__(
+            f"Operation DAG contains a cycle; {len(node_ids)} node(s) "
+            f"cannot be staged: {', '.join(node_ids[:10])}"
+        )
+
     
 def topological_sort(dag: OperationDAG):
     """
@@ -24,7 +41,7 @@ def topological_sort(dag: OperationDAG):
     return ordered
 
 
-def assign_stages(dag: OperationDAG) -> OperationDAG:
+def assign_stages_queue(dag: OperationDAG) -> OperationDAG:
     """
     Assign Spark stage IDs based on wide dependencies.
 
@@ -54,3 +71,131 @@ def assign_stages(dag: OperationDAG) -> OperationDAG:
             node.stage_id += 1
             
     return dag
+
+
+def _dag_arrays(dag) -> Tuple[List[str], array, array, array]:
+    """
+    Flattens a DAG into (ids, child_offsets, child_index, is_wide).
+    CompactOperationDAG already stores CSR arrays and is used as-is.
+    """
+    if hasattr(dag, "adjacency"):
+        child_offsets, child_index, _, _ = dag.adjacency()
+        return list(dag.nodes), child_offsets, child_index, dag.causes_shuffle_flags
+
+    ids = list(dag.nodes)
+    index = {node_id: i for i, node_id in enumerate(ids)}
+    child_offsets = array("I", [0])
+    child_index = array("I")
+    is_wide = array("B")
+    for node in dag.nodes.values():
+        child_index.extend(index[c] for c in node.children)
+        child_offsets.append(len(child_index))
+        is_wide.append(node.dependency_type == DependencyType.WIDE)
+    return ids, child_offsets, child_index, is_wide
+
+
+def topological_levels(dag) -> Tuple[List[List[str]], List[str]]:
+    """
+    Level-synchronous topological sort.
+
+    Returns (levels, unordered): every node in a level only depends on
+    nodes of earlier levels; `unordered` holds nodes that sit in (or
+    downstream of) a cycle and therefore never reach in-degree 0.
+    """
+    ids, child_offsets, child_index, _ = _dag_arrays(dag)
+    levels, unordered, _ = _sweep_levels(ids, child_offsets, child_index, None)
+    return (
+        [[ids[i] for i in level] for level in levels],
+        [ids[i] for i in unordered],
+    )
+
+
+def _sweep_levels(ids, child_offsets, child_index, is_wide):
+    """
+    Processes the DAG one frontier at a time. When `is_wide` is given,
+    each node's stage is computed as max(parent_stage) + is_wide while
+    its parents' frontier is pushed downstream.
+    """
+    n = len(ids)
+    in_degree = array("I", [0]) * n
+    for c in child_index:
+        in_degree[c] += 1
+
+    # Running max of parent stages (stage 0 when there are no parents)
+    max_parent_stage = array("i", [0]) * n
+    stages = array("i", [-1]) * n
+
+    frontier = [i for i in range(n) if in_degree[i] == 0]
+    for i in frontier:
+        stages[i] = 0
+
+    levels = []
+    while frontier:
+        levels.append(frontier)
+        next_frontier = []
+        for u in frontier:
+            stage = stages[u]
+            for c in child_index[child_offsets[u]:child_offsets[u + 1]]:
+                if stage > max_parent_stage[c]:
+                    max_parent_stage[c] = stage
+                in_degree[c] -= 1
+                if in_degree[c] == 0:
+                    next_frontier.append(c)
+
+        if is_wide is not None:
+            for c in next_frontier:
+                stages[c] = max_parent_stage[c] + is_wide[c]
+        else:
+            for c in next_frontier:
+                stages[c] = 0
+        frontier = next_frontier
+
+    unordered = [i for i in range(n) if stages[i] == -1]
+    return levels, unordered, stages
+
+
+def assign_stages_levels(dag, strict: bool = False):
+    """
+    Frontier-based stage assignment, equivalent to assign_stages_queue.
+
+    Unlike the queue version, nodes that can never be ordered because of
+    a cycle are detected explicitly: they raise DAGCycleError when
+    `strict`, otherwise they are logged and left with stage_id=None.
+    """
+    ids, child_offsets, child_index, is_wide = _dag_arrays(dag)
+    _, unordered, stages = _sweep_levels(ids, child_offsets, child_index, is_wide)
+
+    if unordered:
+        cyclic = [ids[i] for i in unordered]
+        if strict:
+            raise DAGCycleError(cyclic)
+        logger.warning(
+            "stage_assignment_cycle",
+            extra={
+                "event": "stage_assignment_cycle",
+                "unstaged_nodes": len(cyclic),
+                "sample_nodes": cyclic[:10],
+            },
+        )
+
+    nodes = dag.nodes
+    for i, node_id in enumerate(ids):
+        if stages[i] != -1:
+            nodes[node_id].stage_id = stages[i]
+
+    return dag
+
+
+STAGE_STRATEGIES = {
+    "queue": assign_stages_queue,
+    "levels": assign_stages_levels,
+}
+
+
+def assign_stages(dag: OperationDAG, strategy: str = "queue") -> OperationDAG:
+    """
+    Assign Spark stage IDs using the selected strategy:
+    - "queue": node-at-a-time Kahn traversal
+    - "levels": level-synchronous frontier sweep with cycle detection
+    """
+    return STAGE_STRATEGIES[strategy](dag)
@@ -1,14 +1,42 @@
 # backend/app/main.py
+import gc
 import logging
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, generate_latest
 from .api.routes import router
+from .workers.tasks import QUEUES
 from app.logging import setup_logging
+from app.metrics import metrics_registry, QueueDepthCollector
+from app.services.cache import async_redis_client, redis_client
+from app.services.job_events import job_event_hub
 
 setup_logging(service_name="backend")
 
 app = FastAPI(title="PySpark Code Reviewer", version="1.0.0")
 app.include_router(router)
 
+# Celery queue depths, read from the broker on each scrape
+queue_registry = CollectorRegistry()
+queue_registry.register(QueueDepthCollector(redis_client, QUEUES))
+
+@app.on_event("startup")
+def freeze_gc():
+    # Everything allocated so far (modules, app, clients) lives for good:
+    # keep it out of the collections the request path triggers
+    gc.freeze()
+
+@app.on_event("shutdown")
+async def close_redis_pool():
+    await job_event_hub.close()
+    await async_redis_client.aclose()
+
 @app.get("/")
 def root():
     return {"message": "PySpark LLM Explainer API running"}
+
+@app.get("/metrics")
+def metrics():
+    return Response(
+        generate_latest(metrics_registry()) + generate_latest(queue_registry),
+        media_type=CONTENT_TYPE_LATEST,
+    )
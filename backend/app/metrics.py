@@ -0,0 +1,234 @@
+# backend/app/metrics.py
+import os
+from prometheus_client import (
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    REGISTRY,
+    multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+# --- Anti-pattern rules ---
+ANTIPATTERN_RULE_SECONDS = Histogram(
+    "antipattern_rule_seconds",
+    "Wall time spent by one anti-pattern rule on one DAG",
+    ["rule_id"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5),
+)
+ANTIPATTERN_RULE_TRUNCATED = Counter(
+    "antipattern_rule_truncated_total",
+    "Anti-pattern rule runs cut off by their own time budget",
+    ["rule_id"],
+)
+ANTIPATTERN_DEADLINE_TRUNCATED = Counter(
+    "antipattern_deadline_truncated_total",
+    "Anti-pattern rule runs cut off by the job time budget",
+    ["rule_id"],
+)
+ANTIPATTERN_RULE_SKIPPED = Counter(
+    "antipattern_rule_skipped_total",
+    "Anti-pattern rule runs skipped because the rule's circuit is open",
+    ["rule_id"],
+)
+ANTIPATTERN_JOB_SECONDS = Histogram(
+    "antipattern_job_seconds",
+    "Wall time spent on anti-pattern detection for one DAG",
+)
+
+# --- Statement-level parse cache ---
+STATEMENT_CACHE_HITS = Counter(
+    "statement_cache_hits_total",
+    "Top-level statements whose parsed operations were reused",
+)
+STATEMENT_CACHE_MISSES = Counter(
+    "statement_cache_misses_total",
+    "Top-level statements that had to be parsed",
+)
+
+# --- Structural (cross-script) analysis cache ---
+STRUCTURE_CACHE_HITS = Counter(
+    "structure_cache_hits_total",
+    "Analyses whose stages and findings were re-mapped from a structurally identical DAG",
+)
+STRUCTURE_CACHE_MISSES = Counter(
+    "structure_cache_misses_total",
+    "Analyses with no structurally identical DAG cached",
+)
+LLM_STRUCTURE_REUSE = Counter(
+    "llm_structure_reuse_total",
+    "LLM explanations reused from a structurally identical script",
+)
+
+# --- In-process result cache (services.cache) ---
+LOCAL_CACHE_HITS = Counter(
+    "local_cache_hits_total",
+    "Result reads served from the in-process cache",
+)
+LOCAL_CACHE_MISSES = Counter(
+    "local_cache_misses_total",
+    "Result reads that went to Redis",
+)
+LOCAL_CACHE_EVICTIONS = Counter(
+    "local_cache_evictions_total",
+    "In-process cache entries evicted to stay within size limits",
+)
+LOCAL_CACHE_INVALIDATIONS = Counter(
+    "local_cache_invalidations_total",
+    "Invalidation messages received over pub/sub",
+)
+# Gauges are per process; "livesum" adds up the live processes
+LOCAL_CACHE_ENTRIES = Gauge(
+    "local_cache_entries",
+    "Entries in the in-process result cache",
+    multiprocess_mode="livesum",
+)
+LOCAL_CACHE_BYTES = Gauge(
+    "local_cache_bytes",
+    "Approximate size (uncompressed encoded bytes) of the in-process result cache",
+    multiprocess_mode="livesum",
+)
+
+# --- Job event streams ---
+JOB_EVENT_STREAMS = Gauge(
+    "job_event_streams",
+    "Open job event streams (GET /jobs/{job_id}/events)",
+    multiprocess_mode="livesum",
+)
+
+# --- Explain request paths ---
+EXPLAIN_REQUESTS = Counter(
+    "explain_requests_total",
+    "Explain requests by path: cached, coalesced (attached to an in-flight "
+    "job), inline (analyzed by the API) or queued",
+    ["path"],
+)
+INLINE_ANALYSIS_SECONDS = Histogram(
+    "inline_analysis_seconds",
+    "Time to analyze a small script in the API and store its artifacts",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+)
+
+# --- LLM ---
+LLM_TIME_TO_FIRST_TOKEN_SECONDS = Histogram(
+    "llm_time_to_first_token_seconds",
+    "Time from an LLM request to its first streamed chunk",
+    ["model"],
+    buckets=(0.1, 0.25, 0.5, 1, 2, 3, 5, 10, 30),
+)
+LLM_REQUEST_SECONDS = Histogram(
+    "llm_request_seconds",
+    "Time from an LLM request to its complete response",
+    ["model"],
+    buckets=(0.25, 0.5, 1, 2, 3, 5, 10, 20, 30, 60),
+)
+
+LLM_CLIENTS_CREATED = Counter(
+    "llm_clients_created_total",
+    "LLM model clients created; reused for the life of the process",
+    ["model"],
+)
+LLM_CALLS = Counter(
+    "llm_calls_total",
+    "LLM requests, by model",
+    ["model"],
+)
+LLM_FAILURES = Counter(
+    "llm_failures_total",
+    "Failed LLM requests, by model and reason (rate_limited or error)",
+    ["model", "reason"],
+)
+# Unix time until which a model is skipped after failing (0: healthy);
+# the model is unhealthy while this is above time()
+LLM_UNHEALTHY_UNTIL = Gauge(
+    "llm_client_unhealthy_until_seconds",
+    "Unix time until which the model's client is considered unhealthy",
+    ["model"],
+    multiprocess_mode="livemax",
+)
+
+# --- Celery queues ---
+CELERY_QUEUE_WAIT_SECONDS = Histogram(
+    "celery_queue_wait_seconds",
+    "Time tasks spent waiting in their queue before starting",
+    ["queue"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 300),
+)
+CELERY_TASK_SECONDS = Histogram(
+    "celery_task_seconds",
+    "Task run time, by queue and task",
+    ["queue", "task"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 300),
+)
+
+
+class QueueDepthCollector:
+    """
+    Messages waiting in each Celery queue, read from the Redis broker
+    (one list per queue) when metrics are scraped.
+    """
+
+    def __init__(self, client, queues):
+        self.client = client
+        self.queues = tuple(queues)
+
+    def collect(self):
+        depth = GaugeMetricFamily(
+            "celery_queue_depth",
+            "Messages waiting in each Celery queue",
+            labels=["queue"],
+        )
+        pipe = self.client.pipeline(transaction=False)
+        for queue in self.queues:
+            pipe.llen(queue)
+        for queue, length in zip(self.queues, pipe.execute()):
+            depth.add_metric([queue], length)
+        yield depth
+
+
+def record_antipattern_report(report):
+    ANTIPATTERN_JOB_SECONDS.observe(report.total_ms / 1000)
+    for run in report.runs:
+        if run.skipped:
+            ANTIPATTERN_RULE_SKIPPED.labels(rule_id=run.rule_id).inc()
+            continue
+        ANTIPATTERN_RULE_SECONDS.labels(rule_id=run.rule_id).observe(run.elapsed_ms / 1000)
+        if run.over_budget:
+            ANTIPATTERN_RULE_TRUNCATED.labels(rule_id=run.rule_id).inc()
+        elif run.truncated:
+            ANTIPATTERN_DEADLINE_TRUNCATED.labels(rule_id=run.rule_id).inc()
+
+
+def record_statement_cache(stats):
+    STATEMENT_CACHE_HITS.inc(stats.hits)
+    STATEMENT_CACHE_MISSES.inc(stats.misses)
+
+
+def record_structure_cache(hit: bool):
+    (STRUCTURE_CACHE_HITS if hit else STRUCTURE_CACHE_MISSES).inc()
+
+
+def record_local_cache(cache):
+    LOCAL_CACHE_ENTRIES.set(len(cache))
+    LOCAL_CACHE_BYTES.set(cache.bytes)
+
+
+def record_queue_wait_time(queue: str, seconds: float):
+    CELERY_QUEUE_WAIT_SECONDS.labels(queue=queue).observe(max(seconds, 0.0))
+
+
+def record_task_time(queue: str, task: str, seconds: float):
+    CELERY_TASK_SECONDS.labels(queue=queue, task=task).observe(seconds)
+
+
+def metrics_registry():
+    """
+    Registry to expose. gunicorn and Celery run several processes, so when
+    PROMETHEUS_MULTIPROC_DIR is set the per-process files are aggregated.
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
@@ -0,0 +1,190 @@
+# backend/app/parsers/fused_parser.py
+
+import ast
+from typing import Dict, List, Optional, Tuple
+
+from app.parsers.spark_semantics import SPARK_OPS, SHUFFLE_OPS, OpType
+from app.graphs.operation.operation_graph_builder import OperationDAG, OperationDAGNode
+from app.graphs.lineage.lineage_graph_builder import DataLineageGraph
+
+
+class FusedPySparkParser(ast.NodeVisitor):
+    """
+    Single-pass front-end that builds the OperationDAG and the
+    DataLineageGraph directly while visiting the AST.
+
+    Produces the same graphs as:
+        PySparkASTParser -> build_operation_dag / build_data_lineage_graph
+    but walks every call chain once and never materializes the
+    intermediate SparkOperationNode list.
+    """
+
+    MULTI_PARENT_OPS = {"join", "union", "unionAll", "intersect", "except"}
+
+    def __init__(self, dag=None):
+        # Any OperationDAG-compatible backend (e.g. CompactOperationDAG)
+        self.dag = dag if dag is not None else OperationDAG()
+        self.lineage = DataLineageGraph()
+
+        # Same trackers as build_operation_dag
+        self.df_last_op: Dict[str, str] = {}
+        self.assignment_last_op: Dict[int, str] = {}
+
+        # build_operation_dag registers every producer before wiring edges,
+        # so a parent DataFrame that is only produced *later* in the script
+        # resolves to its final producer. Those edges are resolved in finish().
+        self._pending_edges: List[Tuple[str, str]] = []
+        self._finished = False
+
+    def visit_Assign(self, node: ast.Assign):
+        """
+        Handles patterns like:
+        df2 = df1.select(...).filter(...)
+        """
+        if not isinstance(node.value, ast.Call):
+            return
+
+        if not isinstance(node.targets[0], ast.Name):
+            return
+
+        target_df = node.targets[0].id
+
+        chain, _ = self._walk_call_chain(node.value)
+        for op_name, parents in chain:
+            self.emit(target_df, target_df, op_name, parents, node.lineno)
+
+    def visit_Expr(self, node: ast.Expr):
+        """
+        Handles standalone calls like:
+        df.show()
+        df.collect()
+        """
+        if not isinstance(node.value, ast.Call):
+            return
+
+        chain, base_df = self._walk_call_chain(node.value)
+        for op_name, parents in chain:
+            self.emit(str(base_df), base_df or "UNKNOWN", op_name, parents, node.lineno)
+
+    def _walk_call_chain(
+        self, call: ast.Call
+    ) -> Tuple[List[Tuple[str, List[str]]], Optional[str]]:
+        """
+        Walks a chained call ONCE and returns its operations in source order
+        together with the base DataFrame name.
+
+        Equivalent to PySparkASTParser._extract_call_chain plus the base
+        DataFrame lookup done in visit_Expr.
+        """
+        calls = []
+        current = call
+        while isinstance(current, ast.Call) and isinstance(current.func, ast.Attribute):
+            calls.append(current)
+            current = current.func.value
+
+        # The base DataFrame is the name the innermost call is made on
+        base_df = current.id if calls and isinstance(current, ast.Name) else None
+
+        chain = []
+        for c in reversed(calls):
+            op_name = c.func.attr
+            parents = []
+
+            if op_name not in self.MULTI_PARENT_OPS:
+                if base_df:
+                    parents.append(base_df)
+            else:
+                if isinstance(c.func.value, ast.Name):
+                    parents.append(c.func.value.id)
+                for arg in c.args:
+                    if isinstance(arg, ast.Name):
+                        parents.append(arg.id)
+
+            chain.append((op_name, parents))
+
+        return chain, base_df
+
+    def emit(
+        self,
+        id_prefix: str,
+        df_name: str,
+        operation: str,
+        parents: List[str],
+        lineno: int,
+    ):
+        """
+        Called for every extracted operation. Node ids follow the
+        PySparkASTParser format: {id_prefix}_{operation}_{lineno}.
+        """
+        self.add_operation(
+            id=f"{id_prefix}_{operation}_{lineno}",
+            df_name=df_name,
+            operation=operation,
+            parents=parents,
+            lineno=lineno,
+        )
+
+    def add_operation(
+        self,
+        id: str,
+        df_name: str,
+        operation: str,
+        parents: List[str],
+        lineno: int,
+    ):
+        """
+        Emits one operation: DAG node, execution edges and lineage edges.
+        """
+        if id not in self.dag.nodes:
+            self.dag.add_node(
+                OperationDAGNode(
+                    id=id,
+                    label=operation,
+                    op_type=SPARK_OPS.get(operation, OpType.TRANSFORMATION),
+                    causes_shuffle=operation in SHUFFLE_OPS,
+                    lineno=lineno,
+                )
+            )
+
+        # Prefer chaining within same assignment
+        if lineno in self.assignment_last_op:
+            self.dag.add_edge(self.assignment_last_op[lineno], id)
+
+        # Otherwise, wire DataFrame lineage
+        else:
+            for parent_df in parents:
+                if parent_df in self.df_last_op:
+                    self.dag.add_edge(self.df_last_op[parent_df], id)
+                else:
+                    self._pending_edges.append((parent_df, id))
+
+        for parent_df in parents:
+            self.lineage.add_edge(parent_df, df_name)
+
+        self.assignment_last_op[lineno] = id
+        self.df_last_op[df_name] = id
+
+    def finish(self) -> Tuple[OperationDAG, DataLineageGraph]:
+        """
+        Resolves forward DataFrame references and returns the graphs.
+        """
+        if not self._finished:
+            for parent_df, child_id in self._pending_edges:
+                if parent_df in self.df_last_op:
+                    self.dag.add_edge(self.df_last_op[parent_df], child_id)
+            self._pending_edges.clear()
+            self._finished = True
+
+        return self.dag, self.lineage
+
+
+def parse_to_graphs(
+    tree: ast.AST, dag=None
+) -> Tuple[OperationDAG, DataLineageGraph]:
+    """
+    Builds the operation DAG and the data lineage graph in one AST pass.
+    `dag` lets callers pass an empty alternative backend to fill.
+    """
+    parser = FusedPySparkParser(dag)
+    parser.visit(tree)
+    return parser.finish()
@@ -0,0 +1,348 @@
+# backend/app/parsers/incremental.py
+
+import ast
+import hashlib
+import re
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.parsers.fused_parser import FusedPySparkParser, parse_to_graphs
+from app.cache_keys import parser_fingerprint
+
+# (id_prefix, df_name, operation, parents, lineno relative to the statement)
+StatementOp = Tuple[str, str, str, List[str], int]
+
+SOURCE_KEY_PREFIX = "stmt:src"
+AST_KEY_PREFIX = "stmt:ast"
+
+# Column-0 lines that continue the previous statement instead of starting one
+_CONTINUATION = re.compile(r"(else|elif|except|finally)\b|[)\]}]")
+_DEFINITION = re.compile(r"(async\s+def|def|class)\b")
+
+# Give up on textual splitting if a statement spans more chunks than this
+MAX_CHUNK_MERGE = 50
+
+
+def _digest(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def statement_key(stmt: ast.stmt) -> str:
+    """
+    Normalized key of a top-level statement: hash of its AST without
+    positions, so whitespace, comments, quote style and moving the
+    statement to another line do not change it.
+
+    Compound statements also hash the relative lines of their nested
+    statements, since cached line numbers are stored relative to the
+    statement.
+    """
+    dump = ast.dump(stmt)
+    if not isinstance(stmt, (ast.Assign, ast.Expr)):
+        offsets = [
+            n.lineno - stmt.lineno for n in ast.walk(stmt) if isinstance(n, ast.stmt)
+        ]
+        dump = f"{dump}|{offsets}"
+    return f"{AST_KEY_PREFIX}:{parser_fingerprint()}:{_digest(dump)}"
+
+
+def source_key(lines: List[str]) -> str:
+    """
+    Key of a statement's source text. Exact-text hits skip parsing
+    entirely; trailing whitespace and trailing comment lines are ignored.
+    Both keys carry the parser fingerprint, so changed Spark semantics
+    do not reuse stale operations.
+    """
+    return f"{SOURCE_KEY_PREFIX}:{parser_fingerprint()}:{_digest(chr(10).join(lines))}"
+
+
+@dataclass
+class SourceChunk:
+    start_lineno: int
+    lines: List[str]
+
+    def key_lines(self) -> List[str]:
+        lines = [line.rstrip() for line in self.lines]
+        while lines and (not lines[-1] or lines[-1].lstrip().startswith("#")):
+            lines.pop()
+        return lines
+
+
+def split_top_level(code: str) -> List[SourceChunk]:
+    """
+    Splits source text into top-level statement chunks without parsing:
+    a chunk starts at every column-0 code line that is not a continuation
+    (else/except/closing bracket, or the def/class after a decorator).
+    Chunks that turn out not to parse on their own are merged later.
+    """
+    chunks: List[SourceChunk] = []
+    current: Optional[SourceChunk] = None
+    in_decorator = False
+
+    for lineno, line in enumerate(code.splitlines(), 1):
+        starts_statement = (
+            line
+            and not line[0].isspace()
+            and line[0] != "#"
+            and not _CONTINUATION.match(line)
+            and not (in_decorator and _DEFINITION.match(line))
+        )
+        if starts_statement:
+            current = SourceChunk(lineno, [line])
+            chunks.append(current)
+            in_decorator = line.startswith("@")
+        elif current is not None:
+            current.lines.append(line)
+            if in_decorator and _DEFINITION.match(line):
+                in_decorator = False
+
+    return chunks
+
+
+class StatementOperationRecorder(FusedPySparkParser):
+    """
+    Runs the fused parser's extraction on a single statement and records
+    the operations with line numbers relative to `base_lineno`, instead
+    of building a graph.
+    """
+
+    def __init__(self, base_lineno: int):
+        super().__init__()
+        self.base_lineno = base_lineno
+        self.operations: List[StatementOp] = []
+
+    def emit(self, id_prefix, df_name, operation, parents, lineno):
+        self.operations.append(
+            (id_prefix, df_name, operation, parents, lineno - self.base_lineno)
+        )
+
+
+class InMemoryStatementStore:
+    """
+    Bounded LRU statement store, used per process and in benchmarks.
+    Redis-backed equivalent: services.cache.RedisJSONStore.
+    """
+
+    def __init__(self, max_entries: int = 100_000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, list]" = OrderedDict()
+
+    def get_many(self, keys: Sequence[str]) -> List[Optional[list]]:
+        values = []
+        for key in keys:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            values.append(value)
+        return values
+
+    def set_many(self, entries: Dict[str, list]):
+        for key, value in entries.items():
+            self._entries[key] = value
+            # Re-written keys are recent too (update() keeps their position)
+            self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+@dataclass
+class StatementCacheStats:
+    statements: int = 0
+    hits: int = 0
+    fallback: bool = False
+
+    @property
+    def misses(self) -> int:
+        return self.statements - self.hits
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.statements if self.statements else 0.0
+
+
+def _parse_chunks(chunks: List[SourceChunk], start: int):
+    """
+    Parses chunks[start], merging following chunks until it is valid.
+    Returns (parsed statements, index after the last merged chunk),
+    or (None, start) when no valid split is found. Statement line numbers
+    are relative to the chunk; add chunks[start].start_lineno - 1.
+    """
+    lines: List[str] = []
+    for end in range(start, min(start + MAX_CHUNK_MERGE, len(chunks))):
+        lines.extend(chunks[end].lines)
+        try:
+            module = ast.parse("\n".join(lines))
+        except SyntaxError:
+            continue
+        return module.body, end + 1
+    return None, start
+
+
+def _parse_run(chunks: List[SourceChunk], start: int, end: int):
+    """
+    Parses chunks[start:end] with a single ast.parse call and splits the
+    statements back into groups of chunks. A chunk that starts inside a
+    previous statement (e.g. a column-0 line in a multi-line string) is
+    folded into that statement's group.
+
+    Returns [(first chunk, last chunk + 1, statements)], or None if the
+    run does not parse on its own. Statement line numbers are relative to
+    the run (shifting them with ast.increment_lineno costs more than the
+    parse itself); add chunks[start].start_lineno - 1.
+    """
+    lines = [line for chunk in chunks[start:end] for line in chunk.lines]
+    try:
+        module = ast.parse("\n".join(lines))
+    except SyntaxError:
+        return None
+    line_offset = chunks[start].start_lineno - 1
+
+    # [first chunk, statements, end line of the last statement]
+    groups = []
+    position = start
+    for stmt in module.body:
+        lineno = stmt.lineno + line_offset
+        while position + 1 < end and chunks[position + 1].start_lineno <= lineno:
+            position += 1
+        if groups and (
+            position == groups[-1][0]
+            # Chunk starts inside the previous group's last statement
+            or chunks[position].start_lineno <= groups[-1][2]
+        ):
+            groups[-1][1].append(stmt)
+        else:
+            groups.append([position, [stmt], 0])
+        groups[-1][2] = stmt.end_lineno + line_offset
+
+    # Chunks without a statement of their own belong to the group before them
+    bounds = [first for first, _, _ in groups[1:]] + [end]
+    return [
+        (first, last, statements)
+        for (first, statements, _), last in zip(groups, bounds)
+    ]
+
+
+def parse_to_graphs_incremental(code: str, store, dag=None):
+    """
+    Same graphs as parse_to_graphs(ast.parse(code)), reusing cached
+    per-statement operations:
+
+    1. Statements whose source text is unchanged hit a source-text key
+       and are not parsed at all.
+    2. The remaining statements are parsed and looked up by their
+       normalized AST key (statement_key), which survives whitespace,
+       comment and quote-style edits.
+    3. Only statements missing both are run through the extractor.
+
+    If no statement hits its source-text key, the script is treated as
+    new: AST keys are only computed and stored for statements spanning
+    several textual chunks (hashing the AST dump costs about as much as
+    extracting the operations), so a cold script mostly pays for the
+    source-text keys. The cost: a script reformatted as a whole is
+    re-extracted once, then hits by text.
+
+    Cached operations carry line numbers relative to their statement and
+    are re-linked into the DAG at the statement's current position.
+
+    Returns (dag, lineage, StatementCacheStats).
+    """
+    chunks = split_top_level(code)
+    chunk_keys = [source_key(chunk.key_lines()) for chunk in chunks]
+    cached = store.get_many(chunk_keys)
+    use_ast_keys = any(value is not None for value in cached)
+    stats = StatementCacheStats()
+
+    # (base lineno, operations) per resolved unit, in source order
+    resolved: List[Optional[Tuple[int, list]]] = []
+    # Parsed statements still to look up by AST key:
+    # (slot, stmt, absolute lineno, ast key or None)
+    parsed: List[Tuple[int, ast.stmt, int, str]] = []
+    # Statement slots of every parsed group of chunks
+    group_slots: List[List[int]] = []
+    # Source keys of single parsed chunks -> slots of their statements
+    source_slots: Dict[str, Tuple[int, List[int]]] = {}
+
+    def add_group(first, last, statements, line_offset):
+        # Groups of several chunks have no source-text entry of their own
+        keyed = use_ast_keys or last != first + 1
+        slots = []
+        for stmt in statements:
+            slots.append(len(resolved))
+            key = statement_key(stmt) if keyed else None
+            parsed.append((len(resolved), stmt, stmt.lineno + line_offset, key))
+            resolved.append(None)
+        group_slots.append(slots)
+        if last == first + 1:
+            source_slots[chunk_keys[first]] = (chunks[first].start_lineno, slots)
+
+    i = 0
+    while i < len(chunks):
+        if cached[i] is not None:
+            stats.statements += 1
+            stats.hits += 1
+            resolved.append((chunks[i].start_lineno, cached[i]))
+            i += 1
+            continue
+
+        # Parse the whole run of consecutive misses at once
+        run_end = i + 1
+        while run_end < len(chunks) and cached[run_end] is None:
+            run_end += 1
+        groups = _parse_run(chunks, i, run_end)
+        if groups is not None:
+            for first, last, statements in groups:
+                stats.statements += 1
+                add_group(first, last, statements, chunks[i].start_lineno - 1)
+            i = run_end
+            continue
+
+        # The run ends mid-statement: grow one statement at a time
+        statements, next_i = _parse_chunks(chunks, i)
+        if statements is None:
+            # Textual split failed (e.g. column-0 lines inside a string)
+            dag, lineage = parse_to_graphs(ast.parse(code), dag)
+            return dag, lineage, StatementCacheStats(fallback=True)
+        stats.statements += 1
+        add_group(i, next_i, statements, chunks[i].start_lineno - 1)
+        i = next_i
+
+    fresh: Dict[str, list] = {}
+    extracted = set()
+    ast_keys = [key for *_, key in parsed if key is not None]
+    ast_hits = iter(store.get_many(ast_keys) if ast_keys else [])
+    for slot, stmt, lineno, key in parsed:
+        operations = None if key is None else next(ast_hits)
+        if operations is None:
+            recorder = StatementOperationRecorder(stmt.lineno)
+            recorder.visit(stmt)
+            operations = recorder.operations
+            if key is not None:
+                fresh[key] = operations
+            extracted.add(slot)
+        resolved[slot] = (lineno, operations)
+
+    # A parsed group still counts as a hit if none of its statements
+    # had to be extracted
+    for slots in group_slots:
+        if not extracted.intersection(slots):
+            stats.hits += 1
+
+    # Cache each single-chunk statement group under its source text too
+    for key, (chunk_lineno, slots) in source_slots.items():
+        fresh[key] = [
+            (id_prefix, df_name, operation, parents, base + offset - chunk_lineno)
+            for base, operations in (resolved[s] for s in slots)
+            for id_prefix, df_name, operation, parents, offset in operations
+        ]
+
+    if fresh:
+        store.set_many(fresh)
+
+    builder = FusedPySparkParser(dag)
+    for base_lineno, operations in resolved:
+        for id_prefix, df_name, operation, parents, offset in operations:
+            builder.emit(id_prefix, df_name, operation, list(parents), base_lineno + offset)
+
+    dag, lineage = builder.finish()
+    return dag, lineage, stats
@@ -1,17 +1,140 @@
+import hashlib
+import math
+import time
+from collections import OrderedDict
+
 from fastapi import Request, HTTPException
-from .services.cache import redis_client
-from .config import RATE_LIMIT, RATE_LIMIT_WINDOW
-
-def rate_limit(request: Request):
-    ip = request.client.host
-    key = f"rate:{ip}"
-
-    count = redis_client.incr(key)
-    if count == 1:
-        redis_client.expire(key, RATE_LIMIT_WINDOW)
-
-    if count > RATE_LIMIT:
-        raise HTTPException(
-            status_code=429,
-            detail="Rate limit exceeded. Try again later."
-        )
+from .services.cache import async_redis_client
+from .config import (
+    settings,
+    RATE_LIMIT,
+    RATE_LIMIT_WINDOW,
+    RATE_LIMITS,
+    RATE_LIMIT_LOCAL_PRECHECK,
+)
+
+# Token bucket, refilled continuously: `capacity` requests per `window`
+# seconds, never more than `capacity` at once (no double burst at window
+# boundaries). Runs atomically on the server and uses the server clock.
+#
+# KEYS[1] bucket hash {tokens, ts}
+# ARGV    capacity, window seconds
+# Returns {allowed (0/1), remaining tokens, retry after (ms)}
+TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local window_ms = tonumber(ARGV[2]) * 1000
+local rate = capacity / window_ms
+
+local now = redis.call('TIME')
+now = tonumber(now[1]) * 1000 + math.floor(tonumber(now[2]) / 1000)
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1])
+local ts = tonumber(bucket[2])
+if tokens == nil then
+    tokens = capacity
+    ts = now
+end
+
+tokens = math.min(capacity, tokens + (now - ts) * rate)
+
+local allowed = 0
+local retry_after = 0
+if tokens >= 1 then
+    allowed = 1
+    tokens = tokens - 1
+else
+    retry_after = math.ceil((1 - tokens) / rate)
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+-- An idle bucket is full again after one window: let it expire
+redis.call('PEXPIRE', KEYS[1], window_ms)
+return {allowed, math.floor(tokens), retry_after}
+"""
+
+token_bucket = async_redis_client.register_script(TOKEN_BUCKET_LUA)
+
+
+class LocalBlocklist:
+    """
+    Per-process memory of clients Redis has just rejected, and until
+    when. Requests from them are rejected without a Redis round trip.
+    Bounded: the oldest entries are dropped first.
+    """
+
+    def __init__(self, max_entries: int = 10_000):
+        self.max_entries = max_entries
+        self._until: "OrderedDict[str, float]" = OrderedDict()
+
+    def retry_after(self, key: str) -> float:
+        until = self._until.get(key)
+        if until is None:
+            return 0.0
+        remaining = until - time.monotonic()
+        if remaining <= 0:
+            del self._until[key]
+            return 0.0
+        return remaining
+
+    def block(self, key: str, seconds: float):
+        self._until[key] = time.monotonic() + seconds
+        self._until.move_to_end(key)
+        while len(self._until) > self.max_entries:
+            self._until.popitem(last=False)
+
+
+BLOCKLIST = LocalBlocklist()
+
+
+def _key_hash(api_key: str) -> str:
+    return hashlib.blake2b(api_key.encode("utf-8"), digest_size=8).hexdigest()
+
+
+# Hashes of the configured client keys (settings.api_keys)
+API_KEY_HASHES = frozenset(
+    _key_hash(key.strip()) for key in (settings.api_keys or "").split(",") if key.strip()
+)
+
+
+def client_id(request: Request, known_keys=API_KEY_HASHES) -> str:
+    """
+    API key when a configured one is sent (hashed, never stored in clear),
+    else client IP. Unknown keys fall back to the IP: otherwise a client
+    could get a fresh bucket per request by varying the header.
+    """
+    api_key = request.headers.get("x-api-key")
+    if api_key:
+        key_hash = _key_hash(api_key)
+        if key_hash in known_keys:
+            return f"key:{key_hash}"
+    return f"ip:{request.client.host}"
+
+
+def _too_many_requests(retry_after_s: float) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail="Rate limit exceeded. Try again later.",
+        headers={"Retry-After": str(max(1, math.ceil(retry_after_s)))},
+    )
+
+
+async def rate_limit(request: Request):
+    if not settings.rate_limit_enabled:
+        return
+    route = request.scope.get("route")
+    endpoint = route.path if route is not None else request.url.path
+    capacity, window = RATE_LIMITS.get(endpoint, (RATE_LIMIT, RATE_LIMIT_WINDOW))
+    key = f"rate:{endpoint}:{client_id(request)}"
+
+    if RATE_LIMIT_LOCAL_PRECHECK:
+        blocked_for = BLOCKLIST.retry_after(key)
+        if blocked_for > 0:
+            raise _too_many_requests(blocked_for)
+
+    allowed, _, retry_after_ms = await token_bucket(keys=[key], args=[capacity, window])
+
+    if not allowed:
+        if RATE_LIMIT_LOCAL_PRECHECK:
+            BLOCKLIST.block(key, retry_after_ms / 1000)
+        raise _too_many_requests(retry_after_ms / 1000)
@@ -0,0 +1,134 @@
+# backend/app/services/batch.py
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, List, Optional, Tuple
+
+from app.config import CACHE_TTL
+from app.services.cache import RedisJSONStore
+from app.services.dag_pipeline import run_dag_pipeline
+from app.services.documentation.antipattern_summary import (
+    combined_antipatterns_json,
+    combined_antipattern_markdown,
+)
+
+logger = logging.getLogger(__name__)
+
+# Per-file artifacts kept in the aggregated job (the only ones computed);
+# DOT renderings are left out to keep a repository-sized job bounded
+FILE_RESULT_FIELDS = (
+    "dag_summary",
+    "stage_summary",
+    "lineage_summary",
+    "antipatterns",
+    "structure",
+)
+
+# Set in each pool process by _init_worker
+_pipeline_options: dict = {}
+
+
+def _init_worker(options: dict, structure_cache: bool):
+    global _pipeline_options
+    _pipeline_options = dict(options)
+    if structure_cache:
+        # Redis connections cannot be shared with the parent; one store per process
+        _pipeline_options["structure_store"] = RedisJSONStore(ttl=CACHE_TTL)
+
+
+def analyze_file(item: Tuple[str, str]) -> dict:
+    """
+    Runs the DAG pipeline on one file. Errors are reported per file
+    instead of failing the whole batch.
+    """
+    path, code = item
+    started = time.perf_counter()
+    try:
+        result = run_dag_pipeline(code, artifacts=FILE_RESULT_FIELDS, **_pipeline_options)
+    except Exception as e:
+        error = {"type": type(e).__name__, "message": str(e)}
+        if isinstance(e, SyntaxError):
+            error["lineno"] = e.lineno
+        return {
+            "path": path,
+            "status": "failed",
+            "error": error,
+            "duration_ms": int((time.perf_counter() - started) * 1000),
+        }
+
+    return {
+        "path": path,
+        "status": "finished",
+        "duration_ms": int((time.perf_counter() - started) * 1000),
+        **{field: result[field] for field in FILE_RESULT_FIELDS},
+    }
+
+
+def run_batch(
+    files: List[Tuple[str, str]],
+    processes: Optional[int] = None,
+    pipeline_options: Optional[dict] = None,
+    structure_cache: bool = True,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+    progress_every: int = 100,
+) -> dict:
+    """
+    Analyzes every (path, code) pair across a process pool (one process
+    per CPU unless `processes` is given) and returns the aggregated
+    batch result.
+
+    Must run in a process allowed to fork children: Celery prefork pool
+    processes are daemonic, so the batch queue is served by a
+    `--pool=solo` worker.
+    """
+    processes = min(processes or os.cpu_count() or 1, len(files))
+    options = pipeline_options or {}
+    started = time.perf_counter()
+    results: List[dict] = []
+
+    def collect(result_iter):
+        for result in result_iter:
+            results.append(result)
+            if on_progress and len(results) % progress_every == 0:
+                on_progress(len(results), len(files))
+
+    if processes <= 1 or len(files) == 1:
+        _init_worker(options, structure_cache)
+        collect(map(analyze_file, files))
+    else:
+        # Several files per task amortize pickling / IPC for small scripts
+        chunksize = max(1, len(files) // (processes * 8))
+        with ProcessPoolExecutor(
+            max_workers=processes,
+            initializer=_init_worker,
+            initargs=(options, structure_cache),
+        ) as pool:
+            collect(pool.map(analyze_file, files, chunksize=chunksize))
+
+    elapsed_s = time.perf_counter() - started
+    return aggregate_batch(results, elapsed_s)
+
+
+def aggregate_batch(results: List[dict], elapsed_s: float) -> dict:
+    analyzed = [r for r in results if r["status"] == "finished"]
+    combined = combined_antipatterns_json(
+        [(r["path"], r["antipatterns"]["json"]) for r in analyzed]
+    )
+    summary = {
+        "total_files": len(results),
+        "analyzed": len(analyzed),
+        "failed": len(results) - len(analyzed),
+        "elapsed_ms": int(elapsed_s * 1000),
+        "files_per_sec": round(len(results) / elapsed_s, 2) if elapsed_s > 0 else None,
+    }
+    logger.info("batch_analyzed", extra={"event": "batch_analyzed", **summary})
+
+    return {
+        "summary": summary,
+        "antipatterns": {
+            "json": combined,
+            "markdown": combined_antipattern_markdown(combined),
+        },
+        "files": results,
+    }
@@ -0,0 +1,122 @@
+# backend/app/services/batch_input.py
+"""
+Collects the PySpark files of a batch request: an explicit file list or
+a tar / zip archive of a repository.
+"""
+
+import io
+import lzma
+import posixpath
+import tarfile
+import zipfile
+import zlib
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Tuple
+
+
+class BatchInputError(ValueError):
+    """Raised when a batch is empty, malformed or over its limits."""
+
+
+# Raised while listing or reading members of a corrupt archive: bad CRC,
+# truncated or undecompressable data, encrypted or unsupported zip entries
+ARCHIVE_READ_ERRORS = (
+    zipfile.BadZipFile,
+    tarfile.TarError,
+    RuntimeError,
+    NotImplementedError,
+    EOFError,
+    OSError,
+    zlib.error,
+    lzma.LZMAError,
+)
+
+
+@dataclass
+class BatchLimits:
+    max_files: int
+    max_bytes: int
+    # Uncompressed size of every archive member, not only Python sources
+    max_archive_bytes: Optional[int] = None
+
+
+def _is_python_source(path: str) -> bool:
+    parts = path.split("/")
+    # Skip hidden directories (.git, .venv, ...) and macOS resource forks
+    return path.endswith(".py") and not any(p.startswith((".", "__MACOSX")) for p in parts)
+
+
+def _check(files: List[Tuple[str, str]], total_bytes: int, limits: BatchLimits):
+    if not files:
+        raise BatchInputError("Batch contains no Python files")
+    if len(files) > limits.max_files:
+        raise BatchInputError(f"Batch has {len(files)} files, limit is {limits.max_files}")
+    if total_bytes > limits.max_bytes:
+        raise BatchInputError(f"Batch is {total_bytes} bytes, limit is {limits.max_bytes}")
+
+
+def files_from_list(entries: Iterable[Tuple[str, str]], limits: BatchLimits) -> List[Tuple[str, str]]:
+    files = list(entries)
+    _check(files, sum(len(code.encode("utf-8")) for _, code in files), limits)
+    return files
+
+
+def files_from_archive(data: bytes, filename: str, limits: BatchLimits) -> List[Tuple[str, str]]:
+    """
+    Returns (path, code) for every .py file of a .zip / .tar(.gz|.bz2|.xz)
+    archive. Members are read in memory, never extracted to disk; the
+    byte limits are enforced on uncompressed sizes before reading, and
+    an archive over max_archive_bytes is only decompressed up to the
+    member that crosses it.
+    """
+    if filename.endswith(".zip"):
+        members = _zip_members(data)
+    elif ".tar" in filename or filename.endswith((".tgz", ".tbz2", ".txz")):
+        members = _tar_members(data)
+    else:
+        raise BatchInputError(f"Unsupported archive type: {filename}")
+
+    files = []
+    total_bytes = 0
+    archive_bytes = 0
+    try:
+        for path, size, read in members:
+            archive_bytes += size
+            if limits.max_archive_bytes is not None and archive_bytes > limits.max_archive_bytes:
+                raise BatchInputError(f"Archive exceeds {limits.max_archive_bytes} uncompressed bytes")
+            path = posixpath.normpath(path).lstrip("/")
+            if not _is_python_source(path):
+                continue
+            total_bytes += size
+            if len(files) >= limits.max_files:
+                raise BatchInputError(f"Archive has more than {limits.max_files} Python files")
+            if total_bytes > limits.max_bytes:
+                raise BatchInputError(f"Archive sources exceed {limits.max_bytes} uncompressed bytes")
+            files.append((path, read().decode("utf-8", errors="replace")))
+    except ARCHIVE_READ_ERRORS as e:
+        raise BatchInputError(f"Corrupt archive: {e}")
+
+    _check(files, total_bytes, limits)
+    return files
+
+
+def _zip_members(data: bytes):
+    try:
+        archive = zipfile.ZipFile(io.BytesIO(data))
+    except zipfile.BadZipFile as e:
+        raise BatchInputError(f"Invalid zip archive: {e}")
+    for info in archive.infolist():
+        if not info.is_dir():
+            yield info.filename, info.file_size, lambda info=info: archive.read(info)
+
+
+def _tar_members(data: bytes):
+    try:
+        archive = tarfile.open(fileobj=io.BytesIO(data), mode="r:*")
+    except tarfile.TarError as e:
+        raise BatchInputError(f"Invalid tar archive: {e}")
+    # Iterating (unlike getmembers) reads headers one at a time, so no
+    # member past the one over a limit is ever decompressed
+    for member in archive:
+        if member.isfile():
+            yield member.name, member.size, lambda member=member: archive.extractfile(member).read()
@@ -1,25 +1,231 @@
 # backend/app/cache.py
 import json
+import logging
 import os
+import threading
+import time
 from typing import Any
 import redis
-from app.config import settings
+import redis.asyncio as aioredis
+from app.config import (
+    settings,
+    STATEMENT_CACHE_TTL,
+    LOCAL_CACHE_ENABLED,
+    LOCAL_CACHE_MAX_ENTRIES,
+    LOCAL_CACHE_MAX_BYTES,
+    LOCAL_CACHE_TTL,
+    RESULT_COMPRESSION,
+    RESULT_COMPRESS_MIN_BYTES,
+)
+from app.cache_keys import code_cache_key
+from app.metrics import (
+    LOCAL_CACHE_HITS,
+    LOCAL_CACHE_MISSES,
+    LOCAL_CACHE_EVICTIONS,
+    LOCAL_CACHE_INVALIDATIONS,
+    record_local_cache,
+)
+from app.services.local_cache import LocalResultCache, MISS
+from app.services.codec import ResultCodec
+
+logger = logging.getLogger(__name__)
 
 # create Redis client (use connection URL)
 redis_client = redis.Redis.from_url(settings.redis_url, decode_responses=True)
+# Results are binary (see codec below)
+binary_redis_client = redis.Redis.from_url(settings.redis_url, decode_responses=False)
+
+# Async, pooled client for the API's event loop (one pool per uvicorn worker);
+# the sync clients above are for Celery workers and scripts. Binary too:
+# replies are results or integers.
+async_redis_client = aioredis.Redis.from_url(
+    settings.redis_url,
+    decode_responses=False,
+    max_connections=settings.redis_max_connections,
+)
+
+# Encoding of results: msgpack, compressed above a size threshold.
+# Entries written as JSON by earlier versions still decode.
+codec = ResultCodec(compression=RESULT_COMPRESSION, compress_min_bytes=RESULT_COMPRESS_MIN_BYTES)
+
+# Every write through set_result/aset_result publishes the key here;
+# each process evicts it from its local cache
+INVALIDATION_CHANNEL = "cache:invalidate"
+
+local_cache = LocalResultCache(
+    max_entries=LOCAL_CACHE_MAX_ENTRIES,
+    max_bytes=LOCAL_CACHE_MAX_BYTES,
+    ttl=LOCAL_CACHE_TTL,
+)
+
+
+class InvalidationListener:
+    """
+    Background thread subscribed to INVALIDATION_CHANNEL, one per process
+    (started lazily, and again in forked children such as Celery's pool).
+
+    The local cache is only used while subscribed: it is cleared on every
+    (re)subscription, since messages published while disconnected are lost.
+    """
+
+    def __init__(self, cache: LocalResultCache, client=None):
+        self.cache = cache
+        self.client = client or redis_client
+        self.subscribed = threading.Event()
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self.subscribed.clear()
+            self.cache.clear()
+            threading.Thread(target=self._run, name="cache-invalidation", daemon=True).start()
+
+    def _run(self):
+        while True:
+            try:
+                pubsub = self.client.pubsub()
+                pubsub.subscribe(INVALIDATION_CHANNEL)
+                for message in pubsub.listen():
+                    if message["type"] == "subscribe":
+                        self.cache.clear()
+                        self.subscribed.set()
+                    elif message["type"] == "message":
+                        self.cache.invalidate(message["data"])
+                        LOCAL_CACHE_INVALIDATIONS.inc()
+            except redis.RedisError as e:
+                logger.warning(
+                    "cache_invalidation_disconnected",
+                    extra={"event": "cache_invalidation_disconnected", "error": str(e)},
+                )
+            finally:
+                self.subscribed.clear()
+                self.cache.clear()
+            time.sleep(1)
+
+
+invalidation_listener = InvalidationListener(local_cache)
+
+
+def _local_cache_ready() -> bool:
+    if not LOCAL_CACHE_ENABLED:
+        return False
+    invalidation_listener.ensure_started()
+    return invalidation_listener.subscribed.is_set()
+
+
+def _local_get(key: str) -> Any:
+    value = local_cache.get(key)
+    (LOCAL_CACHE_MISSES if value is MISS else LOCAL_CACHE_HITS).inc()
+    return value
+
 
-def make_cache_key_for_code(code: str) -> str:
-    # deterministic key for the same input
-    # consider hashing for long payloads
-    import hashlib
-    h = hashlib.blake2b(code.encode("utf-8"), digest_size=8).hexdigest()
-    return f"explain:code:{h}"
+def _local_put(key: str, raw: bytes, sequence: int):
+    """
+    Decodes a value read from Redis and caches it, unless it was
+    invalidated while the read was in flight.
+    """
+    value, size = codec.decode_sized(raw)
+    evicted = local_cache.put(key, value, size=size, seen_sequence=sequence)
+    if evicted:
+        LOCAL_CACHE_EVICTIONS.inc(evicted)
+    record_local_cache(local_cache)
+    return value
+
+
+def make_cache_key_for_code(code: str, tree=None) -> str:
+    # deterministic key for the same (canonical) input and analyzer version;
+    # pass the already parsed `tree` to avoid parsing twice
+    return code_cache_key(code, tree)
 
 def set_result(key: str, value: Any, ttl: int = 3600):
-    redis_client.set(key, json.dumps(value), ex=ttl)
+    pipe = binary_redis_client.pipeline(transaction=False)
+    pipe.set(key, codec.encode(value), ex=ttl)
+    pipe.publish(INVALIDATION_CHANNEL, key)
+    pipe.execute()
+
+def get_result(key: str, local: bool = True):
+    """
+    Decoded value of `key`, or None. `local=False` bypasses the in-process
+    cache (for large values read once, e.g. batch input).
+    """
+    if not (local and _local_cache_ready()):
+        raw = binary_redis_client.get(key)
+        return codec.decode(raw) if raw else None
+
+    value = _local_get(key)
+    if value is not MISS:
+        return value
+    sequence = local_cache.sequence
+    raw = binary_redis_client.get(key)
+    if not raw:
+        return None
+    return _local_put(key, raw, sequence)
+
+
+async def aset_result(key: str, value: Any, ttl: int = 3600):
+    async with async_redis_client.pipeline(transaction=False) as pipe:
+        pipe.set(key, codec.encode(value), ex=ttl)
+        pipe.publish(INVALIDATION_CHANNEL, key)
+        await pipe.execute()
+
 
-def get_result(key: str):
-    raw = redis_client.get(key)
+async def aget_result(key: str):
+    if not _local_cache_ready():
+        raw = await async_redis_client.get(key)
+        return codec.decode(raw) if raw else None
+
+    value = _local_get(key)
+    if value is not MISS:
+        return value
+    sequence = local_cache.sequence
+    raw = await async_redis_client.get(key)
     if not raw:
         return None
-    return json.loads(raw)
+    return _local_put(key, raw, sequence)
+
+
+async def aget_results(*keys: str) -> list:
+    """
+    Several results in one round trip (MGET) for the keys not cached
+    locally; missing keys are None.
+    """
+    if not _local_cache_ready():
+        return [codec.decode(raw) if raw else None for raw in await async_redis_client.mget(keys)]
+
+    values = [_local_get(key) for key in keys]
+    missing = [i for i, value in enumerate(values) if value is MISS]
+    if missing:
+        sequence = local_cache.sequence
+        raws = await async_redis_client.mget([keys[i] for i in missing])
+        for i, raw in zip(missing, raws):
+            values[i] = _local_put(keys[i], raw, sequence) if raw else None
+    return values
+
+
+class RedisJSONStore:
+    """
+    Batched JSON key/value store in Redis, used for the statement-level
+    parse cache (parsers.incremental) and the structural analysis cache
+    (services.structural_cache): one MGET per lookup, one pipelined write.
+    """
+
+    def __init__(self, client=None, ttl: int = STATEMENT_CACHE_TTL):
+        self.client = client or redis_client
+        self.ttl = ttl
+
+    def get_many(self, keys):
+        if not keys:
+            return []
+        return [json.loads(raw) if raw else None for raw in self.client.mget(keys)]
+
+    def set_many(self, entries):
+        pipe = self.client.pipeline(transaction=False)
+        for key, operations in entries.items():
+            pipe.set(key, json.dumps(operations), ex=self.ttl)
+        pipe.execute()
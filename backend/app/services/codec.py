@@ -0,0 +1,92 @@
+# backend/app/services/codec.py
+import json
+import threading
+import zlib
+from typing import Any, Tuple
+
+import msgpack
+import zstandard
+
+# Header of encoded values: MAGIC + one format byte. 0xc1 is never used by
+# msgpack and cannot start JSON text, so values written before this header
+# existed (plain JSON) are told apart and still decode.
+MAGIC = b"\xc1R"
+
+FORMAT_MSGPACK = 1
+FORMAT_MSGPACK_ZLIB = 2
+FORMAT_MSGPACK_ZSTD = 3
+
+COMPRESSIONS = {
+    None: FORMAT_MSGPACK,
+    "zlib": FORMAT_MSGPACK_ZLIB,
+    "zstd": FORMAT_MSGPACK_ZSTD,
+}
+
+# zstandard (de)compressors are not safe to share between threads
+_zstd = threading.local()
+
+
+def _zstd_compressor(level: int):
+    compressor = getattr(_zstd, "compressor", None)
+    if compressor is None or _zstd.level != level:
+        compressor = _zstd.compressor = zstandard.ZstdCompressor(level=level)
+        _zstd.level = level
+    return compressor
+
+
+def _zstd_decompressor():
+    decompressor = getattr(_zstd, "decompressor", None)
+    if decompressor is None:
+        decompressor = _zstd.decompressor = zstandard.ZstdDecompressor()
+    return decompressor
+
+
+class ResultCodec:
+    """
+    msgpack serialization of cached results, compressed with zstd or zlib
+    when the packed value is at least `compress_min_bytes` long. Values
+    below the threshold are stored packed only: compressing them costs
+    more time than it saves bytes.
+
+    decode() reads every format, including legacy JSON entries.
+    """
+
+    def __init__(self, compression: str | None = "zstd", compress_min_bytes: int = 1024, level: int = 3):
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression: {compression!r}")
+        self.compression = compression
+        self.compress_min_bytes = compress_min_bytes
+        self.level = level
+
+    def encode(self, value: Any) -> bytes:
+        packed = msgpack.packb(value, use_bin_type=True)
+        if self.compression is None or len(packed) < self.compress_min_bytes:
+            return MAGIC + bytes((FORMAT_MSGPACK,)) + packed
+        if self.compression == "zstd":
+            body = _zstd_compressor(self.level).compress(packed)
+        else:
+            body = zlib.compress(packed, self.level)
+        return MAGIC + bytes((COMPRESSIONS[self.compression],)) + body
+
+    @staticmethod
+    def decode(raw: bytes | str) -> Any:
+        return ResultCodec.decode_sized(raw)[0]
+
+    @staticmethod
+    def decode_sized(raw: bytes | str) -> Tuple[Any, int]:
+        """
+        (decoded value, uncompressed size in bytes). The size stands in for
+        the value's memory footprint: compressed lengths undercount it by
+        the compression ratio.
+        """
+        if isinstance(raw, str) or not raw.startswith(MAGIC):
+            return json.loads(raw), len(raw)
+
+        fmt, body = raw[len(MAGIC)], raw[len(MAGIC) + 1:]
+        if fmt == FORMAT_MSGPACK_ZSTD:
+            body = _zstd_decompressor().decompress(body)
+        elif fmt == FORMAT_MSGPACK_ZLIB:
+            body = zlib.decompress(body)
+        elif fmt != FORMAT_MSGPACK:
+            raise ValueError(f"Unknown cached value format: {fmt}")
+        return msgpack.unpackb(body, raw=False, strict_map_key=False), len(body)
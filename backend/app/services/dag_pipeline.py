@@ -1,11 +1,27 @@
 import ast
+import logging
 import traceback
-from app.parsers.ast_parser import PySparkASTParser
-from app.graphs.operation.operation_graph_builder import build_operation_dag
+from functools import cached_property
+from typing import Dict, Iterable, Tuple
+from app.parsers.fused_parser import parse_to_graphs
+from app.parsers.incremental import parse_to_graphs_incremental
+from app.graphs.operation.operation_graph_builder import OperationDAG
+from app.graphs.operation.compact_dag import CompactOperationDAG
 from app.visualizers.operation_graph_visualizer import render_operation_dag_to_dot
 from app.graphs.operation.stage_assignment import assign_stages
-from app.graphs.antipatterns.registry import detect_antipatterns
-from app.graphs.lineage.lineage_graph_builder import build_data_lineage_graph
+from app.graphs.antipatterns.registry import run_antipattern_rules
+from app.graphs.antipatterns.budget import RuleBudget
+from app.metrics import (
+    record_antipattern_report,
+    record_statement_cache,
+    record_structure_cache,
+)
+from app.graphs.operation.fingerprint import dag_fingerprint, dataframe_names
+from app.services.structural_cache import (
+    structure_cache_key,
+    capture_structural_analysis,
+    apply_structural_analysis,
+)
 from app.visualizers.lineage_graph_visualizer import render_data_lineage_to_dot
 
 from app.services.documentation.dag_summary import (
@@ -25,77 +41,248 @@ from app.services.documentation.lineage_summary import (
     lineage_summary_markdown,
 )
 
+logger = logging.getLogger(__name__)
+
+DAG_BACKENDS = {
+    "object": OperationDAG,
+    "compact": CompactOperationDAG,
+}
 
 
-def run_dag_pipeline(code: str) -> dict:
+class PipelineRun:
     """
-    Runs the OPERATION-LEVEL pipeline only:
+    The pipeline stages of one job, evaluated lazily and at most once:
 
-    PySpark code
-        -> AST parsing
-        -> Operation DAG (execution / performance view)
-        -> Graphviz DOT
+        graphs -> structure -> stages -> rules -> renderers
+
+    Each artifact builder (ARTIFACT_BUILDERS) pulls only the stages it
+    needs, so e.g. anti-pattern JSON never renders DOT.
     """
-    try:
-        # Parse code into AST
-        tree = ast.parse(code)
-
-        # Extract Spark operations
-        parser = PySparkASTParser()
-        parser.visit(tree)
-        
-        print("=== PARSER OPERATIONS ===")
-        for op in parser.operations:
-            print(op)
-
-        # Build execution / operation DAG
-        operation_dag = build_operation_dag(parser.operations)
-        
-        print("=== DAG NODES ===")
-        for node_id, node in operation_dag.nodes.items():
-            print(f"{node_id}: {type(node)}, {getattr(node, 'parents', None)}")
-
-        
-        # Build data lineage graph
-        lineage_graph = build_data_lineage_graph(parser.operations)
+
+    def __init__(
+        self,
+        code: str,
+        dag_backend: str = "object",
+        stage_strategy: str = "queue",
+        rule_budget: RuleBudget | None = None,
+        statement_store=None,
+        structure_store=None,
+    ):
+        self.code = code
+        self.dag_backend = dag_backend
+        self.stage_strategy = stage_strategy
+        self.rule_budget = rule_budget
+        self.statement_store = statement_store
+        self.structure_store = structure_store
+
+    @cached_property
+    def graphs(self):
+        """
+        (operation DAG, lineage graph), built in a single AST pass.
+        """
+        if self.statement_store is not None:
+            # Only statements missing from the cache are parsed
+            operation_dag, lineage_graph, statement_stats = parse_to_graphs_incremental(
+                self.code, self.statement_store, DAG_BACKENDS[self.dag_backend]()
+            )
+            record_statement_cache(statement_stats)
+            return operation_dag, lineage_graph
+        return parse_to_graphs(ast.parse(self.code), DAG_BACKENDS[self.dag_backend]())
+
+    @property
+    def lineage_graph(self):
+        return self.graphs[1]
+
+    @cached_property
+    def structure(self):
+        """
+        (structure info, cached snapshot, cache key); all None without a
+        structure store.
+        """
+        if self.structure_store is None:
+            return None, None, None
+        operation_dag = self.graphs[0]
+        fingerprint = dag_fingerprint(operation_dag)
+        structure_key = structure_cache_key(fingerprint)
+        snapshot = self.structure_store.get_many([structure_key])[0]
+        record_structure_cache(hit=snapshot is not None)
+        structure = {
+            "fingerprint": fingerprint,
+            "cache_hit": snapshot is not None,
+            "dataframes": dataframe_names(operation_dag),
+        }
+        return structure, snapshot, structure_key
+
+    @cached_property
+    def stages(self):
+        """
+        Operation DAG with stage ids assigned, and the findings restored
+        along with them on a structural cache hit (else None).
+        """
+        operation_dag = self.graphs[0]
+        _, snapshot, _ = self.structure
+        if snapshot is not None:
+            # Same structure analyzed before: re-map its stages and findings
+            return operation_dag, apply_structural_analysis(operation_dag, snapshot)
 
         # Assign stages based on wide dependencies
-        assign_stages(operation_dag)
-        
+        assign_stages(operation_dag, strategy=self.stage_strategy)
+        return operation_dag, None
+
+    @property
+    def staged_dag(self):
+        return self.stages[0]
+
+    @cached_property
+    def rules(self):
+        """
+        (anti-pattern findings, timings).
+        """
+        operation_dag, restored_findings = self.stages
+        _, snapshot, structure_key = self.structure
+        if snapshot is not None:
+            return restored_findings, {**snapshot["timings"], "structural_cache_hit": True}
+
         # Detect anti-patterns (multiple actions on the same lineage)
-        findings = detect_antipatterns(operation_dag)
-
-        # Render lineage and operation DAG to Graphviz DOT
-        dag_dot = render_operation_dag_to_dot(operation_dag)
-        lineage_dot = render_data_lineage_to_dot(lineage_graph)
-
-                # DAG summaries
-        dag_summary_dict = dag_summary_json(operation_dag)
-        stage_summary_dict = stage_summary_json(operation_dag)
-        lineage_summary_dict = lineage_summary_json(lineage_graph)
-        antipattern_summary_dict = antipatterns_summary_json(findings)
-
-        return {
-            "dag_dot": dag_dot,
-            "lineage_dot": lineage_dot,
-            "dag_summary": {
-                "json": dag_summary_dict,
-                "markdown": dag_summary_markdown(dag_summary_dict),
-            },
-            "stage_summary": {
-                "json": stage_summary_dict,
-                "markdown": stage_summary_markdown(stage_summary_dict),
+        antipattern_report = run_antipattern_rules(operation_dag, self.rule_budget)
+        antipattern_timings = antipattern_report.timings()
+        record_antipattern_report(antipattern_report)
+        logger.info(
+            "antipattern_rules_timed",
+            extra={
+                "event": "antipattern_rules_timed",
+                **antipattern_timings,
             },
-            "lineage_summary": {
-                "json": lineage_summary_dict,
-                "markdown": lineage_summary_markdown(lineage_graph),
-            },
-            "antipatterns": {
-                "json": antipattern_summary_dict,
-                "markdown": antipattern_summary_markdown(antipattern_summary_dict),
-            },
-        }
+        )
+
+        if self.structure_store is not None:
+            snapshot = capture_structural_analysis(operation_dag, antipattern_report)
+            if snapshot is not None:
+                self.structure_store.set_many({structure_key: snapshot})
+        return antipattern_report.findings, antipattern_timings
+
+    # Summaries feed both their JSON and markdown artifacts
+    @cached_property
+    def dag_summary(self):
+        return dag_summary_json(self.staged_dag)
+
+    @cached_property
+    def stage_summary(self):
+        return stage_summary_json(self.staged_dag)
+
+    @cached_property
+    def lineage_summary(self):
+        return lineage_summary_json(self.lineage_graph)
+
+    @cached_property
+    def antipattern_summary(self):
+        return antipatterns_summary_json(self.rules[0])
+
+
+# artifact -> builder, or part -> builder for artifacts with several parts
+ARTIFACT_BUILDERS = {
+    # Render lineage and operation DAG to Graphviz DOT
+    "dag_dot": lambda run: render_operation_dag_to_dot(run.staged_dag),
+    "lineage_dot": lambda run: render_data_lineage_to_dot(run.lineage_graph),
+    # DAG summaries
+    "dag_summary": {
+        "json": lambda run: run.dag_summary,
+        "markdown": lambda run: dag_summary_markdown(run.dag_summary),
+    },
+    "stage_summary": {
+        "json": lambda run: run.stage_summary,
+        "markdown": lambda run: stage_summary_markdown(run.stage_summary),
+    },
+    "lineage_summary": {
+        "json": lambda run: run.lineage_summary,
+        "markdown": lambda run: lineage_summary_markdown(run.lineage_graph),
+    },
+    "antipatterns": {
+        "json": lambda run: run.antipattern_summary,
+        "markdown": lambda run: antipattern_summary_markdown(run.antipattern_summary),
+        "timings": lambda run: run.rules[1],
+    },
+    "structure": lambda run: run.structure[0],
+}
+
+ARTIFACT_NAMES = tuple(ARTIFACT_BUILDERS)
+
+
+def select_artifacts(artifacts: Iterable[str] | None) -> Dict[str, Tuple[str, ...] | None]:
+    """
+    Parses an artifact selection: "name" for a whole artifact, or
+    "name.part" (e.g. "antipatterns.json") for one part of it. Returns
+    {name: parts, or None for all of them} in ARTIFACT_NAMES order.
+    Raises ValueError on unknown names.
+    """
+    if artifacts is None:
+        return {name: None for name in ARTIFACT_NAMES}
+
+    selected: Dict[str, set | None] = {}
+    for artifact in artifacts:
+        name, _, part = artifact.partition(".")
+        builder = ARTIFACT_BUILDERS.get(name)
+        if builder is None or (part and (not isinstance(builder, dict) or part not in builder)):
+            raise ValueError(f"Unknown artifact: {artifact!r}")
+        if not part:
+            selected[name] = None
+        elif selected.get(name, set()) is not None:
+            selected.setdefault(name, set()).add(part)
+
+    return {
+        name: None if selected[name] is None else tuple(p for p in ARTIFACT_BUILDERS[name] if p in selected[name])
+        for name in ARTIFACT_NAMES
+        if name in selected
+    }
+
+
+def run_dag_pipeline(
+    code: str,
+    dag_backend: str = "object",
+    stage_strategy: str = "queue",
+    rule_budget: RuleBudget | None = None,
+    statement_store=None,
+    structure_store=None,
+    artifacts: Iterable[str] | None = None,
+) -> dict:
+    """
+    Runs the OPERATION-LEVEL pipeline only:
+
+    PySpark code
+        -> AST parsing + Operation DAG + lineage (single fused pass)
+        -> Graphviz DOT
+
+    `dag_backend` selects the OperationDAG implementation
+    ("object" or the array-backed "compact") and `stage_strategy` the
+    stage assignment algorithm ("queue" or the level-synchronous "levels").
+    `rule_budget` bounds the time anti-pattern rules may take.
+    `statement_store` enables the statement-level cache: unchanged
+    top-level statements reuse their parsed operations.
+    `structure_store` enables reuse across scripts: stages and findings
+    of a structurally identical DAG (same fingerprint, any names) are
+    re-mapped instead of recomputed.
+    `artifacts` restricts the result to a subset (see select_artifacts);
+    only the stages those need are run. Default: all artifacts.
+    """
+    selection = select_artifacts(artifacts)
+    run = PipelineRun(
+        code,
+        dag_backend=dag_backend,
+        stage_strategy=stage_strategy,
+        rule_budget=rule_budget,
+        statement_store=statement_store,
+        structure_store=structure_store,
+    )
+    try:
+        result = {}
+        for name, parts in selection.items():
+            builder = ARTIFACT_BUILDERS[name]
+            if not isinstance(builder, dict):
+                result[name] = builder(run)
+            else:
+                result[name] = {part: builder[part](run) for part in (parts or builder)}
+        return result
     except Exception as e:
         print(f"ERROR in run_dag_pipeline: {e}")
         traceback.print_exc()
-        raise
\ No newline at end of file
+        raise
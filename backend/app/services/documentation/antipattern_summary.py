@@ -1,4 +1,4 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 from collections import defaultdict
 
 from app.graphs.antipatterns.base import AntiPatternFinding
@@ -61,3 +61,67 @@ def antipattern_summary_markdown(summary: Dict[str, Any]) -> str:
         lines.append("")
 
     return "\n".join(lines)
+
+
+def combined_antipatterns_json(
+    per_file: List[Tuple[str, Dict[str, Any]]],
+) -> Dict[str, Any]:
+    """
+    Merge per-file anti-pattern summaries (path, antipatterns_summary_json)
+    into one repository-level report.
+    """
+
+    by_severity = defaultdict(int)
+    by_rule: Dict[str, Dict[str, Any]] = {}
+
+    for path, summary in per_file:
+        for severity, count in summary["by_severity"].items():
+            by_severity[severity] += count
+
+        for rule_id, issues in summary["by_rule"].items():
+            rule = by_rule.setdefault(
+                rule_id,
+                {"severity": issues[0]["severity"], "issues": 0, "files": []},
+            )
+            rule["issues"] += len(issues)
+            rule["files"].append(path)
+
+    return {
+        "total_issues": sum(by_severity.values()),
+        "files_with_issues": sum(1 for _, s in per_file if s["total_issues"]),
+        "by_severity": dict(by_severity),
+        "by_rule": by_rule,
+    }
+
+
+def combined_antipattern_markdown(summary: Dict[str, Any], max_files: int = 10) -> str:
+    """
+    Render the repository-level anti-pattern report as Markdown.
+    """
+
+    lines = [
+        "## Performance Anti-Patterns (all files)",
+        f"**Total issues detected:** {summary['total_issues']} "
+        f"in {summary['files_with_issues']} file(s)",
+        "",
+    ]
+
+    if summary["total_issues"] == 0:
+        lines.append("✅ No performance anti-patterns detected.")
+        return "\n".join(lines)
+
+    lines.append("### Issues by severity")
+    for severity, count in summary["by_severity"].items():
+        lines.append(f"- **{severity}**: {count}")
+    lines.append("")
+
+    for rule_id, rule in summary["by_rule"].items():
+        files = rule["files"]
+        shown = ", ".join(files[:max_files])
+        more = f" and {len(files) - max_files} more" if len(files) > max_files else ""
+        lines.append(f"### {rule_id}")
+        lines.append(f"- **{rule['severity']}**: {rule['issues']} issue(s) in {len(files)} file(s)")
+        lines.append(f"- Files: {shown}{more}")
+        lines.append("")
+
+    return "\n".join(lines)
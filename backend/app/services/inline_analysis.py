@@ -0,0 +1,83 @@
+# backend/app/services/inline_analysis.py
+"""
+Synchronous fast path for small scripts: the API runs the analysis
+itself, on a small bounded thread pool, and returns it in the initial
+response; only the LLM explanation is queued.
+"""
+
+import ast
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from app.config import (
+    CACHE_TTL,
+    INLINE_ANALYSIS_MAX_BYTES,
+    INLINE_ANALYSIS_MAX_STATEMENTS,
+    INLINE_ANALYSIS_WORKERS,
+)
+from app.metrics import INLINE_ANALYSIS_SECONDS
+from app.services.cache import RedisJSONStore
+from app.services.dag_pipeline import run_dag_pipeline
+from app.services.jobs import KIND_EXPLAIN, LLM_ARTIFACT, update_job
+
+_executor = ThreadPoolExecutor(max_workers=INLINE_ANALYSIS_WORKERS, thread_name_prefix="inline-analysis")
+# Requests beyond the pool's size are queued to Celery instead of waiting
+_slots = asyncio.Semaphore(INLINE_ANALYSIS_WORKERS)
+
+
+def fits_inline(code: str, tree: ast.Module) -> bool:
+    return len(code) <= INLINE_ANALYSIS_MAX_BYTES and len(tree.body) <= INLINE_ANALYSIS_MAX_STATEMENTS
+
+
+def analyze_inline(job_id: str, code: str, pipeline_options: dict, artifacts=None) -> dict:
+    """
+    Runs the pipeline and stores the job record with its analysis
+    artifacts: "analysis_complete" if the LLM step is still to run,
+    else "finished". Returns the analysis, its artifact refs and the
+    job start time.
+    """
+    started = time.perf_counter()
+    started_at_ms = int(time.time() * 1000)
+    wants_llm = artifacts is None or LLM_ARTIFACT in artifacts
+
+    dag_result = run_dag_pipeline(
+        code,
+        structure_store=RedisJSONStore(ttl=CACHE_TTL),
+        artifacts=None if artifacts is None else [a for a in artifacts if a != LLM_ARTIFACT],
+        **pipeline_options,
+    )
+
+    fields = {
+        "job_id": job_id,
+        "kind": KIND_EXPLAIN,
+        "status": "analysis_complete" if wants_llm else "finished",
+        "cached": False,
+        "started_at": started_at_ms,
+    }
+    if not wants_llm:
+        finished_at_ms = int(time.time() * 1000)
+        fields.update(finished_at=finished_at_ms, job_duration_ms=finished_at_ms - started_at_ms)
+    refs = update_job(job_id, fields, artifacts=dag_result)
+
+    INLINE_ANALYSIS_SECONDS.observe(time.perf_counter() - started)
+    return {
+        "analysis": dag_result,
+        "refs": refs,
+        "started_at_ms": started_at_ms,
+        "status": fields["status"],
+    }
+
+
+async def try_analyze_inline(job_id: str, code: str, pipeline_options: dict, artifacts=None) -> Optional[dict]:
+    """
+    analyze_inline on the pool, or None when all its threads are busy.
+    """
+    if _slots.locked():
+        return None
+    async with _slots:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            _executor, analyze_inline, job_id, code, pipeline_options, artifacts
+        )
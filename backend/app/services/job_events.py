@@ -0,0 +1,100 @@
+# backend/app/services/job_events.py
+"""
+Job events over Redis pub/sub.
+
+Every job record update (services.jobs.update_job) is published on
+job-events:{job_id}. Each API process holds one pattern subscription for
+all jobs (JobEventHub) and wakes up the requests waiting on a job, so a
+waiting client costs neither polling round trips nor a pooled connection.
+
+Events are wake-ups only: waiters re-read the job record. Waiters that
+only read the record (the /status long-poll) are not woken by streamed
+explanation chunks, which do not change it. Every waiter is also woken
+on (re)subscription, since events published while disconnected are lost.
+"""
+
+import asyncio
+import logging
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import Dict
+
+import redis
+
+from app.services.cache import async_redis_client
+from app.services.jobs import JOB_EVENTS_PREFIX, LLM_CHUNK_EVENT
+
+logger = logging.getLogger(__name__)
+
+
+class JobEventHub:
+    """
+    Pattern subscription to job-events:*, started lazily on the running
+    event loop, fanning events out to the waiters of each job.
+    """
+
+    def __init__(self, client=None):
+        self.client = client or async_redis_client
+        # job id -> {event: whether it wants LLM_CHUNK_EVENT wake-ups}
+        self._waiters: Dict[str, Dict[asyncio.Event, bool]] = defaultdict(dict)
+        self._task = None
+
+    @asynccontextmanager
+    async def listen(self, job_id: str, chunks: bool = True):
+        """
+        Yields an asyncio.Event set on each event of `job_id`; clear it
+        before re-reading the job record. `chunks=False` skips the
+        explanation chunk events.
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        woken = asyncio.Event()
+        self._waiters[job_id][woken] = chunks
+        try:
+            yield woken
+        finally:
+            waiters = self._waiters[job_id]
+            waiters.pop(woken, None)
+            if not waiters:
+                del self._waiters[job_id]
+
+    def _wake(self, job_id: str, data: str):
+        chunk = data == LLM_CHUNK_EVENT
+        for woken, chunks in self._waiters.get(job_id, {}).items():
+            if chunks or not chunk:
+                woken.set()
+
+    def _wake_all(self):
+        for waiters in self._waiters.values():
+            for woken in waiters:
+                woken.set()
+
+    async def _run(self):
+        while True:
+            pubsub = self.client.pubsub()
+            try:
+                await pubsub.psubscribe(JOB_EVENTS_PREFIX + "*")
+                async for message in pubsub.listen():
+                    if message["type"] == "psubscribe":
+                        self._wake_all()
+                    elif message["type"] == "pmessage":
+                        channel, data = message["channel"], message["data"]
+                        channel = channel.decode() if isinstance(channel, bytes) else channel
+                        data = data.decode() if isinstance(data, bytes) else data
+                        self._wake(channel[len(JOB_EVENTS_PREFIX):], data)
+            except redis.RedisError as e:
+                logger.warning(
+                    "job_events_disconnected",
+                    extra={"event": "job_events_disconnected", "error": str(e)},
+                )
+            finally:
+                await pubsub.aclose()
+            await asyncio.sleep(1)
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+job_event_hub = JobEventHub()
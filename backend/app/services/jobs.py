@@ -0,0 +1,210 @@
+# backend/app/services/jobs.py
+"""
+Job records and the artifacts they reference.
+
+A job record is a small Redis hash (job:{job_id}): status, timings,
+one `artifact:{name}` field per artifact, holding a reference
+{"key", "size"}, and a version incremented by every update. Artifacts
+(each analysis output, the LLM explanation, batch reports) are stored
+once, encoded, under a content-addressed key, so status updates only
+write the fields that changed and identical outputs of different jobs
+share storage.
+
+Artifacts never change under a key, so reading them through the local
+result cache needs no invalidation.
+
+Every update is announced on job-events:{job_id} (services.job_events).
+"""
+
+import hashlib
+import json
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.config import CACHE_TTL, ARTIFACT_TTL
+from app.services.cache import (
+    aget_results,
+    async_redis_client,
+    binary_redis_client,
+    codec,
+)
+
+ARTIFACT_FIELD_PREFIX = "artifact:"
+
+# Pub/sub channels of job updates: JOB_EVENTS_PREFIX + job_id; the message
+# is the job status, or LLM_CHUNK_EVENT for streamed explanation text
+# (services.llm_stream), which leaves the job record unchanged
+JOB_EVENTS_PREFIX = "job-events:"
+LLM_CHUNK_EVENT = "llm_chunk"
+
+# Typed job record fields; any other field is a plain string
+INT_FIELDS = {"created_at", "started_at", "finished_at", "job_duration_ms", "version"}
+BOOL_FIELDS = {"cached"}
+JSON_FIELDS = {"progress", "error"}
+
+# Job kinds, which decide how artifacts are laid out in a status result
+KIND_EXPLAIN = "explain"
+KIND_BATCH = "batch"
+
+# Artifact holding the LLM explanation; the others are run_dag_pipeline's
+LLM_ARTIFACT = "llm"
+
+# Field of a coalesced request's record: the job computing its result
+ALIAS_FIELD = "alias_of"
+
+
+def job_key(job_id: str) -> str:
+    return f"job:{job_id}"
+
+
+def job_events_channel(job_id: str) -> str:
+    return f"{JOB_EVENTS_PREFIX}{job_id}"
+
+
+def artifact_ref(encoded: bytes) -> dict:
+    """
+    Content-addressed reference to an encoded artifact; `size` is the
+    stored (encoded) size in bytes.
+    """
+    digest = hashlib.blake2b(encoded, digest_size=16).hexdigest()
+    return {"key": f"artifact:{digest}", "size": len(encoded)}
+
+
+def artifact_etag(ref: dict) -> str:
+    return '"' + ref["key"][len("artifact:"):] + '"'
+
+
+def encode_job_fields(fields: Dict[str, Any]) -> Dict[str, str]:
+    encoded = {}
+    for name, value in fields.items():
+        if name in JSON_FIELDS:
+            encoded[name] = json.dumps(value)
+        elif name in BOOL_FIELDS:
+            encoded[name] = "1" if value else "0"
+        else:
+            encoded[name] = str(value)
+    return encoded
+
+
+def decode_job(raw: Dict[bytes, bytes]) -> dict:
+    """
+    Job record from HGETALL; artifact references are gathered under
+    "artifacts".
+    """
+    record = {"artifacts": {}}
+    for name, value in raw.items():
+        name = name.decode() if isinstance(name, bytes) else name
+        value = value.decode() if isinstance(value, bytes) else value
+        if name.startswith(ARTIFACT_FIELD_PREFIX):
+            record["artifacts"][name[len(ARTIFACT_FIELD_PREFIX):]] = json.loads(value)
+        elif name in JSON_FIELDS:
+            record[name] = json.loads(value)
+        elif name in INT_FIELDS:
+            record[name] = int(value)
+        elif name in BOOL_FIELDS:
+            record[name] = value == "1"
+        else:
+            record[name] = value
+    return record
+
+
+def stage_artifacts(pipe, artifacts: Dict[str, Any]) -> Dict[str, dict]:
+    """
+    Queues the writes of `artifacts` on a pipeline; returns their references.
+    """
+    refs = {}
+    for name, value in artifacts.items():
+        encoded = codec.encode(value)
+        ref = artifact_ref(encoded)
+        pipe.set(ref["key"], encoded, ex=ARTIFACT_TTL)
+        refs[name] = ref
+    return refs
+
+
+def refresh_artifacts(refs: Dict[str, dict]) -> bool:
+    """
+    Restarts the ARTIFACT_TTL of artifacts stored earlier, before a job
+    record or result manifest goes on referencing them for another
+    CACHE_TTL. False if any of them has already expired.
+    """
+    if not refs:
+        return True
+    pipe = binary_redis_client.pipeline(transaction=False)
+    for ref in refs.values():
+        pipe.expire(ref["key"], ARTIFACT_TTL)
+    return all(pipe.execute())
+
+
+def artifact_fields(refs: Dict[str, dict]) -> Dict[str, str]:
+    return {ARTIFACT_FIELD_PREFIX + name: json.dumps(ref) for name, ref in refs.items()}
+
+
+def update_job(job_id: str, fields: Dict[str, Any], artifacts: Optional[Dict[str, Any]] = None) -> Dict[str, dict]:
+    """
+    Writes the given fields, and any new artifacts with their references,
+    in one round trip, bumps the version and announces the update; other
+    fields are left untouched. Returns the artifact references.
+    """
+    pipe = binary_redis_client.pipeline(transaction=False)
+    refs = stage_artifacts(pipe, artifacts) if artifacts else {}
+    pipe.hset(job_key(job_id), mapping={**encode_job_fields(fields), **artifact_fields(refs)})
+    pipe.hincrby(job_key(job_id), "version", 1)
+    pipe.expire(job_key(job_id), CACHE_TTL)
+    pipe.publish(job_events_channel(job_id), str(fields.get("status", "")))
+    pipe.execute()
+    return refs
+
+
+async def aget_job(job_id: str) -> Optional[dict]:
+    raw = await async_redis_client.hgetall(job_key(job_id))
+    return decode_job(raw) if raw else None
+
+
+async def aget_jobs(job_ids: List[str], fields: Optional[List[str]] = None) -> List[Optional[dict]]:
+    """
+    Job records of many jobs in one pipelined round trip; with `fields`,
+    only those fields (HMGET), which leaves out artifact references.
+    """
+    async with async_redis_client.pipeline(transaction=False) as pipe:
+        for job_id in job_ids:
+            if fields is None:
+                pipe.hgetall(job_key(job_id))
+            else:
+                pipe.hmget(job_key(job_id), fields)
+        replies = await pipe.execute()
+
+    records = []
+    for reply in replies:
+        if fields is not None:
+            reply = {name: value for name, value in zip(fields, reply) if value is not None}
+        records.append(decode_job(reply) if reply else None)
+    return records
+
+
+async def aresolve_artifacts(refs: Dict[str, dict], names: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """
+    Artifact values by name, in one round trip for those not cached
+    locally. Expired artifacts are None.
+    """
+    names = [name for name in (refs if names is None else names) if name in refs]
+    if not names:
+        return {}
+    values = await aget_results(*(refs[name]["key"] for name in names))
+    return dict(zip(names, values))
+
+
+def build_result(record: dict, artifacts: Dict[str, Any]) -> Optional[dict]:
+    """
+    The `result` of a status response, in the layout each job kind had
+    before records were split into artifacts.
+    """
+    result = {}
+    if "error" in record:
+        result["error"] = record["error"]
+    if "progress" in record:
+        result["progress"] = record["progress"]
+    if record.get("kind") == KIND_BATCH:
+        result.update(artifacts)
+    elif artifacts:
+        result["analysis"] = {name: value for name, value in artifacts.items() if name != LLM_ARTIFACT} or None
+        result["llm"] = artifacts.get(LLM_ARTIFACT)
+    return result or None
@@ -1,81 +1,17 @@
-import time
-import google.generativeai as genai
-from app.config import settings
-import logging 
+from app.config import settings, LLM_BREAKER_THRESHOLD, LLM_BREAKER_COOLDOWN
+from app.services.llm_clients import GeminiClientPool, LLMRateLimitError
 
-logger = logging.getLogger(__name__)
+# Model clients of this process, reused across calls and tasks
+llm_client_pool = GeminiClientPool(
+    api_key=settings.gemini_api_key,
+    api_endpoint=settings.gemini_api_endpoint,
+    transport=settings.gemini_transport,
+    breaker_threshold=LLM_BREAKER_THRESHOLD,
+    breaker_cooldown=LLM_BREAKER_COOLDOWN,
+)
 
-class LLMRateLimitError(Exception):
-    """Raised when the LLM hits a rate or quota limit."""
-    pass
 
-class GeminiClient:
-    def __init__(self, model: str | None = None):
-        genai.configure(api_key=settings.gemini_api_key)
-        self.model_name = model or settings.gemini_model
-        self.model = genai.GenerativeModel(self.model_name)
-
-
-    def explain_pyspark(self, code: str) -> dict:
-        start = time.time()
-        logger.info(
-            "llm_request",
-            extra={
-                "event": "llm_request",
-                "model": self.model_name,
-            },
-        )
-        try:
-            
-            prompt = f"""
-            Explain the following PySpark code:\n\n{code}
-            Be concise and clear in your explanation, don't expand too much. 
-            Talk about the tradeoffs if any.
-            Add a paragraph at the end with suggestions to improve the code performance.
-            """
-            response = self.model.generate_content(prompt)
-            explanation = response.text
-
-            # Statistics
-            latency_ms = int((time.time() - start) * 1000)
-            
-            # Extract usage stats safely
-            raw = response.to_dict()
-            usage = raw.get("usage_metadata", {})
-
-            tokens_used = usage.get("total_token_count", 0)
-            prompt_tokens = usage.get("prompt_token_count", 0)
-            completion_tokens = usage.get("candidates_token_count", 0)
-
-            
-            return {
-                "model": self.model_name,
-                "explanation": explanation,
-                "tokens_used": tokens_used,
-                "prompt_tokens": prompt_tokens,
-                "completion_tokens": completion_tokens,
-                "latency_ms": latency_ms
-            }
-        except Exception as e:
-            msg = str(e).lower()
-
-            if "quota" in msg or "rate" in msg or "429" in msg:
-                logger.warning(
-                "llm_rate_limited",
-                extra={
-                    "event": "llm_rate_limited",
-                    "model": self.model_name,
-                },
-            )
-                raise LLMRateLimitError(str(e))
-
-            return {
-                "model": self.model_name,
-                "error": str(e),
-                "latency_ms": int((time.time() - start) * 1000),
-            }
-
-def explain_with_fallback(code: str) -> dict:
+def explain_with_fallback(code: str, stream=None) -> dict:
     models = [
         settings.gemini_model,
         settings.gemini_fallback_model,
@@ -83,12 +19,14 @@ def explain_with_fallback(code: str) -> dict:
 
     last_error = None
 
-    for model in filter(None, models):
+    for client in llm_client_pool.clients(filter(None, models)):
         try:
-            client = GeminiClient(model=model)
-            return client.explain_pyspark(code)
+            return client.explain_pyspark(code, stream=stream)
         except LLMRateLimitError as e:
             last_error = e
+            if stream is not None:
+                # The next model starts over
+                stream.reset()
             continue
 
     raise LLMRateLimitError(
@@ -0,0 +1,261 @@
+# backend/app/services/llm_clients.py
+"""
+Gemini model clients, reused for the life of the process.
+
+genai.configure() replaces genai's API clients, and with them their
+connections, so configuring per call paid for a new connection (TLS
+handshake, gRPC channel) on every request. GeminiClientPool configures
+genai once per process and keeps one GeminiClient per model name.
+
+Independent of app.config: settings are passed in (services.llm builds
+the process pool from them), so tests and benchmarks can point a pool
+at a local stub server (app.benchmarks.stub_llm).
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+import google.generativeai as genai
+from google.api_core import exceptions as api_exceptions
+
+from app.metrics import (
+    LLM_CALLS,
+    LLM_CLIENTS_CREATED,
+    LLM_FAILURES,
+    LLM_REQUEST_SECONDS,
+    LLM_TIME_TO_FIRST_TOKEN_SECONDS,
+    LLM_UNHEALTHY_UNTIL,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class LLMRateLimitError(Exception):
+    """Raised when the LLM hits a rate or quota limit."""
+    pass
+
+def is_rate_limit_error(error: Exception) -> bool:
+    if isinstance(error, (api_exceptions.TooManyRequests, api_exceptions.ResourceExhausted)):
+        return True
+    # Not every rate limit is typed; over REST, messages include the URL,
+    # whose "generateContent" contains "rate"
+    msg = str(error).lower()
+    return "quota" in msg or "rate limit" in msg or "429" in msg
+
+
+class GeminiClient:
+    """
+    One model, reused across calls (GeminiClientPool), with its health:
+    a rate-limited model, or one failing `breaker_threshold` times in a
+    row, is unhealthy for `breaker_cooldown` seconds. Calls, failures
+    and health are exported as metrics labelled with the model.
+
+    Shared by the LLM worker's threads: counters change under a lock.
+    genai must be configured first (GeminiClientPool does it).
+    """
+
+    def __init__(self, model: str, breaker_threshold: int = 3, breaker_cooldown: float = 30):
+        self.model_name = model
+        self.model = genai.GenerativeModel(self.model_name)
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self.calls = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.unhealthy_until = 0.0
+        self.last_error = None
+        self._lock = threading.Lock()
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.unhealthy_until
+
+    def health(self) -> dict:
+        with self._lock:
+            return {
+                "healthy": self.healthy,
+                "calls": self.calls,
+                "failures": self.failures,
+                "consecutive_failures": self.consecutive_failures,
+                "last_error": self.last_error,
+            }
+
+    def _record_call(self):
+        with self._lock:
+            self.calls += 1
+        LLM_CALLS.labels(model=self.model_name).inc()
+
+    def _record_success(self):
+        with self._lock:
+            self.consecutive_failures = 0
+            self.unhealthy_until = 0.0
+        LLM_UNHEALTHY_UNTIL.labels(model=self.model_name).set(0)
+
+    def _record_failure(self, error: str, rate_limited: bool = False):
+        with self._lock:
+            self.failures += 1
+            self.consecutive_failures += 1
+            consecutive_failures = self.consecutive_failures
+            self.last_error = error
+            tripped = rate_limited or consecutive_failures >= self.breaker_threshold
+            if tripped:
+                self.unhealthy_until = time.monotonic() + self.breaker_cooldown
+        LLM_FAILURES.labels(
+            model=self.model_name, reason="rate_limited" if rate_limited else "error"
+        ).inc()
+        if tripped:
+            LLM_UNHEALTHY_UNTIL.labels(model=self.model_name).set(time.time() + self.breaker_cooldown)
+            logger.warning(
+                "llm_client_unhealthy",
+                extra={
+                    "event": "llm_client_unhealthy",
+                    "model": self.model_name,
+                    "consecutive_failures": consecutive_failures,
+                },
+            )
+
+    def explain_pyspark(self, code: str, stream=None) -> dict:
+        """
+        Explanation of `code`. With `stream` (a services.llm_stream
+        ExplanationStream), the response is streamed and each chunk is
+        written to it as it arrives.
+        """
+        start = time.time()
+        ttft_ms = None
+        self._record_call()
+        logger.info(
+            "llm_request",
+            extra={
+                "event": "llm_request",
+                "model": self.model_name,
+            },
+        )
+        try:
+            
+            prompt = f"""
+            Explain the following PySpark code:\n\n{code}
+            Be concise and clear in your explanation, don't expand too much. 
+            Talk about the tradeoffs if any.
+            Add a paragraph at the end with suggestions to improve the code performance.
+            """
+            if stream is None:
+                response = self.model.generate_content(prompt)
+                explanation = response.text
+            else:
+                response = self.model.generate_content(prompt, stream=True)
+                parts = []
+                for chunk in response:
+                    if ttft_ms is None:
+                        ttft_ms = int((time.time() - start) * 1000)
+                        LLM_TIME_TO_FIRST_TOKEN_SECONDS.labels(model=self.model_name).observe(ttft_ms / 1000)
+                    parts.append(chunk.text)
+                    stream.write(chunk.text)
+                explanation = "".join(parts)
+
+            # Statistics
+            latency_ms = int((time.time() - start) * 1000)
+            LLM_REQUEST_SECONDS.labels(model=self.model_name).observe(latency_ms / 1000)
+            self._record_success()
+            
+            # Extract usage stats safely
+            raw = response.to_dict()
+            usage = raw.get("usage_metadata", {})
+
+            tokens_used = usage.get("total_token_count", 0)
+            prompt_tokens = usage.get("prompt_token_count", 0)
+            completion_tokens = usage.get("candidates_token_count", 0)
+
+            
+            return {
+                "model": self.model_name,
+                "explanation": explanation,
+                "tokens_used": tokens_used,
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "latency_ms": latency_ms,
+                "ttft_ms": ttft_ms,
+            }
+        except Exception as e:
+            rate_limited = is_rate_limit_error(e)
+            self._record_failure(str(e), rate_limited)
+
+            if rate_limited:
+                logger.warning(
+                "llm_rate_limited",
+                extra={
+                    "event": "llm_rate_limited",
+                    "model": self.model_name,
+                },
+            )
+                raise LLMRateLimitError(str(e))
+
+            return {
+                "model": self.model_name,
+                "error": str(e),
+                "latency_ms": int((time.time() - start) * 1000),
+            }
+
+
+class GeminiClientPool:
+    """
+    One GeminiClient per model name, created on first use. genai is
+    configured once per process: the pool starts over in a forked child
+    (Celery's prefork pool), since connections do not survive a fork.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        api_endpoint: Optional[str] = None,
+        transport: Optional[str] = None,
+        breaker_threshold: int = 3,
+        breaker_cooldown: float = 30,
+    ):
+        self.api_key = api_key
+        self.api_endpoint = api_endpoint
+        self.transport = transport
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self._clients: Dict[str, GeminiClient] = {}
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _configure(self):
+        genai.configure(
+            api_key=self.api_key,
+            transport=self.transport,
+            client_options={"api_endpoint": self.api_endpoint} if self.api_endpoint else None,
+        )
+
+    def get(self, model: str) -> GeminiClient:
+        client = self._clients.get(model) if self._pid == os.getpid() else None
+        if client is not None:
+            return client
+        with self._lock:
+            if self._pid != os.getpid():
+                self._configure()
+                self._clients = {}
+                self._pid = os.getpid()
+            client = self._clients.get(model)
+            if client is None:
+                client = self._clients[model] = GeminiClient(
+                    model, self.breaker_threshold, self.breaker_cooldown
+                )
+                LLM_CLIENTS_CREATED.labels(model=model).inc()
+            return client
+
+    def clients(self, models: Iterable[str]) -> List[GeminiClient]:
+        """
+        Clients of `models` in order, healthy ones first: an unhealthy
+        model is only tried when no healthy one is left.
+        """
+        clients = [self.get(model) for model in models]
+        return [c for c in clients if c.healthy] + [c for c in clients if not c.healthy]
+
+    def health(self) -> Dict[str, dict]:
+        with self._lock:
+            clients = dict(self._clients)
+        return {model: client.health() for model, client in clients.items()}
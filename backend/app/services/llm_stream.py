@@ -0,0 +1,75 @@
+# backend/app/services/llm_stream.py
+"""
+Partial LLM explanations, streamed while the model generates them.
+
+The worker appends each chunk to a Redis stream per job
+(llm-stream:{job_id}) and announces it on the job's events channel, so
+event streams (GET /jobs/{job_id}/events) forward the text as it
+arrives. The complete explanation is still stored as the job's `llm`
+artifact; the stream expires shortly after it ends.
+
+Entries are {"text": chunk}, or {"reset": "1"} when generation restarts
+on a fallback model and the text so far must be discarded.
+"""
+
+from typing import List, Tuple
+
+from app.config import CACHE_TTL, LLM_STREAM_MAXLEN, LLM_STREAM_TTL
+from app.services.cache import async_redis_client, binary_redis_client
+from app.services.jobs import LLM_CHUNK_EVENT, job_events_channel
+
+
+def explanation_stream_key(job_id: str) -> str:
+    return f"llm-stream:{job_id}"
+
+
+class ExplanationStream:
+    """
+    Writer of one job's explanation stream.
+    """
+
+    def __init__(self, job_id: str, client=None):
+        self.job_id = job_id
+        self.key = explanation_stream_key(job_id)
+        self.client = client or binary_redis_client
+        self.written = False
+
+    def _append(self, entry: dict, ttl: int = CACHE_TTL):
+        pipe = self.client.pipeline(transaction=False)
+        pipe.xadd(self.key, entry, maxlen=LLM_STREAM_MAXLEN, approximate=True)
+        pipe.expire(self.key, ttl)
+        pipe.publish(job_events_channel(self.job_id), LLM_CHUNK_EVENT)
+        pipe.execute()
+
+    def write(self, text: str):
+        if text:
+            self._append({"text": text})
+            self.written = True
+
+    def reset(self):
+        """
+        Discards the text so far, e.g. before retrying on another model.
+        """
+        if self.written:
+            self._append({"reset": "1"})
+            self.written = False
+
+    def close(self):
+        if self.written:
+            self.client.expire(self.key, LLM_STREAM_TTL)
+
+
+async def aread_explanation(job_id: str, after: str = "-") -> List[Tuple[str, dict]]:
+    """
+    Entries of a job's explanation stream after the entry id `after`
+    (exclusive), as (id, {"text"} or {"reset"}).
+    """
+    start = after if after == "-" else f"({after}"
+    entries = await async_redis_client.xrange(explanation_stream_key(job_id), min=start)
+    return [
+        (
+            entry_id.decode(),
+            {name.decode(): value.decode() for name, value in fields.items()},
+        )
+        for entry_id, fields in entries
+    ]
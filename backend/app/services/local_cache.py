@@ -0,0 +1,90 @@
+# backend/app/services/local_cache.py
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Tuple
+
+MISS = object()
+
+
+class LocalResultCache:
+    """
+    Bounded in-process LRU + TTL cache of decoded results, in front of
+    Redis (see services.cache). Bounded both by entry count and by the
+    approximate size of the cached values (their uncompressed encoded
+    length, see ResultCodec.decode_sized).
+
+    Values are shared between readers and must be treated as read-only.
+
+    Thread-safe: the pub/sub invalidation listener runs in its own thread.
+    `sequence` is bumped by every invalidation, so a reader that fetched
+    a value from Redis before a concurrent invalidation does not cache it
+    (see put(seen_sequence=...)).
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.bytes = 0
+        self.sequence = 0
+        self._entries: "OrderedDict[str, Tuple[float, Any, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Any:
+        """
+        Returns the cached value, or MISS.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return MISS
+            expires_at, value, size = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.bytes -= size
+                return MISS
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: Any, size: int, seen_sequence: int | None = None) -> int:
+        """
+        Caches a value fetched from Redis. Returns the number of entries
+        evicted to make room. Skipped (returns 0) if an invalidation
+        happened since `seen_sequence` was read, or if the value alone
+        exceeds the byte budget.
+        """
+        with self._lock:
+            if seen_sequence is not None and seen_sequence != self.sequence:
+                return 0
+            if size > self.max_bytes:
+                return 0
+
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[2]
+            self._entries[key] = (time.monotonic() + self.ttl, value, size)
+            self.bytes += size
+
+            evicted = 0
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self.bytes -= evicted_size
+                evicted += 1
+            return evicted
+
+    def invalidate(self, key: str):
+        with self._lock:
+            self.sequence += 1
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self.bytes -= entry[2]
+
+    def clear(self):
+        with self._lock:
+            self.sequence += 1
+            self._entries.clear()
+            self.bytes = 0
@@ -0,0 +1,64 @@
+# backend/app/services/single_flight.py
+"""
+Single-flight for explain jobs: while a job computes the result for a
+cache key, identical submissions attach to it instead of enqueueing
+their own analysis and LLM call.
+
+The first submission claims inflight:{cache_key} (SET NX, holding its
+job id); later ones get an alias job record pointing at the owner.
+The owner's LLM step releases the claim once the result is cached, or
+once the job has failed. If a worker dies first, the claim expires
+after INFLIGHT_LOCK_TTL.
+"""
+
+from typing import Optional
+
+from app.config import CACHE_TTL, INFLIGHT_LOCK_TTL
+from app.services.cache import async_redis_client, binary_redis_client
+from app.services.jobs import ALIAS_FIELD, encode_job_fields, job_key
+
+# Compare-and-delete: only the owner releases the claim, never a later
+# owner's after this one's expired
+RELEASE_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+_release = binary_redis_client.register_script(RELEASE_LUA)
+
+
+def inflight_key(cache_key: str) -> str:
+    return f"inflight:{cache_key}"
+
+
+async def claim(cache_key: str, job_id: str) -> Optional[str]:
+    """
+    Claims the computation of `cache_key` for `job_id`. Returns None if
+    claimed, else the job id of the owner already computing it.
+    """
+    # SET NX GET: claims, or returns the current owner, atomically
+    owner = await async_redis_client.set(
+        inflight_key(cache_key), job_id, nx=True, get=True, ex=INFLIGHT_LOCK_TTL
+    )
+    if owner is None:
+        return None
+    return owner.decode() if isinstance(owner, bytes) else owner
+
+
+async def attach(job_id: str, owner_job_id: str):
+    """
+    Alias job record: its status and artifacts are the owner's.
+    """
+    async with async_redis_client.pipeline(transaction=False) as pipe:
+        pipe.hset(job_key(job_id), mapping=encode_job_fields({
+            "job_id": job_id,
+            ALIAS_FIELD: owner_job_id,
+        }))
+        pipe.expire(job_key(job_id), CACHE_TTL)
+        await pipe.execute()
+
+
+def release(cache_key: str, job_id: str) -> bool:
+    return bool(_release(keys=[inflight_key(cache_key)], args=[job_id]))
@@ -0,0 +1,86 @@
+# backend/app/services/structural_cache.py
+"""
+Cross-script reuse of analysis results by structural DAG fingerprint.
+
+Templated scripts that differ only in names and literals produce DAGs
+with the same fingerprint (graphs.operation.fingerprint). Their stage
+assignment and anti-pattern findings are stored by node *position*, and
+re-mapped onto the node ids of the script being analyzed.
+"""
+
+from typing import List, Optional
+
+from app.cache_keys import analyzer_fingerprint
+from app.graphs.antipatterns.base import AntiPatternFinding
+from app.graphs.operation.fingerprint import remap_names
+
+
+def structure_cache_key(fingerprint: str) -> str:
+    return f"analysis:struct:{analyzer_fingerprint()}:{fingerprint}"
+
+
+def llm_structure_cache_key(fingerprint: str) -> str:
+    return f"llm:struct:{analyzer_fingerprint()}:{fingerprint}"
+
+
+def capture_structural_analysis(dag, report) -> Optional[dict]:
+    """
+    Position-based snapshot of stage ids and findings.
+    Reports cut short by time budgets are not reusable.
+    """
+    if any(run.truncated or run.skipped for run in report.runs):
+        return None
+
+    position = {node_id: i for i, node_id in enumerate(dag.nodes)}
+    return {
+        "stage_ids": [node.stage_id for node in dag.nodes.values()],
+        "findings": [
+            {
+                "rule_id": f.rule_id,
+                "severity": f.severity,
+                "message": f.message,
+                "nodes": [position[node_id] for node_id in f.nodes],
+                # Original ids, to re-map any that appear in the message
+                "node_ids": f.nodes,
+            }
+            for f in report.findings
+        ],
+        "timings": report.timings(),
+    }
+
+
+def apply_structural_analysis(dag, snapshot: dict) -> List[AntiPatternFinding]:
+    """
+    Restores stage ids onto `dag` and returns the findings with node ids
+    of this DAG. `dag` must have the fingerprint the snapshot was stored
+    under.
+    """
+    ids = list(dag.nodes)
+    for node, stage_id in zip(dag.nodes.values(), snapshot["stage_ids"]):
+        node.stage_id = stage_id
+
+    findings = []
+    for f in snapshot["findings"]:
+        node_ids = [ids[i] for i in f["nodes"]]
+        message = remap_names(f["message"], f["node_ids"], node_ids) or f["message"]
+        findings.append(
+            AntiPatternFinding(
+                rule_id=f["rule_id"],
+                severity=f["severity"],
+                message=message,
+                nodes=node_ids,
+            )
+        )
+    return findings
+
+
+def remap_structural_explanation(entry: dict, dataframes: List[str]) -> Optional[dict]:
+    """
+    LLM result cached for a structurally identical script, with its
+    DataFrame names replaced by this script's. None if the names
+    cannot be mapped one-to-one.
+    """
+    explanation = remap_names(entry["llm"]["explanation"], entry["dataframes"], dataframes)
+    if explanation is None:
+        return None
+    return {**entry["llm"], "explanation": explanation, "latency_ms": 0, "structural_reuse": True}
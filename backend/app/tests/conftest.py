@@ -0,0 +1,63 @@
+import os
+
+import pytest
+
+# app.config builds Settings() on import
+os.environ.setdefault("GEMINI_API_KEY", "test")
+os.environ.setdefault("GEMINI_MODEL", "test-model")
+
+try:
+    import fakeredis
+    import fakeredis.aioredis
+except ImportError:
+    fakeredis = None
+else:
+    import redis
+    import redis.asyncio as aioredis
+
+    # Every client app.services.cache creates shares one in-memory server
+    FAKE_REDIS_SERVER = fakeredis.FakeServer()
+
+    def _fake_from_url(fake_cls):
+        def from_url(cls, url, max_connections=None, **kwargs):
+            return fake_cls(server=FAKE_REDIS_SERVER, **kwargs)
+        return classmethod(from_url)
+
+    redis.Redis.from_url = _fake_from_url(fakeredis.FakeRedis)
+    aioredis.Redis.from_url = _fake_from_url(fakeredis.aioredis.FakeRedis)
+
+
+@pytest.fixture
+def fake_redis():
+    """
+    Sync client on the shared fake server, flushed before each test.
+    """
+    if fakeredis is None:
+        pytest.skip("fakeredis is not installed")
+    client = fakeredis.FakeRedis(server=FAKE_REDIS_SERVER, decode_responses=True)
+    client.flushall()
+    return client
+
+
+@pytest.fixture
+def client(fake_redis):
+    """
+    TestClient of the API with rate limiting off. One client keeps one
+    event loop across requests, as the job event hub needs.
+    """
+    from fastapi.testclient import TestClient
+
+    from app import rate_limit
+    from app.main import app
+    from app.services.cache import async_redis_client
+
+    async def no_limit():
+        pass
+
+    app.dependency_overrides[rate_limit.rate_limit] = no_limit
+    with TestClient(app) as client:
+        # Pooled connections of an earlier client's loop would never see
+        # pub/sub messages on this one
+        client.portal.call(async_redis_client.connection_pool.disconnect)
+        yield client
+    app.dependency_overrides.clear()
@@ -0,0 +1,177 @@
+import ast
+
+from app.parsers.fused_parser import parse_to_graphs
+from app.graphs.operation.stage_assignment import assign_stages
+from app.graphs.antipatterns.context import AnalysisContext
+from app.graphs.antipatterns.registry import (
+    BREAKER,
+    RULES,
+    COMPILED_RULES,
+    detect_antipatterns,
+    run_antipattern_rules,
+)
+from app.graphs.antipatterns.budget import RuleBudget
+from app.benchmarks.synthetic import generate_etl_script
+from app.graphs.antipatterns.dsl import NodeMatch, NodePattern, DeclarativeRule
+
+CODE = """
+df_base = df.select("user_id", "value").filter("value > 10")
+df_rep = df_base.repartition(200)
+df_grouped = df_rep.groupBy("user_id").count()
+df_grouped.collect()
+df_joined = df_grouped.join(df_base, on="user_id")
+df_joined.count()
+"""
+
+
+def build(code):
+    dag, _ = parse_to_graphs(ast.parse(code))
+    return assign_stages(dag)
+
+
+def dfs_ancestors(dag, node_id):
+    visited, stack = set(), [node_id]
+    while stack:
+        for parent in dag.nodes[stack.pop()].parents:
+            if parent not in visited:
+                visited.add(parent)
+                stack.append(parent)
+    return visited
+
+
+def test_context_ancestors_match_dfs():
+    dag = build(CODE)
+    ctx = AnalysisContext(dag)
+
+    for node_id in dag.nodes:
+        assert set(ctx.ancestors(node_id)) == dfs_ancestors(dag, node_id)
+
+
+def test_context_topological_order():
+    dag = build(CODE)
+    ctx = AnalysisContext(dag)
+
+    position = {ctx.ids[i]: pos for pos, i in enumerate(ctx.topological_order)}
+    for node_id, node in dag.nodes.items():
+        for parent in node.parents:
+            assert position[parent] < position[node_id]
+
+
+def test_findings():
+    findings = detect_antipatterns(build(CODE))
+
+    by_rule = {}
+    for f in findings:
+        by_rule.setdefault(f.rule_id, []).append(f.nodes)
+
+    assert by_rule["REPARTITION_MISUSE"] == [
+        ["df_rep_repartition_3", "df_grouped_groupBy_4"]
+    ]
+    assert ["df_joined_count_7"] in by_rule["ACTION_WITHOUT_CACHE"]
+
+
+def test_self_referencing_action_terminates():
+    # Actions on a never-assigned DataFrame wire into a cycle
+    dag = build("df.show()\ndf.count()\n")
+    ctx = AnalysisContext(dag)
+
+    for node_id in dag.nodes:
+        assert set(ctx.ancestors(node_id)) == dfs_ancestors(dag, node_id)
+    assert detect_antipatterns(dag) is not None
+
+
+def test_self_loop_with_other_parents():
+    # A chained op re-assigned to the same variable parents its node to itself
+    dag = build('df = spark.read.parquet("x")\ndf2 = df.select("a").select("b")\ndf2.count()\n')
+    ctx = AnalysisContext(dag)
+    # Self-loop first, whatever order the parent sets iterate in
+    ctx.parents = [sorted(parents, key=lambda other: other != i) for i, parents in enumerate(ctx.parents)]
+
+    for node_id in dag.nodes:
+        assert set(ctx.ancestors(node_id)) == dfs_ancestors(dag, node_id)
+    assert detect_antipatterns(dag) is not None
+
+
+def test_rules_compile_into_one_matcher():
+
+    dag = build(CODE)
+    standalone = [f for rule in RULES for f in rule.detect(dag)]
+
+    assert len(COMPILED_RULES.rules) == len(RULES)
+    assert [(f.rule_id, f.nodes) for f in detect_antipatterns(dag)] == [
+        (f.rule_id, f.nodes) for f in standalone
+    ]
+
+
+def test_descendant_condition():
+
+    class WideBeforeAction(DeclarativeRule):
+        rule_id = "WIDE_BEFORE_ACTION"
+        severity = "LOW"
+        patterns = (
+            NodePattern(
+                node=NodeMatch(label="repartition", has_descendant_in="actions"),
+                message="{label} feeds an action at stage {stage_id}",
+            ),
+        )
+
+    findings = WideBeforeAction().detect(build(CODE))
+
+    assert [f.nodes for f in findings] == [["df_rep_repartition_3"]]
+    assert findings[0].message == "repartition feeds an action at stage 1"
+
+
+def test_rule_over_budget_is_truncated_and_circuit_opens():
+
+    dag = build(generate_etl_script(200))
+    budget = RuleBudget(rule_ms=0, breaker_threshold=2, breaker_cooldown_s=60)
+    BREAKER.reset()
+
+    try:
+        report = run_antipattern_rules(dag, budget)
+        assert all(run.truncated and run.over_budget for run in report.runs)
+        assert {f.rule_id for f in report.findings if f.severity == "INFO"} == {
+            rule.rule_id for rule in RULES
+        }
+
+        run_antipattern_rules(dag, budget)
+        report = run_antipattern_rules(dag, RuleBudget(rule_ms=10_000))
+        assert all(run.skipped for run in report.runs)
+        assert [r["elapsed_ms"] for r in report.timings()["rules"]] == [0] * len(RULES)
+    finally:
+        BREAKER.reset()
+
+
+def test_unbudgeted_runs_bypass_the_breaker():
+
+    dag = build(generate_etl_script(200))
+    budget = RuleBudget(rule_ms=0, breaker_threshold=2, breaker_cooldown_s=60)
+    BREAKER.reset()
+
+    try:
+        run_antipattern_rules(dag, budget)
+        # Within budget by definition: must not reset the failure counts
+        detect_antipatterns(dag)
+        run_antipattern_rules(dag, budget)
+
+        # Circuits are open for budgeted runs only
+        assert all(run.skipped for run in run_antipattern_rules(dag, budget).runs)
+        report = run_antipattern_rules(dag)
+        assert not any(run.skipped or run.truncated for run in report.runs)
+    finally:
+        BREAKER.reset()
+
+
+def test_job_deadline_does_not_open_circuits():
+
+    dag = build(generate_etl_script(200))
+    budget = RuleBudget(job_ms=0, breaker_threshold=1, breaker_cooldown_s=60)
+    BREAKER.reset()
+
+    try:
+        for _ in range(2):
+            report = run_antipattern_rules(dag, budget)
+            assert all(run.truncated and not run.over_budget for run in report.runs)
+            assert not any(run.skipped for run in report.runs)
+    finally:
+        BREAKER.reset()
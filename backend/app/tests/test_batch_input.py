@@ -0,0 +1,132 @@
+import io
+import tarfile
+import zipfile
+
+import pytest
+
+from app.services.batch_input import (
+    BatchInputError,
+    BatchLimits,
+    files_from_archive,
+    files_from_list,
+)
+from app.services.documentation.antipattern_summary import combined_antipatterns_json
+
+LIMITS = BatchLimits(max_files=10, max_bytes=10_000)
+
+REPO = {
+    "jobs/daily.py": 'df = spark.read.parquet("a")\ndf.count()\n',
+    "jobs/weekly.py": "df2 = df.groupBy('x')\n",
+    "README.md": "# not python",
+    ".git/hooks/pre-commit.py": "print('skip')\n",
+}
+
+
+def make_zip(files):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for path, code in files.items():
+            archive.writestr(path, code)
+    return buffer.getvalue()
+
+
+def make_tar(files):
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as archive:
+        for path, code in files.items():
+            data = code.encode("utf-8")
+            info = tarfile.TarInfo(path)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize("name, build", [("repo.zip", make_zip), ("repo.tar.gz", make_tar)])
+def test_archive_yields_only_python_sources(name, build):
+    files = files_from_archive(build(REPO), name, LIMITS)
+    assert sorted(files) == sorted(
+        (path, REPO[path]) for path in ("jobs/daily.py", "jobs/weekly.py")
+    )
+
+
+def test_limits_are_enforced():
+    with pytest.raises(BatchInputError):
+        files_from_archive(make_zip(REPO), "repo.zip", BatchLimits(max_files=1, max_bytes=10_000))
+    with pytest.raises(BatchInputError):
+        files_from_list([("a.py", "x" * 100)], BatchLimits(max_files=10, max_bytes=50))
+    with pytest.raises(BatchInputError):
+        files_from_archive(b"not an archive", "repo.zip", LIMITS)
+
+
+def test_combined_report_merges_files():
+    issue = {"severity": "HIGH", "message": "m", "nodes": ["n"]}
+    combined = combined_antipatterns_json([
+        ("a.py", {"total_issues": 2, "by_severity": {"HIGH": 2}, "by_rule": {"R1": [issue, issue]}}),
+        ("b.py", {"total_issues": 1, "by_severity": {"HIGH": 1}, "by_rule": {"R1": [issue]}}),
+        ("c.py", {"total_issues": 0, "by_severity": {}, "by_rule": {}}),
+    ])
+
+    assert combined["total_issues"] == 3
+    assert combined["files_with_issues"] == 2
+    assert combined["by_rule"]["R1"] == {"severity": "HIGH", "issues": 3, "files": ["a.py", "b.py"]}
+
+
+def corrupt_zip_data(data):
+    # Stored (uncompressed) members: flipping source bytes breaks the CRC
+    return data.replace(b"spark.read", b"spark.READ")
+
+
+def encrypt_zip_flags(data):
+    # Sets the "encrypted" flag of every central directory entry
+    data = bytearray(data)
+    offset = data.find(b"PK\x01\x02")
+    while offset != -1:
+        data[offset + 8] |= 0x1
+        offset = data.find(b"PK\x01\x02", offset + 4)
+    return bytes(data)
+
+
+@pytest.mark.parametrize("name, data", [
+    ("repo.zip", corrupt_zip_data(make_zip(REPO))),
+    ("repo.zip", encrypt_zip_flags(make_zip(REPO))),
+    ("repo.tar.gz", make_tar(REPO)[:-40]),
+])
+def test_corrupt_archives_are_input_errors(name, data):
+    with pytest.raises(BatchInputError):
+        files_from_archive(data, name, LIMITS)
+
+
+@pytest.mark.parametrize("name, build", [("repo.zip", make_zip), ("repo.tar.gz", make_tar)])
+def test_non_python_members_count_toward_archive_limit(name, build):
+    data = build({"assets/blob.bin": "\0" * 200_000, **REPO})
+    limits = BatchLimits(max_files=10, max_bytes=10_000, max_archive_bytes=100_000)
+
+    with pytest.raises(BatchInputError, match="uncompressed bytes"):
+        files_from_archive(data, name, limits)
+    assert len(files_from_archive(data, name, LIMITS)) == 2
+
+
+def test_tar_stops_at_the_member_over_the_limit():
+    data = make_tar({"huge.bin": "\0" * 200_000, "jobs/daily.py": REPO["jobs/daily.py"]})
+    # Cut inside the huge member: a full read would hit the truncation
+    limits = BatchLimits(max_files=10, max_bytes=10_000, max_archive_bytes=100_000)
+
+    with pytest.raises(BatchInputError, match="exceeds 100000"):
+        files_from_archive(data[: len(data) // 2], "repo.tar.gz", limits)
+
+
+def test_archive_upload_limits(client, monkeypatch):
+    from app.api import routes
+
+    monkeypatch.setattr(routes, "BATCH_MAX_BYTES", 1000)
+    response = client.post(
+        "/explain/pyspark/batch/archive",
+        files={"archive": ("repo.zip", b"x" * 5000, "application/zip")},
+    )
+    assert response.status_code == 413
+
+    response = client.post(
+        "/explain/pyspark/batch/archive",
+        files={"archive": ("repo.zip", b"not an archive", "application/zip")},
+    )
+    assert response.status_code == 400
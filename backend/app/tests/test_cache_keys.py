@@ -0,0 +1,42 @@
+import pytest
+
+from app import cache_keys
+from app.cache_keys import analyzer_fingerprint, canonical_code_hash, code_cache_key
+from app.parsers.spark_semantics import SPARK_OPS, OpType
+
+
+@pytest.fixture
+def fresh_fingerprints():
+    cache_keys.parser_fingerprint.cache_clear()
+    cache_keys.analyzer_fingerprint.cache_clear()
+    yield
+    cache_keys.parser_fingerprint.cache_clear()
+    cache_keys.analyzer_fingerprint.cache_clear()
+
+
+def test_cosmetic_edits_share_a_key():
+    original = 'df2 = df.select("a").filter("b")\ndf2.show()\n'
+    cosmetic = "df2 = df.select( 'a' ).filter('b')   # keep\ndf2.show()\n"
+
+    assert code_cache_key(original) == code_cache_key(cosmetic)
+
+
+def test_semantic_and_line_changes_miss():
+    original = 'df2 = df.select("a")\ndf2.show()\n'
+
+    assert canonical_code_hash(original) != canonical_code_hash(original.replace("a", "b"))
+    # Result node ids carry line numbers
+    assert canonical_code_hash(original) != canonical_code_hash("\n" + original)
+
+
+def test_unparsable_code_falls_back_to_raw_hash():
+    assert canonical_code_hash("df = (").startswith("raw:")
+
+
+def test_spark_semantics_change_invalidates(fresh_fingerprints, monkeypatch):
+    before = analyzer_fingerprint()
+    cache_keys.parser_fingerprint.cache_clear()
+    cache_keys.analyzer_fingerprint.cache_clear()
+
+    monkeypatch.setitem(SPARK_OPS, "cache", OpType.TRANSFORMATION)
+    assert analyzer_fingerprint() != before
@@ -0,0 +1,58 @@
+import ast
+
+from app.parsers.fused_parser import parse_to_graphs
+from app.graphs.operation.compact_dag import CompactOperationDAG
+from app.graphs.operation.stage_assignment import assign_stages
+from app.graphs.antipatterns.registry import detect_antipatterns
+from app.visualizers.operation_graph_visualizer import render_operation_dag_to_dot
+
+CODE = """
+df_base = df.select("user_id", "value").filter("value > 10")
+df_rep = df_base.repartition(200)
+df_grouped = df_rep.groupBy("user_id").count()
+df_joined = df_grouped.join(df_base, on="user_id")
+df_joined.collect()
+"""
+
+
+def build(dag=None):
+    dag, _ = parse_to_graphs(ast.parse(CODE), dag)
+    return assign_stages(dag)
+
+
+def test_compact_dag_matches_object_dag():
+    expected = build()
+    compact = build(CompactOperationDAG())
+
+    assert list(compact.nodes) == list(expected.nodes)
+    for node_id, node in expected.nodes.items():
+        view = compact.nodes[node_id]
+        assert view.label == node.label
+        assert view.op_type == node.op_type
+        assert view.dependency_type == node.dependency_type
+        assert view.stage_id == node.stage_id
+        assert set(view.parents) == node.parents
+        assert set(view.children) == node.children
+
+
+def test_compact_dag_drops_duplicate_edges():
+    dag = CompactOperationDAG()
+    dag.add_operation("a", "select", None, False, 1)
+    dag.add_operation("b", "join", None, True, 2)
+    dag.add_edge("a", "b")
+    dag.add_edge("a", "b")
+
+    assert dag.nodes["a"].children == ("b",)
+    assert dag.nodes["b"].parents == ("a",)
+
+
+def test_rules_and_visualizer_work_on_compact_dag():
+    expected = build()
+    compact = build(CompactOperationDAG())
+
+    assert [f.nodes for f in detect_antipatterns(compact)] == [
+        f.nodes for f in detect_antipatterns(expected)
+    ]
+    assert sorted(render_operation_dag_to_dot(compact).splitlines()) == sorted(
+        render_operation_dag_to_dot(expected).splitlines()
+    )
@@ -0,0 +1,49 @@
+import pytest
+
+from app.parsers.incremental import InMemoryStatementStore
+from app.services import dag_pipeline
+from app.services.dag_pipeline import run_dag_pipeline
+
+CODE = (
+    'orders = spark.read.parquet("s3://orders")\n'
+    'recent = orders.filter("ts > 1").repartition(200)\n'
+    "recent.count()\n"
+    "recent.show()\n"
+)
+
+
+def test_subset_matches_full_result():
+    full = run_dag_pipeline(CODE)
+    subset = run_dag_pipeline(CODE, artifacts=["antipatterns.json", "lineage_dot"])
+
+    assert subset == {
+        "lineage_dot": full["lineage_dot"],
+        "antipatterns": {"json": full["antipatterns"]["json"]},
+    }
+
+
+def test_only_needed_stages_run(monkeypatch):
+    calls = []
+    monkeypatch.setattr(dag_pipeline, "assign_stages", lambda dag, strategy: calls.append("stages"))
+    monkeypatch.setattr(dag_pipeline, "run_antipattern_rules", lambda *a: calls.append("rules"))
+
+    run_dag_pipeline(CODE, artifacts=["lineage_dot", "lineage_summary"])
+    assert calls == []
+
+    run_dag_pipeline(CODE, artifacts=["dag_dot", "stage_summary.markdown"])
+    assert calls == ["stages"]
+
+
+def test_structure_hit_with_subset():
+    store = InMemoryStatementStore()
+    first = run_dag_pipeline(CODE, structure_store=store)
+    second = run_dag_pipeline(CODE, structure_store=store, artifacts=["antipatterns.json", "structure"])
+
+    assert second["structure"]["cache_hit"]
+    assert second["antipatterns"]["json"] == first["antipatterns"]["json"]
+
+
+@pytest.mark.parametrize("artifact", ["nope", "dag_dot.json", "antipatterns.nope"])
+def test_unknown_artifacts_are_rejected(artifact):
+    with pytest.raises(ValueError):
+        run_dag_pipeline(CODE, artifacts=[artifact])
@@ -0,0 +1,67 @@
+import ast
+
+from app.parsers.fused_parser import parse_to_graphs
+from app.graphs.operation.fingerprint import dag_fingerprint, dataframe_names, remap_names
+from app.graphs.operation.stage_assignment import assign_stages
+from app.graphs.antipatterns.registry import run_antipattern_rules
+from app.services.structural_cache import (
+    capture_structural_analysis,
+    apply_structural_analysis,
+)
+
+TEMPLATE = (
+    'orders = spark.read.parquet("{table}")\n'
+    'recent = orders.filter("{predicate}").repartition(200)\n'
+    'joined = recent.join(orders, on="id")\n'
+    "joined.count()\n"
+    "recent.show()\n"
+)
+
+
+def dag_for(code):
+    dag, _ = parse_to_graphs(ast.parse(code))
+    return dag
+
+
+def test_fingerprint_ignores_names_and_literals():
+    first = TEMPLATE.format(table="s3://a/orders", predicate="ts > 1")
+    second = (
+        TEMPLATE.format(table="s3://b/sales", predicate="amount > 0")
+        .replace("orders", "sales")
+        .replace("recent", "big")
+    )
+
+    assert dag_fingerprint(dag_for(first)) == dag_fingerprint(dag_for(second))
+    assert dag_fingerprint(dag_for(first)) != dag_fingerprint(
+        dag_for(first.replace("repartition(200)", "coalesce(2)"))
+    )
+
+
+def test_structural_snapshot_remaps_onto_other_script():
+    first = dag_for(TEMPLATE.format(table="a", predicate="x"))
+    assign_stages(first)
+    snapshot = capture_structural_analysis(first, run_antipattern_rules(first))
+
+    second_code = TEMPLATE.format(table="b", predicate="y").replace("recent", "big")
+    reused = dag_for(second_code)
+    findings = apply_structural_analysis(reused, snapshot)
+
+    expected = dag_for(second_code)
+    assign_stages(expected)
+    expected_findings = run_antipattern_rules(expected).findings
+
+    assert findings == expected_findings
+    assert [n.stage_id for n in reused.nodes.values()] == [
+        n.stage_id for n in expected.nodes.values()
+    ]
+
+
+def test_remap_names_is_word_bounded_and_rejects_ambiguity():
+    dag = dag_for(TEMPLATE.format(table="a", predicate="x"))
+    names = dataframe_names(dag)
+    assert names[:2] == ["orders", "recent"]
+
+    renamed = [{"orders": "sales", "recent": "orders"}.get(n, n) for n in names]
+    text = "orders feeds recent; recently_used stays"
+    assert remap_names(text, names, renamed) == "sales feeds orders; recently_used stays"
+    assert remap_names(text, ["a", "a"], ["b", "c"]) is None
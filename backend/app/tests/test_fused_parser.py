@@ -0,0 +1,55 @@
+import ast
+
+from app.parsers.ast_parser import PySparkASTParser
+from app.parsers.fused_parser import parse_to_graphs
+from app.graphs.operation.operation_graph_builder import build_operation_dag
+from app.graphs.lineage.lineage_graph_builder import build_data_lineage_graph
+from app.benchmarks.synthetic import generate_etl_script
+
+
+def legacy_graphs(code):
+    parser = PySparkASTParser()
+    parser.visit(ast.parse(code))
+    dag = build_operation_dag(parser.operations)
+    lineage = build_data_lineage_graph(parser.operations)
+    return dag, lineage
+
+
+def assert_same_graphs(code):
+    legacy_dag, legacy_lineage = legacy_graphs(code)
+    fused_dag, fused_lineage = parse_to_graphs(ast.parse(code))
+
+    assert list(fused_dag.nodes) == list(legacy_dag.nodes)
+    for node_id, legacy_node in legacy_dag.nodes.items():
+        node = fused_dag.nodes[node_id]
+        assert node.label == legacy_node.label
+        assert node.op_type == legacy_node.op_type
+        assert node.causes_shuffle == legacy_node.causes_shuffle
+        assert node.lineno == legacy_node.lineno
+        assert node.parents == legacy_node.parents
+        assert node.children == legacy_node.children
+
+    assert dict(fused_lineage.parents) == dict(legacy_lineage.parents)
+    assert dict(fused_lineage.children) == dict(legacy_lineage.children)
+
+
+def test_chain_and_join_match_legacy():
+    assert_same_graphs(
+        'df_base = df.select("user_id").filter("value > 10")\n'
+        "df_rep = df_base.repartition(200)\n"
+        'df_joined = df_rep.join(df_base, on="user_id")\n'
+        "df_joined.count()\n"
+    )
+
+
+def test_forward_references_match_legacy():
+    # df is only produced later, legacy wiring resolves to its last producer
+    assert_same_graphs(
+        'df2 = df.select("a")\n'
+        "df.show()\n"
+        "df = df2.distinct()\n"
+    )
+
+
+def test_synthetic_script_matches_legacy():
+    assert_same_graphs(generate_etl_script(500))
@@ -0,0 +1,105 @@
+import ast
+
+from app.parsers.fused_parser import parse_to_graphs
+from app.parsers.incremental import (
+    SOURCE_KEY_PREFIX,
+    InMemoryStatementStore,
+    parse_to_graphs_incremental,
+)
+from app.benchmarks.synthetic import generate_etl_script
+
+MIXED_SCRIPT = '''
+# header
+df = spark.read.csv("x")
+
+@decorator
+def load(a):
+    b = a.filter("x")
+    b.show()
+    return b
+
+if enabled:
+    df2 = df.groupBy("a")
+else:
+    df2 = df.select("b")
+query = """
+df9 = df.join(df2)
+"""
+df3 = (df
+  .join(df2)
+)
+df3.count()
+'''
+
+
+def assert_same_graphs(code, store):
+    dag, lineage, stats = parse_to_graphs_incremental(code, store)
+    expected_dag, expected_lineage = parse_to_graphs(ast.parse(code))
+
+    assert list(dag.nodes) == list(expected_dag.nodes)
+    for node_id, expected in expected_dag.nodes.items():
+        node = dag.nodes[node_id]
+        assert node.lineno == expected.lineno
+        assert node.parents == expected.parents
+        assert node.children == expected.children
+
+    assert dict(lineage.parents) == dict(expected_lineage.parents)
+    assert dict(lineage.children) == dict(expected_lineage.children)
+    return stats
+
+
+def test_cold_and_warm_runs_match_fused_parser():
+    store = InMemoryStatementStore()
+    cold = assert_same_graphs(MIXED_SCRIPT, store)
+    warm = assert_same_graphs(MIXED_SCRIPT, store)
+
+    assert cold.hits == 0
+    assert not warm.fallback
+    # The multi-line string spans two textual chunks, so only its
+    # normalized AST key can hit
+    assert warm.hits == warm.statements
+
+
+def test_edit_only_misses_edited_statement():
+    store = InMemoryStatementStore()
+    code = generate_etl_script(200)
+    assert_same_graphs(code, store)
+
+    lines = code.splitlines()
+    lines[100] = lines[100].replace("(", '("edited", ', 1)
+    # Shift everything down: relative line numbers must still be re-linked
+    edited = "# resubmitted\n\n" + "\n".join(lines)
+
+    stats = assert_same_graphs(edited, store)
+    assert stats.statements == 200
+    assert stats.hits == 199
+
+
+def test_cosmetic_edit_hits_normalized_key():
+    store = InMemoryStatementStore()
+    assert_same_graphs("df.count()\n", store)
+    # Scripts with a source-text hit store AST keys for their other statements
+    assert_same_graphs('df.count()\ndf2 = df.select("a")\n', store)
+
+    stats = assert_same_graphs("df.count()\ndf2 = df.select( 'a' )  # note\n", store)
+    assert stats.hits == 2
+
+
+def test_cold_script_skips_ast_keys():
+    store = InMemoryStatementStore()
+    assert_same_graphs('df2 = df.select("a")\ndf2.show()\n', store)
+    assert all(key.startswith(SOURCE_KEY_PREFIX) for key in store._entries)
+
+    # Reformatting every statement misses once, then hits by text
+    reformatted = "df2 = df.select( 'a' )\ndf2.show()  # note\n"
+    assert assert_same_graphs(reformatted, store).hits == 0
+    assert assert_same_graphs(reformatted, store).hits == 2
+
+
+def test_store_rewrite_refreshes_recency():
+    store = InMemoryStatementStore(max_entries=2)
+    store.set_many({"a": [1], "b": [2]})
+    store.set_many({"a": [3]})
+    store.set_many({"c": [4]})
+
+    assert store.get_many(["a", "b", "c"]) == [[3], None, [4]]
@@ -0,0 +1,101 @@
+import ast
+import asyncio
+
+import pytest
+
+from app.api import routes
+from app.services import inline_analysis
+from app.services.inline_analysis import analyze_inline, fits_inline, try_analyze_inline
+from app.services.jobs import aget_job
+
+CODE = """
+df_base = df.select("user_id", "value").filter("value > 10")
+df_grouped = df_base.groupBy("user_id").count()
+df_grouped.collect()
+"""
+
+
+@pytest.fixture
+def enqueued(monkeypatch):
+    calls = {"llm": [], "explain": []}
+    monkeypatch.setattr(routes, "enqueue_llm", lambda *args: calls["llm"].append(args))
+    monkeypatch.setattr(routes, "enqueue_explain", lambda *args: calls["explain"].append(args))
+    return calls
+
+
+def test_fits_inline_thresholds(monkeypatch):
+    monkeypatch.setattr(inline_analysis, "INLINE_ANALYSIS_MAX_BYTES", 40)
+    monkeypatch.setattr(inline_analysis, "INLINE_ANALYSIS_MAX_STATEMENTS", 2)
+
+    def fits(code):
+        return fits_inline(code, ast.parse(code))
+
+    assert fits("a = 1\nb = 2\n")
+    assert not fits("a = 1\nb = 2\nc = 3\n")
+    assert fits("x = " + "1" * 36)
+    assert not fits("x = " + "1" * 37)
+
+
+def test_analyze_inline_records_analysis_complete(fake_redis):
+    result = analyze_inline("job-inline", CODE, {})
+
+    assert result["status"] == "analysis_complete"
+    assert set(result["refs"]) == set(result["analysis"])
+    record = asyncio.run(aget_job("job-inline"))
+    assert record["status"] == "analysis_complete"
+    assert record["artifacts"] == result["refs"]
+    assert "finished_at" not in record
+
+
+def test_analyze_inline_without_llm_finishes(fake_redis):
+    result = analyze_inline("job-no-llm", CODE, {}, artifacts=["dag_summary"])
+
+    assert result["status"] == "finished"
+    record = asyncio.run(aget_job("job-no-llm"))
+    assert record["status"] == "finished"
+    assert record["job_duration_ms"] >= 0
+    assert "dag_summary" in record["artifacts"]
+
+
+def test_try_analyze_inline_declines_when_pool_busy(monkeypatch):
+    monkeypatch.setattr(inline_analysis, "_slots", asyncio.Semaphore(0))
+
+    assert asyncio.run(try_analyze_inline("job-busy", CODE, {})) is None
+
+
+def test_inline_analysis_hands_off_to_llm(client, enqueued):
+    response = client.post("/explain/pyspark", json={"code": CODE})
+
+    body = response.json()
+    assert body["status"] == "analysis_complete"
+    assert "dag_summary" in body["analysis"]
+    assert enqueued["explain"] == []
+    [(handoff, code, cache_key, artifacts)] = enqueued["llm"]
+    assert handoff["job_id"] == body["job_id"]
+    assert handoff["status"] == "analysis_complete"
+    assert handoff["refs"] == asyncio.run(aget_job(body["job_id"]))["artifacts"]
+    assert (code, artifacts) == (CODE, None)
+
+
+def test_busy_pool_falls_back_to_queue(client, enqueued, monkeypatch):
+    monkeypatch.setattr(inline_analysis, "_slots", asyncio.Semaphore(0))
+
+    body = client.post("/explain/pyspark", json={"code": CODE}).json()
+
+    assert body["status"] == "pending"
+    assert body.get("analysis") is None
+    assert enqueued["llm"] == []
+    assert [args[0] for args in enqueued["explain"]] == [body["job_id"]]
+
+
+def test_inline_failure_falls_back_to_queue(client, enqueued, monkeypatch):
+    async def broken(*args):
+        raise RuntimeError("analysis crashed")
+
+    monkeypatch.setattr(routes, "try_analyze_inline", broken)
+
+    body = client.post("/explain/pyspark", json={"code": CODE}).json()
+
+    assert body["status"] == "pending"
+    assert enqueued["llm"] == []
+    assert [args[0] for args in enqueued["explain"]] == [body["job_id"]]
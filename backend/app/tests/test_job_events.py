@@ -0,0 +1,34 @@
+import asyncio
+
+import redis.asyncio as aioredis
+
+from app.config import settings
+from app.services.job_events import JobEventHub
+from app.services.jobs import LLM_CHUNK_EVENT, job_events_channel
+
+
+def test_status_waiters_ignore_explanation_chunks(fake_redis):
+    async def scenario():
+        # Own client: pooled connections are bound to the loop they were made on
+        redis_client = aioredis.Redis.from_url(settings.redis_url)
+        hub = JobEventHub(redis_client)
+        try:
+            async with hub.listen("job-1", chunks=False) as status, hub.listen("job-1") as stream:
+                # Subscribing wakes every waiter
+                await asyncio.wait_for(stream.wait(), 5)
+                status.clear()
+                stream.clear()
+
+                await redis_client.publish(job_events_channel("job-1"), LLM_CHUNK_EVENT)
+                await asyncio.wait_for(stream.wait(), 5)
+                assert not status.is_set()
+
+                stream.clear()
+                await redis_client.publish(job_events_channel("job-1"), "finished")
+                await asyncio.wait_for(status.wait(), 5)
+                assert stream.is_set()
+        finally:
+            await hub.close()
+            await redis_client.aclose()
+
+    asyncio.run(scenario())
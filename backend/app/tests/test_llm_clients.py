@@ -0,0 +1,119 @@
+import threading
+import time
+
+import pytest
+from prometheus_client import REGISTRY
+
+from app.benchmarks.stub_llm import CHUNKS, StubLLMServer
+from app.services.llm_clients import GeminiClientPool, LLMRateLimitError
+
+
+class RecordingStream:
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, text):
+        self.chunks.append(text)
+
+    def reset(self):
+        self.chunks = []
+
+
+@pytest.fixture
+def server():
+    server = StubLLMServer(rate_limited={"limited"}, failing={"broken"}).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def pool(server):
+    return GeminiClientPool(
+        api_key="test",
+        api_endpoint=server.endpoint,
+        transport="rest",
+        breaker_threshold=2,
+        breaker_cooldown=60,
+    )
+
+
+def test_one_client_and_connection_per_model(server, pool):
+    client = pool.get("stub")
+    for _ in range(3):
+        result = pool.get("stub").explain_pyspark("df.show()")
+        assert result["explanation"] == "".join(CHUNKS)
+        assert result["tokens_used"] == 21
+
+    assert pool.get("stub") is client
+    assert client.calls == 3
+    assert server.requests == 3
+    assert server.connections == 1
+
+
+def test_streamed_explanation(pool):
+    stream = RecordingStream()
+    result = pool.get("stub").explain_pyspark("df.show()", stream=stream)
+
+    assert stream.chunks == CHUNKS
+    assert result["explanation"] == "".join(CHUNKS)
+    assert result["ttft_ms"] is not None
+
+
+def test_rate_limited_model_is_tried_last(pool):
+    limited = pool.get("limited")
+    with pytest.raises(LLMRateLimitError):
+        limited.explain_pyspark("df.show()")
+
+    assert not limited.healthy
+    assert [c.model_name for c in pool.clients(["limited", "stub"])] == ["stub", "limited"]
+
+
+def test_repeated_failures_make_a_model_unhealthy(pool):
+    broken = pool.get("broken")
+    result = broken.explain_pyspark("df.show()")
+    assert "error" in result
+    assert broken.healthy
+
+    broken.explain_pyspark("df.show()")
+    assert not broken.healthy
+    assert pool.health()["broken"]["consecutive_failures"] == 2
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_health_is_exported_as_metrics(pool):
+    calls = sample("llm_calls_total", model="broken")
+    failures = sample("llm_failures_total", model="broken", reason="error")
+    limited = sample("llm_failures_total", model="limited", reason="rate_limited")
+
+    for _ in range(2):
+        pool.get("broken").explain_pyspark("df.show()")
+    with pytest.raises(LLMRateLimitError):
+        pool.get("limited").explain_pyspark("df.show()")
+    pool.get("stub").explain_pyspark("df.show()")
+
+    assert sample("llm_calls_total", model="broken") == calls + 2
+    assert sample("llm_failures_total", model="broken", reason="error") == failures + 2
+    assert sample("llm_failures_total", model="limited", reason="rate_limited") == limited + 1
+    assert sample("llm_client_unhealthy_until_seconds", model="broken") > time.time()
+    assert sample("llm_client_unhealthy_until_seconds", model="stub") == 0
+
+
+def test_counters_are_thread_safe(pool):
+    client = pool.get("stub")
+
+    def record():
+        for _ in range(1000):
+            client._record_call()
+            client._record_failure("error")
+
+    threads = [threading.Thread(target=record) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    health = pool.health()["stub"]
+    assert health["calls"] == health["failures"] == health["consecutive_failures"] == 8000
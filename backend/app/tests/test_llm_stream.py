@@ -0,0 +1,73 @@
+import asyncio
+import json
+
+from app.config import LLM_STREAM_TTL
+from app.services.jobs import update_job
+from app.services.llm_stream import ExplanationStream, aread_explanation, explanation_stream_key
+
+
+def read(job_id, after="-"):
+    return asyncio.run(aread_explanation(job_id, after))
+
+
+def parse_sse(text):
+    events = []
+    for block in text.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if not line.startswith(":"))
+        if "event" in fields:
+            events.append((fields.get("id"), fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def test_stream_entries_in_order(fake_redis):
+    stream = ExplanationStream("job-1")
+    stream.write("Hello ")
+    stream.write("")  # empty chunks are skipped
+    stream.write("world")
+
+    entries = read("job-1")
+    assert [entry for _, entry in entries] == [{"text": "Hello "}, {"text": "world"}]
+    # Reading after an id excludes it
+    assert read("job-1", after=entries[0][0]) == entries[1:]
+    assert read("job-1", after=entries[1][0]) == []
+
+
+def test_reset_only_after_text(fake_redis):
+    stream = ExplanationStream("job-2")
+    stream.reset()
+    stream.write("draft")
+    stream.reset()
+    stream.reset()
+    stream.write("final")
+
+    assert [entry for _, entry in read("job-2")] == [{"text": "draft"}, {"reset": "1"}, {"text": "final"}]
+
+
+def test_close_shortens_ttl(fake_redis):
+    stream = ExplanationStream("job-3")
+    stream.close()
+    assert not fake_redis.exists(explanation_stream_key("job-3"))
+
+    stream.write("text")
+    stream.close()
+    assert 0 < fake_redis.ttl(explanation_stream_key("job-3")) <= LLM_STREAM_TTL
+
+
+def test_events_resume_after_last_event_id(client):
+    stream = ExplanationStream("job-4")
+    for chunk in ("one ", "two ", "three"):
+        stream.write(chunk)
+    update_job("job-4", {"status": "finished"})
+
+    events = parse_sse(client.get("/jobs/job-4/events").text)
+    chunks = [(event_id, data["text"]) for event_id, event, data in events if event == "explanation"]
+    assert [text for _, text in chunks] == ["one ", "two ", "three"]
+    assert events[-1][1] == "finished"
+
+    # A reconnect only gets the chunks after the last one received
+    resumed = parse_sse(client.get("/jobs/job-4/events", headers={"Last-Event-ID": chunks[0][0]}).text)
+    assert [data["text"] for _, event, data in resumed if event == "explanation"] == ["two ", "three"]
+
+    # A malformed id is ignored rather than passed to XRANGE
+    replayed = parse_sse(client.get("/jobs/job-4/events", headers={"Last-Event-ID": "bogus"}).text)
+    assert [data["text"] for _, event, data in replayed if event == "explanation"] == ["one ", "two ", "three"]
@@ -0,0 +1,39 @@
+import time
+
+from app.services.local_cache import LocalResultCache, MISS
+
+
+def test_lru_eviction_by_entries_and_bytes():
+    cache = LocalResultCache(max_entries=2, max_bytes=100, ttl=60)
+    cache.put("a", {"v": 1}, size=10)
+    cache.put("b", {"v": 2}, size=10)
+    assert cache.get("a") == {"v": 1}  # "b" is now least recently used
+
+    assert cache.put("c", {"v": 3}, size=10) == 1
+    assert cache.get("b") is MISS
+    assert cache.get("a") == {"v": 1}
+
+    assert cache.put("d", {"v": 4}, size=95) == 2
+    assert len(cache) == 1 and cache.bytes == 95
+    assert cache.put("huge", {}, size=101) == 0
+    assert cache.get("huge") is MISS
+
+
+def test_ttl_expiry():
+    cache = LocalResultCache(max_entries=10, max_bytes=100, ttl=0.01)
+    cache.put("a", 1, size=1)
+    time.sleep(0.02)
+    assert cache.get("a") is MISS
+    assert cache.bytes == 0
+
+
+def test_invalidation_during_read_is_not_cached():
+    cache = LocalResultCache(max_entries=10, max_bytes=100, ttl=60)
+    cache.put("job", {"status": "running"}, size=20)
+
+    sequence = cache.sequence
+    cache.invalidate("job")  # job record rewritten while a reader was fetching it
+    cache.put("job", {"status": "running"}, size=20, seen_sequence=sequence)
+
+    assert cache.get("job") is MISS
+    assert cache.bytes == 0
@@ -0,0 +1,122 @@
+import asyncio
+import hashlib
+from types import SimpleNamespace
+
+import pytest
+
+from app import rate_limit
+from app.rate_limit import LocalBlocklist, client_id
+
+
+def make_request(host="10.0.0.1", api_key=None):
+    headers = {"x-api-key": api_key} if api_key is not None else {}
+    return SimpleNamespace(headers=headers, client=SimpleNamespace(host=host))
+
+
+def key_hash(api_key):
+    return hashlib.blake2b(api_key.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def test_client_id_uses_configured_api_key():
+    known = frozenset({key_hash("good-key")})
+
+    assert client_id(make_request(api_key="good-key"), known) == f"key:{key_hash('good-key')}"
+    assert "good-key" not in client_id(make_request(api_key="good-key"), known)
+
+
+def test_client_id_falls_back_to_ip_for_unknown_keys():
+    known = frozenset({key_hash("good-key")})
+
+    assert client_id(make_request(), known) == "ip:10.0.0.1"
+    assert client_id(make_request(api_key=""), known) == "ip:10.0.0.1"
+    # Rotating made-up keys must not hand out fresh buckets
+    assert {client_id(make_request(api_key=f"forged-{i}"), known) for i in range(5)} == {"ip:10.0.0.1"}
+    assert client_id(make_request(api_key="good-key"), frozenset()) == "ip:10.0.0.1"
+
+
+def test_blocklist_expires(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(rate_limit.time, "monotonic", lambda: now[0])
+    blocklist = LocalBlocklist()
+
+    assert blocklist.retry_after("a") == 0.0
+    blocklist.block("a", 5)
+    assert blocklist.retry_after("a") == 5.0
+
+    now[0] += 5
+    assert blocklist.retry_after("a") == 0.0
+    assert "a" not in blocklist._until
+
+
+def test_blocklist_drops_oldest_first():
+    blocklist = LocalBlocklist(max_entries=2)
+    blocklist.block("a", 60)
+    blocklist.block("b", 60)
+    blocklist.block("a", 60)  # re-blocking refreshes its position
+    blocklist.block("c", 60)
+
+    assert blocklist.retry_after("b") == 0.0
+    assert blocklist.retry_after("a") > 0
+    assert blocklist.retry_after("c") > 0
+
+
+def test_token_bucket_allows_capacity_then_rejects(fake_redis):
+    pytest.importorskip("lupa")
+    script = fake_redis.register_script(rate_limit.TOKEN_BUCKET_LUA)
+
+    results = [script(keys=["rate:test"], args=[3, 60]) for _ in range(4)]
+
+    assert [allowed for allowed, _, _ in results] == [1, 1, 1, 0]
+    assert [remaining for _, remaining, _ in results[:3]] == [2, 1, 0]
+    # One token refills every window / capacity seconds
+    assert 0 < results[3][2] <= 20_000
+    assert 0 < fake_redis.pttl("rate:test") <= 60_000
+
+
+def test_token_bucket_refills_over_time(fake_redis):
+    pytest.importorskip("lupa")
+    script = fake_redis.register_script(rate_limit.TOKEN_BUCKET_LUA)
+
+    assert script(keys=["rate:test"], args=[1, 60])[0] == 1
+    assert script(keys=["rate:test"], args=[1, 60])[0] == 0
+    # Pretend the last request was a full window ago
+    fake_redis.hset("rate:test", "ts", int(fake_redis.hget("rate:test", "ts")) - 60_000)
+    assert script(keys=["rate:test"], args=[1, 60])[0] == 1
+
+
+def test_rate_limit_rejects_locally_once_blocked(fake_redis, monkeypatch):
+    pytest.importorskip("lupa")
+    monkeypatch.setattr(rate_limit, "BLOCKLIST", LocalBlocklist())
+    monkeypatch.setitem(rate_limit.RATE_LIMITS, "/limited", (1, 60))
+    request = make_request()
+    request.scope = {"route": SimpleNamespace(path="/limited")}
+    calls = []
+    bucket = rate_limit.token_bucket
+
+    async def counting_bucket(**kwargs):
+        calls.append(kwargs["keys"])
+        return await bucket(**kwargs)
+
+    monkeypatch.setattr(rate_limit, "token_bucket", counting_bucket)
+
+    asyncio.run(rate_limit.rate_limit(request))
+    for _ in range(2):
+        with pytest.raises(rate_limit.HTTPException) as exc:
+            asyncio.run(rate_limit.rate_limit(request))
+        assert exc.value.status_code == 429
+        assert int(exc.value.headers["Retry-After"]) >= 1
+
+    # The second rejection was answered from the blocklist
+    assert calls == [["rate:/limited:ip:10.0.0.1"]] * 2
+
+
+def test_rate_limit_can_be_switched_off(monkeypatch):
+    async def unreachable(**kwargs):
+        raise AssertionError("Redis consulted")
+
+    monkeypatch.setattr(rate_limit.settings, "rate_limit_enabled", False)
+    monkeypatch.setattr(rate_limit, "token_bucket", unreachable)
+    request = make_request()
+    request.scope = {}
+
+    assert asyncio.run(rate_limit.rate_limit(request)) is None
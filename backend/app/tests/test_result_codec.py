@@ -0,0 +1,52 @@
+import json
+
+import msgpack
+import pytest
+
+from app.services.codec import FORMAT_MSGPACK, MAGIC, ResultCodec
+
+RESULT = {
+    "dag_dot": "digraph {\n" + "  a -> b;\n" * 500 + "}",
+    "stages": [{"stage_id": 1, "nodes": ["df_read_1", "df_filter_2"]}],
+    "antipatterns": {"json": [], "markdown": "No anti-patterns found."},
+    "cached": False,
+    "job_duration_ms": None,
+}
+
+
+@pytest.mark.parametrize("compression", [None, "zlib", "zstd"])
+def test_round_trip(compression):
+    codec = ResultCodec(compression=compression, compress_min_bytes=1024)
+    encoded = codec.encode(RESULT)
+
+    assert encoded.startswith(MAGIC)
+    assert ResultCodec.decode(encoded) == RESULT
+    if compression:
+        assert len(encoded) < len(json.dumps(RESULT)) / 5
+
+
+@pytest.mark.parametrize("compression", [None, "zstd"])
+def test_decoded_size_is_uncompressed(compression):
+    encoded = ResultCodec(compression=compression, compress_min_bytes=1024).encode(RESULT)
+    value, size = ResultCodec.decode_sized(encoded)
+
+    assert value == RESULT
+    assert size == len(msgpack.packb(RESULT, use_bin_type=True))
+
+
+def test_small_values_are_not_compressed():
+    encoded = ResultCodec(compression="zstd", compress_min_bytes=1024).encode({"status": "running"})
+
+    assert encoded[len(MAGIC)] == FORMAT_MSGPACK
+
+
+def test_legacy_json_entries_still_decode():
+    legacy = json.dumps(RESULT)
+
+    assert ResultCodec.decode(legacy) == RESULT
+    assert ResultCodec.decode(legacy.encode("utf-8")) == RESULT
+
+
+def test_unknown_format_is_rejected():
+    with pytest.raises(ValueError):
+        ResultCodec.decode(MAGIC + b"\x7f" + b"payload")
@@ -0,0 +1,199 @@
+import asyncio
+import threading
+import time
+
+from app.config import CACHE_TTL
+from app.services import single_flight
+from app.services.cache import binary_redis_client, set_result
+from app.api import routes
+from app.services.jobs import artifact_etag, stage_artifacts, update_job
+
+
+def seed_cached_result(cache_key, artifacts):
+    pipe = binary_redis_client.pipeline()
+    refs = stage_artifacts(pipe, artifacts)
+    pipe.execute()
+    set_result(cache_key, {"artifacts": refs})
+    return refs
+
+
+def test_job_artifacts_are_immutable(client):
+    refs = update_job("job-1", {"status": "finished"}, artifacts={"dag_dot": "digraph {}"})
+
+    response = client.get("/jobs/job-1/artifacts/dag_dot")
+
+    assert response.status_code == 200
+    assert response.json() == "digraph {}"
+    assert response.headers["ETag"] == artifact_etag(refs["dag_dot"])
+    assert response.headers["Cache-Control"] == f"private, max-age={CACHE_TTL}, immutable"
+
+
+def test_cache_hit_artifacts_are_revalidated(client):
+    refs = seed_cached_result("artifact-test-key", {"llm": {"explanation": "cached"}})
+
+    response = client.get("/jobs/cached:artifact-test-key/artifacts/llm")
+    assert response.status_code == 200
+    assert response.json() == {"explanation": "cached"}
+    assert response.headers["Cache-Control"] == "private, no-cache"
+
+    etag = artifact_etag(refs["llm"])
+    response = client.get(
+        "/jobs/cached:artifact-test-key/artifacts/llm", headers={"If-None-Match": etag}
+    )
+    assert response.status_code == 304
+    assert response.headers["Cache-Control"] == "private, no-cache"
+
+
+def test_missing_artifact(client):
+    update_job("job-2", {"status": "running"})
+
+    assert client.get("/jobs/job-2/artifacts/llm").status_code == 404
+    assert client.get("/jobs/cached:expired-key/artifacts/llm").status_code == 404
+
+
+def post_status_batch(client, job_ids, **options):
+    response = client.post("/status/batch", json={"job_ids": job_ids, **options})
+    assert response.status_code == 200
+    return response.json()["jobs"]
+
+
+def test_status_batch_projects_fields(client):
+    update_job("job-a", {"status": "running"})
+    update_job("job-b", {"status": "finished", "job_duration_ms": 12}, artifacts={"dag_dot": "digraph {}"})
+
+    jobs = post_status_batch(client, ["job-a", "job-b", "job-a"])
+    assert jobs == [
+        {"job_id": "job-a", "status": "running", "version": 1, "job_duration_ms": None, "cached": False},
+        {"job_id": "job-b", "status": "finished", "version": 1, "job_duration_ms": 12, "cached": False},
+    ]
+
+    jobs = post_status_batch(client, ["job-b", "job-missing"], fields=["status", "artifacts"])
+    assert jobs[0] == {
+        "job_id": "job-b",
+        "status": "finished",
+        "artifacts": {"dag_dot": {"size": jobs[0]["artifacts"]["dag_dot"]["size"], "url": "/jobs/job-b/artifacts/dag_dot"}},
+    }
+    assert jobs[1] == {"job_id": "job-missing", "status": "pending", "artifacts": {}}
+
+    response = client.post("/status/batch", json={"job_ids": ["job-a"], "fields": ["secret"]})
+    assert response.status_code == 400
+
+
+def test_status_batch_cached_ids(client):
+    seed_cached_result("batch-test-key", {"llm": {"explanation": "cached"}})
+
+    jobs = post_status_batch(
+        client, ["cached:batch-test-key", "cached:expired-key"], fields=["status", "cached"]
+    )
+    assert jobs == [
+        {"job_id": "cached:batch-test-key", "status": "finished", "cached": True},
+        {"job_id": "cached:expired-key", "status": "expired"},
+    ]
+
+    [job] = post_status_batch(client, ["cached:batch-test-key"], fields=["status"], include_result=True)
+    assert job["result"]["llm"] == {"explanation": "cached"}
+
+
+def test_status_batch_coalesced_ids(client):
+    # Enough owners that a mismatched owner order would show
+    owners = [f"owner-{i}" for i in range(8)]
+    for i, owner in enumerate(owners):
+        update_job(owner, {"status": "finished", "job_duration_ms": i})
+    aliases = {f"alias-{i}": owners[(i * 3) % len(owners)] for i in range(12)}
+    for alias, owner in aliases.items():
+        asyncio.run(single_flight.attach(alias, owner))
+
+    for fields in (["status", "job_duration_ms"], ["status", "artifacts"]):
+        jobs = post_status_batch(client, list(aliases), fields=fields)
+        assert [job["job_id"] for job in jobs] == list(aliases)
+        if "job_duration_ms" in fields:
+            assert [job["job_duration_ms"] for job in jobs] == [
+                owners.index(owner) for owner in aliases.values()
+            ]
+        assert {job["status"] for job in jobs} == {"finished"}
+
+
+def long_poll(client, job_id, since, wait=5, **params):
+    started = time.monotonic()
+    response = client.get(f"/status/{job_id}", params={"since": since, "wait": wait, **params})
+    assert response.status_code == 200
+    return response.json(), time.monotonic() - started
+
+
+def update_later(job_id, fields, delay=0.3):
+    """
+    update_job from another thread, as a worker would, after `delay`.
+    """
+    timer = threading.Timer(delay, update_job, (job_id, fields))
+    timer.start()
+    return timer
+
+
+def test_long_poll_wakes_on_update(client):
+    update_job("poll-1", {"status": "running"})
+    version = client.get("/status/poll-1").json()["version"]
+
+    timer = update_later("poll-1", {"status": "analysis_complete"})
+    body, elapsed = long_poll(client, "poll-1", version)
+    timer.join()
+
+    assert body["status"] == "analysis_complete"
+    assert body["version"] == version + 1
+    assert elapsed < 4
+
+
+def test_long_poll_times_out_unchanged(client):
+    update_job("poll-2", {"status": "running"})
+    version = client.get("/status/poll-2").json()["version"]
+
+    body, elapsed = long_poll(client, "poll-2", version, wait=0.5)
+
+    assert body["version"] == version
+    assert body["status"] == "running"
+    assert elapsed >= 0.5
+
+
+def test_long_poll_returns_immediately(client):
+    update_job("poll-3", {"status": "finished"})
+    update_job("poll-4", {"status": "running"})
+    finished = client.get("/status/poll-3").json()["version"]
+    running = client.get("/status/poll-4").json()["version"]
+
+    # Terminal job, even at the version already seen
+    body, elapsed = long_poll(client, "poll-3", finished)
+    assert body["status"] == "finished" and elapsed < 1
+    # The client is behind
+    body, elapsed = long_poll(client, "poll-4", running - 1)
+    assert body["version"] == running and elapsed < 1
+
+
+def test_long_poll_of_coalesced_job_follows_owner(client):
+    update_job("poll-owner", {"status": "running"})
+    # On the app's loop: the async client's connections are bound to one
+    client.portal.call(single_flight.attach, "poll-alias", "poll-owner")
+    version = client.get("/status/poll-alias").json()["version"]
+
+    timer = update_later("poll-owner", {"status": "finished"})
+    body, elapsed = long_poll(client, "poll-alias", version)
+    timer.join()
+
+    assert body["job_id"] == "poll-alias"
+    assert body["status"] == "finished"
+    assert elapsed < 4
+
+
+def test_long_poll_resolves_the_record_it_read(client, monkeypatch):
+    update_job("poll-5", {"status": "finished"}, artifacts={"dag_dot": "digraph {}"})
+    version = client.get("/status/poll-5").json()["version"]
+    reads = []
+    job_record = routes._job_record
+
+    async def counting_job_record(job_id):
+        reads.append(job_id)
+        return await job_record(job_id)
+
+    monkeypatch.setattr(routes, "_job_record", counting_job_record)
+    body, _ = long_poll(client, "poll-5", version, resolve=True)
+
+    assert body["result"]["analysis"] == {"dag_dot": "digraph {}"}
+    assert reads == ["poll-5"]
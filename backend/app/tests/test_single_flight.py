@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+
+from app.api import routes
+from app.config import INFLIGHT_LOCK_TTL
+from app.services import single_flight
+from app.services.jobs import ALIAS_FIELD, aget_job, job_key
+
+BIG_SCRIPT = "\n".join(f"df{i} = df.filter('v > {i}')" for i in range(300)) + "\n"
+
+
+def test_first_claim_wins(fake_redis):
+    assert asyncio.run(single_flight.claim("key", "job-1")) is None
+    assert asyncio.run(single_flight.claim("key", "job-2")) == "job-1"
+
+    assert fake_redis.get("inflight:key") == "job-1"
+    assert 0 < fake_redis.ttl("inflight:key") <= INFLIGHT_LOCK_TTL
+
+
+def test_attach_writes_alias_record(fake_redis):
+    asyncio.run(single_flight.attach("job-2", "job-1"))
+
+    record = asyncio.run(aget_job("job-2"))
+    assert (record["job_id"], record[ALIAS_FIELD]) == ("job-2", "job-1")
+    assert fake_redis.ttl(job_key("job-2")) > 0
+
+
+def test_release_only_by_owner(fake_redis):
+    pytest.importorskip("lupa")
+    asyncio.run(single_flight.claim("key", "job-1"))
+
+    assert not single_flight.release("key", "job-2")
+    assert fake_redis.get("inflight:key") == "job-1"
+    assert single_flight.release("key", "job-1")
+    assert fake_redis.get("inflight:key") is None
+    assert asyncio.run(single_flight.claim("key", "job-3")) is None
+
+
+def test_identical_requests_coalesce(client, monkeypatch):
+    enqueued = []
+    monkeypatch.setattr(routes, "enqueue_explain", lambda job_id, *args: enqueued.append(job_id))
+
+    first = client.post("/explain/pyspark", json={"code": BIG_SCRIPT}).json()
+    second = client.post("/explain/pyspark", json={"code": BIG_SCRIPT}).json()
+
+    assert enqueued == [first["job_id"]]
+    assert second["status"] == "pending"
+    assert asyncio.run(aget_job(second["job_id"]))[ALIAS_FIELD] == first["job_id"]
+
+
+def test_failed_enqueue_releases_claim(client, fake_redis, monkeypatch):
+    pytest.importorskip("lupa")
+
+    def broker_down(*args):
+        raise ConnectionError("broker unreachable")
+
+    monkeypatch.setattr(routes, "enqueue_explain", broker_down)
+    with pytest.raises(ConnectionError):
+        client.post("/explain/pyspark", json={"code": BIG_SCRIPT})
+    assert fake_redis.keys("inflight:*") == []
+
+    # The next identical request owns the computation, not an alias
+    enqueued = []
+    monkeypatch.setattr(routes, "enqueue_explain", lambda job_id, *args: enqueued.append(job_id))
+    body = client.post("/explain/pyspark", json={"code": BIG_SCRIPT}).json()
+    assert enqueued == [body["job_id"]]
@@ -0,0 +1,56 @@
+import ast
+
+import pytest
+
+from app.parsers.fused_parser import parse_to_graphs
+from app.graphs.operation.compact_dag import CompactOperationDAG
+from app.graphs.operation.stage_assignment import (
+    DAGCycleError,
+    assign_stages_levels,
+    assign_stages,
+    topological_levels,
+)
+from app.benchmarks.synthetic import generate_etl_script
+
+CODE = """
+df_base = df.select("user_id", "value").filter("value > 10")
+df_rep = df_base.repartition(200)
+df_grouped = df_rep.groupBy("user_id").count()
+df_joined = df_grouped.join(df_base, on="user_id").distinct()
+df_joined.collect()
+"""
+
+
+def stages(code, strategy, dag=None):
+    dag, _ = parse_to_graphs(ast.parse(code), dag)
+    assign_stages(dag, strategy=strategy)
+    return {node_id: node.stage_id for node_id, node in dag.nodes.items()}
+
+
+@pytest.mark.parametrize("code", [CODE, generate_etl_script(300)])
+def test_levels_strategy_matches_queue(code):
+    assert stages(code, "levels") == stages(code, "queue")
+    assert stages(code, "levels", CompactOperationDAG()) == stages(code, "queue")
+
+
+def test_topological_levels_order_parents_first():
+    dag, _ = parse_to_graphs(ast.parse(CODE))
+    levels, unordered = topological_levels(dag)
+
+    position = {n: i for i, level in enumerate(levels) for n in level}
+    assert unordered == []
+    for node_id, node in dag.nodes.items():
+        for parent in node.parents:
+            assert position[parent] < position[node_id]
+
+
+def test_cycle_is_detected():
+    # A standalone action on a never-assigned DataFrame wires to itself
+    code = "df.show()\n"
+
+    assert stages(code, "levels") == {"df_show_1": None}
+
+    dag, _ = parse_to_graphs(ast.parse(code))
+    with pytest.raises(DAGCycleError) as exc:
+        assign_stages_levels(dag, strict=True)
+    assert exc.value.node_ids == ["df_show_1"]
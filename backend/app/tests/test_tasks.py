@@ -0,0 +1,128 @@
+import asyncio
+
+import pytest
+
+from app.config import ARTIFACT_TTL, CACHE_TTL
+from app.services import single_flight
+from app.services.cache import get_result
+from app.services.dag_pipeline import ARTIFACT_NAMES
+from app.services.jobs import aget_job, job_key, update_job
+from app.workers import tasks
+from app.workers.tasks import analyze_code_task, complete_with_llm, enqueue_explain, explain_llm_task
+
+CODE = 'df = spark.read.csv("x")\ndf2 = df.filter("a > 1")\ndf2.show()\n'
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    monkeypatch.setattr(tasks, "llm_explanation", lambda code, structure, stream: {"explanation": "text"})
+
+
+@pytest.fixture
+def released(monkeypatch):
+    calls = []
+    monkeypatch.setattr(single_flight, "release", lambda cache_key, job_id: calls.append((cache_key, job_id)))
+    return calls
+
+
+def no_llm(code, structure, stream):
+    raise AssertionError("LLM called")
+
+
+def status(job_id):
+    return asyncio.run(aget_job(job_id))["status"]
+
+
+def stage_analysis(job_id):
+    return update_job(job_id, {"status": "analysis_complete"}, artifacts={"dag_dot": "digraph {}"})
+
+
+def test_late_llm_finish_refreshes_analysis_artifacts(fake_redis, llm):
+    refs = stage_analysis("job-late")
+    # The analysis ended long ago: its artifacts are about to expire
+    fake_redis.expire(refs["dag_dot"]["key"], 5)
+
+    complete_with_llm("job-late", "code", "late-key", refs, None, 0)
+
+    artifact_ttl = fake_redis.ttl(refs["dag_dot"]["key"])
+    assert artifact_ttl > CACHE_TTL >= fake_redis.ttl("late-key")
+    assert artifact_ttl > fake_redis.ttl(job_key("job-late"))
+    assert ARTIFACT_TTL >= artifact_ttl
+    assert set(get_result("late-key", local=False)["artifacts"]) == {"dag_dot", "llm"}
+
+
+def test_expired_analysis_is_not_cached(fake_redis, llm):
+    refs = stage_analysis("job-expired")
+    fake_redis.delete(refs["dag_dot"]["key"])
+
+    complete_with_llm("job-expired", "code", "expired-key", refs, None, 0)
+
+    # A manifest would turn resubmissions into cache hits with 404 artifacts
+    assert not fake_redis.exists("expired-key")
+    assert asyncio.run(aget_job("job-expired"))["status"] == "finished"
+
+
+def test_analysis_hands_off_to_llm_step(fake_redis, llm, released):
+    handoff = analyze_code_task("job-chain", CODE, "chain-key")
+
+    assert handoff["job_id"] == "job-chain"
+    assert handoff["status"] == "analysis_complete"
+    assert set(handoff["refs"]) == set(ARTIFACT_NAMES)
+    assert status("job-chain") == "analysis_complete"
+    assert released == []
+
+    result = explain_llm_task(handoff, code=CODE, cache_key="chain-key")
+
+    assert result["status"] == "finished"
+    assert status("job-chain") == "finished"
+    assert set(get_result("chain-key", local=False)["artifacts"]) == {*ARTIFACT_NAMES, "llm"}
+    assert released == [("chain-key", "job-chain")]
+
+
+def test_failed_analysis_passes_through_llm_step(fake_redis, monkeypatch, released):
+    def broken_pipeline(code, **options):
+        raise ValueError("unparsable")
+
+    monkeypatch.setattr(tasks, "run_dag_pipeline", broken_pipeline)
+    monkeypatch.setattr(tasks, "llm_explanation", no_llm)
+
+    handoff = analyze_code_task("job-broken", CODE, "broken-key")
+    assert handoff["status"] == "failed"
+
+    assert explain_llm_task(handoff, code=CODE, cache_key="broken-key") == handoff
+    assert status("job-broken") == "failed"
+    # The claim is released, so a resubmission runs again
+    assert released == [("broken-key", "job-broken")]
+
+
+def test_subset_request_keeps_the_claim(fake_redis, llm, released):
+    artifacts = ["dag_dot", "llm"]
+    handoff = analyze_code_task("job-subset", CODE, "subset-key", artifacts=artifacts)
+    assert set(handoff["refs"]) == {"dag_dot"}
+
+    result = explain_llm_task(handoff, code=CODE, cache_key="subset-key", artifacts=artifacts)
+
+    assert result["status"] == "finished"
+    # Subset requests never claim single-flight, nor fill the cache
+    assert released == []
+    assert get_result("subset-key", local=False) is None
+
+
+def test_analysis_only_request_finishes_without_llm(fake_redis, monkeypatch, released):
+    monkeypatch.setattr(tasks, "llm_explanation", no_llm)
+
+    result = analyze_code_task("job-ci", CODE, "ci-key", artifacts=["dag_dot"])
+
+    assert result["status"] == "finished"
+    record = asyncio.run(aget_job("job-ci"))
+    assert record["status"] == "finished"
+    assert set(record["artifacts"]) == {"dag_dot"}
+    assert released == []
+
+
+def test_chain_runs_both_steps(fake_redis, llm, released, monkeypatch):
+    monkeypatch.setattr(tasks.celery.conf, "task_always_eager", True)
+
+    assert enqueue_explain("job-eager", CODE, "eager-key").get()["status"] == "finished"
+    assert set(get_result("eager-key", local=False)["artifacts"]) == {*ARTIFACT_NAMES, "llm"}
+    assert released == [("eager-key", "job-eager")]
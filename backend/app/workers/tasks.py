@@ -1,12 +1,39 @@
 # backend/app/tasks.py
 import time
-from celery import Celery
+from celery import Celery, chain
+from celery.signals import before_task_publish, task_postrun, task_prerun, worker_ready
 from celery.utils.log import get_task_logger
+from prometheus_client import start_http_server
 
-from ..config import settings, CACHE_TTL
+from ..config import (
+    settings,
+    CACHE_TTL,
+    STATEMENT_CACHE_TTL,
+    STRUCTURAL_LLM_REUSE,
+    LLM_STREAMING,
+    ANTIPATTERN_RULE_BUDGET_MS,
+    ANTIPATTERN_JOB_BUDGET_MS,
+    ANTIPATTERN_BREAKER_THRESHOLD,
+    ANTIPATTERN_BREAKER_COOLDOWN,
+)
+from ..graphs.antipatterns.budget import RuleBudget
+from ..metrics import (
+    metrics_registry,
+    record_queue_wait_time,
+    record_task_time,
+    LLM_STRUCTURE_REUSE,
+)
 from ..services.llm import explain_with_fallback
-from ..services.cache import set_result
+from ..services.llm_stream import ExplanationStream
+from ..services.cache import set_result, get_result, redis_client, RedisJSONStore
+from ..services.jobs import KIND_EXPLAIN, LLM_ARTIFACT, refresh_artifacts, update_job
 from ..services.dag_pipeline import run_dag_pipeline
+from ..services import single_flight
+from ..services.batch import run_batch
+from ..services.structural_cache import (
+    llm_structure_cache_key,
+    remap_structural_explanation,
+)
 
 logger = get_task_logger(__name__)
 
@@ -16,121 +43,414 @@ celery = Celery(
     backend=settings.redis_url,
 )
 
+# Explain jobs are a chain across two queues, each with its own workers:
+# CPU-bound analysis (prefork, one process per CPU) and the network-bound
+# LLM call (many threads). Batches fan out to a process pool, which
+# Celery's (daemonic) prefork children cannot do: they go to their own
+# queue, served by a solo-pool worker.
+ANALYSIS_QUEUE = "analysis"
+LLM_QUEUE = "llm"
+BATCH_QUEUE = "batch"
+QUEUES = (ANALYSIS_QUEUE, LLM_QUEUE, BATCH_QUEUE)
+
+celery.conf.task_routes = {
+    "app.workers.tasks.analyze_code_task": {"queue": ANALYSIS_QUEUE},
+    "app.workers.tasks.explain_llm_task": {"queue": LLM_QUEUE},
+    "app.workers.tasks.analyze_batch_task": {"queue": BATCH_QUEUE},
+}
+
+RULE_BUDGET = RuleBudget(
+    rule_ms=ANTIPATTERN_RULE_BUDGET_MS,
+    job_ms=ANTIPATTERN_JOB_BUDGET_MS,
+    breaker_threshold=ANTIPATTERN_BREAKER_THRESHOLD,
+    breaker_cooldown_s=ANTIPATTERN_BREAKER_COOLDOWN,
+)
+
+# run_dag_pipeline options shared by every analysis (tasks and inline)
+PIPELINE_OPTIONS = {
+    "dag_backend": settings.dag_backend,
+    "stage_strategy": settings.stage_strategy,
+    "rule_budget": RULE_BUDGET,
+}
+
+
+@worker_ready.connect
+def start_metrics_server(**kwargs):
+    # Pool processes write to PROMETHEUS_MULTIPROC_DIR, the main process serves them
+    start_http_server(settings.worker_metrics_port, registry=metrics_registry())
+
+
+# --- Per-queue latency: time waiting in the queue, then running ---
+_task_started: dict = {}
+
+
+@before_task_publish.connect
+def stamp_enqueued_at(headers=None, **kwargs):
+    headers["enqueued_at"] = time.time()
+
+
+@task_prerun.connect
+def record_queue_wait(task_id=None, task=None, **kwargs):
+    enqueued_at = getattr(task.request, "enqueued_at", None)
+    if enqueued_at is not None:
+        record_queue_wait_time(_task_queue(task), time.time() - enqueued_at)
+    _task_started[task_id] = time.perf_counter()
+
+
+@task_postrun.connect
+def record_task_run(task_id=None, task=None, **kwargs):
+    started = _task_started.pop(task_id, None)
+    if started is not None:
+        record_task_time(_task_queue(task), task.name, time.perf_counter() - started)
+
+
+def _task_queue(task) -> str:
+    return (task.request.delivery_info or {}).get("routing_key") or "unknown"
+
+
+def llm_explanation(code: str, structure, stream=None) -> dict:
+    """
+    LLM explanation of `code`, re-mapped from a structurally identical
+    script when STRUCTURAL_LLM_REUSE allows it. A generated one is
+    streamed to `stream` (services.llm_stream) if given.
+    """
+    llm_result = None
+    if STRUCTURAL_LLM_REUSE and structure:
+        llm_struct_key = llm_structure_cache_key(structure["fingerprint"])
+        entry = get_result(llm_struct_key)
+        if entry:
+            llm_result = remap_structural_explanation(entry, structure["dataframes"])
+            if llm_result is not None:
+                LLM_STRUCTURE_REUSE.inc()
+
+    if llm_result is None:
+        llm_result = explain_with_fallback(code, stream=stream)
+
+        # Cache only successful LLM outputs
+        if "explanation" in llm_result and STRUCTURAL_LLM_REUSE and structure:
+            set_result(
+                llm_struct_key,
+                {"llm": llm_result, "dataframes": structure["dataframes"]},
+                ttl=CACHE_TTL,
+            )
+    return llm_result
+
+
+def wants_llm(artifacts) -> bool:
+    return artifacts is None or LLM_ARTIFACT in artifacts
+
+
+def finish_job(job_id: str, started_at_ms: int, status: str, fields=None, artifacts=None):
+    """
+    Final update of a job record. Returns (artifact refs, job duration in ms).
+    """
+    finished_at_ms = int(time.time() * 1000)
+    fields = {
+        "status": status,
+        "finished_at": finished_at_ms,
+        "job_duration_ms": finished_at_ms - started_at_ms,
+        **(fields or {}),
+    }
+    return update_job(job_id, fields, artifacts), fields["job_duration_ms"]
+
+
+def analysis_handoff(job_id: str, refs: dict, structure, started_at_ms: int) -> dict:
+    """
+    What the LLM step needs from an analyzed job: the analysis task's
+    return value (passed along the chain), or built by the API for
+    inline analyses.
+    """
+    return {
+        "job_id": job_id,
+        "status": "analysis_complete",
+        "refs": refs,
+        "structure": structure,
+        "started_at_ms": started_at_ms,
+    }
+
+
+def complete_with_llm(job_id, code, cache_key, refs, structure, started_at_ms, artifacts=None) -> int:
+    """
+    LLM step of an explain job whose analysis artifacts (`refs`) are
+    stored; finishes the job and returns its duration.
+    """
+    stream = ExplanationStream(job_id) if LLM_STREAMING else None
+    try:
+        llm_result = llm_explanation(code, structure, stream)
+    finally:
+        if stream is not None:
+            stream.close()
+    # The analysis artifacts got their TTL when the analysis ended, which
+    # may be long ago (LLM queue backlog, fallback retries): the record and
+    # manifest written now must not outlive them
+    analysis_stored = refresh_artifacts(refs)
+    llm_refs, job_duration_ms = finish_job(
+        job_id, started_at_ms, "finished", artifacts={LLM_ARTIFACT: llm_result}
+    )
+    if "explanation" in llm_result and artifacts is None and analysis_stored:
+        # Cache hits are served from the same artifacts; a subset would
+        # not do, so only full requests fill the cache
+        set_result(cache_key, {"artifacts": {**refs, **llm_refs}}, ttl=CACHE_TTL)
+    return job_duration_ms
+
+
+def _job_payload(job_id: str, status: str, job_duration_ms) -> dict:
+    return {
+        "job_id": job_id,
+        "status": status,
+        "job_duration_ms": job_duration_ms,
+        "cached": False,
+    }
+
+
+def _fail_job(job_id: str, started_at_ms: int, error: Exception) -> dict:
+    """
+    Records `error` on the job; call from the except block.
+    """
+    logger.exception(
+        "task_failed",
+        extra={
+            "event": "task_failed",
+            "job_id": job_id,
+            "component": "celery_worker",
+        },
+    )
+
+    _, job_duration_ms = finish_job(
+        job_id,
+        started_at_ms,
+        "failed",
+        {
+            "error": {
+                "type": type(error).__name__,
+                "message": str(error),
+            }
+        },
+    )
+    return _job_payload(job_id, "failed", job_duration_ms)
+
+
+def _run_job(job_id: str, started_at_ms: int, step) -> dict:
+    """
+    Runs `step`, which finishes the job and returns its duration.
+    """
+    try:
+        job_duration_ms = step()
+    except Exception as e:
+        return _fail_job(job_id, started_at_ms, e)
+
+    logger.info(
+        "task_finished",
+        extra={
+            "event": "task_finished",
+            "job_id": job_id,
+            "duration_ms": job_duration_ms,
+            "component": "celery_worker",
+        },
+    )
+    return _job_payload(job_id, "finished", job_duration_ms)
+
+
 @celery.task(
     bind=True,
     autoretry_for=(),
 )
-
-def explain_code_task(self, job_id: str, code: str, cache_key: str):
-    """
-    Background task that:
-    1. Executes the LLM call
-    2. Stores reusable result in cache
-    3. Stores execution-specific job status
-    """
-    
-    # Update job status to running
-    job_key = f"job:{job_id}"
-    
-    def update(status, result=None):
-        set_result(
-            job_key,
-            {
-                "job_id": job_id,
-                "status": status,
-                "result": result,
-                "cached": False,
-            },
-            ttl=CACHE_TTL,
-        )
-        
+def analyze_code_task(self, job_id: str, code: str, cache_key: str, artifacts=None):
+    """
+    Analysis step of an explain job (CPU-bound, "analysis" queue):
+    builds the DAG, lineage and analysis and stores them as artifacts
+    (services.jobs). Returns the handoff for explain_llm_task, chained
+    after it; analysis-only requests are finished here.
+    `artifacts` restricts the outputs to a subset (run_dag_pipeline's
+    names, plus "llm").
+    """
     logger.info(
         "task_started",
         extra={
             "event": "task_started",
             "job_id": job_id,
+            "step": "analysis",
             "component": "celery_worker",
         },
     )
 
-    update("running")
-    
-    # Measure FULL job duration (queue + execution)
-    task_start = time.time()
-    
-    # simulate queue / scheduling delay
-    time.sleep(1)
-    
-    try: 
+    started_at_ms = int(time.time() * 1000)
+    update_job(job_id, {
+        "job_id": job_id,
+        "kind": KIND_EXPLAIN,
+        "status": "running",
+        "cached": False,
+        "started_at": started_at_ms,
+    })
+
+    try:
         # --- DAG / Analysis ---
         # Build DAG and generate DOT representation
-        dag_result = run_dag_pipeline(code)
-        analysis_cache_key = f"{cache_key}:analysis"
-        set_result(analysis_cache_key, dag_result, ttl=CACHE_TTL)
-
-        update(
-            "analysis_complete",
-            {
-                "analysis": dag_result,
-                "llm": None,
-            }
+        dag_result = run_dag_pipeline(
+            code,
+            statement_store=(
+                RedisJSONStore(ttl=STATEMENT_CACHE_TTL)
+                if settings.statement_cache_enabled
+                else None
+            ),
+            structure_store=RedisJSONStore(ttl=CACHE_TTL),
+            artifacts=None if artifacts is None else [a for a in artifacts if a != LLM_ARTIFACT],
+            **PIPELINE_OPTIONS,
         )
-        
-        # --- LLM ---
-        llm_result = explain_with_fallback(code)
+        refs = update_job(job_id, {"status": "analysis_complete"}, artifacts=dag_result)
+    except Exception as e:
+        return _fail_job(job_id, started_at_ms, e)
+
+    if wants_llm(artifacts):
+        return analysis_handoff(job_id, refs, dag_result.get("structure"), started_at_ms)
+
+    # Analysis-only request (e.g. CI): no LLM step
+    return _run_job(job_id, started_at_ms, lambda: finish_job(job_id, started_at_ms, "finished")[1])
+
+
+@celery.task(
+    bind=True,
+    autoretry_for=(),
+)
+def explain_llm_task(self, analysis: dict, code: str, cache_key: str, artifacts=None):
+    """
+    LLM step of an explain job (network-bound, "llm" queue). `analysis`
+    is the handoff of analyze_code_task, or of the API's inline analysis
+    (services.inline_analysis).
+
+    Releases the job's single-flight claim once its result is cached, or
+    once it has failed.
+    """
+    job_id = analysis["job_id"]
+    try:
+        if analysis["status"] == "failed":
+            # Already recorded by the analysis step
+            return analysis
 
-        # Cache only successful LLM outputs
-        if "explanation" in llm_result:
-            set_result(cache_key, llm_result, ttl=CACHE_TTL)
-
-        update(
-            "finished",
-            {
-                "analysis": dag_result,
-                "llm": llm_result,
-            },
-        )
-        
-        job_duration_ms = int((time.time() - task_start) * 1000)
-        
         logger.info(
-            "task_finished",
+            "task_started",
             extra={
-                "event": "task_finished",
+                "event": "task_started",
                 "job_id": job_id,
-                "duration_ms": job_duration_ms,
+                "step": "llm",
                 "component": "celery_worker",
             },
         )
+        return _run_job(
+            job_id,
+            analysis["started_at_ms"],
+            lambda: complete_with_llm(
+                job_id,
+                code,
+                cache_key,
+                analysis["refs"],
+                analysis["structure"],
+                analysis["started_at_ms"],
+                artifacts,
+            ),
+        )
+    finally:
+        if artifacts is None:
+            single_flight.release(cache_key, job_id)
 
 
-        
+def enqueue_explain(job_id: str, code: str, cache_key: str, artifacts=None):
+    """
+    Queues an explain job: analysis on the "analysis" queue, chained to
+    the LLM step on the "llm" queue.
+    """
+    analysis = analyze_code_task.s(job_id=job_id, code=code, cache_key=cache_key, artifacts=artifacts)
+    if not wants_llm(artifacts):
+        return analysis.apply_async()
+    return chain(
+        analysis,
+        explain_llm_task.s(code=code, cache_key=cache_key, artifacts=artifacts),
+    ).apply_async()
+
+
+def enqueue_llm(handoff: dict, code: str, cache_key: str, artifacts=None):
+    """
+    Queues only the LLM step, for a job analyzed by the API.
+    """
+    return explain_llm_task.apply_async(
+        args=[handoff],
+        kwargs={"code": code, "cache_key": cache_key, "artifacts": artifacts},
+    )
+
+
+@celery.task(bind=True)
+def analyze_batch_task(self, job_id: str):
+    """
+    Analyzes all files of a batch (staged by the API under
+    batch:{job_id}:input) across a process pool, as one job.
+    """
+    input_key = f"batch:{job_id}:input"
+
+    files = get_result(input_key, local=False)
+    if not files:
+        update_job(job_id, {
+            "status": "failed",
+            "error": {"type": "BatchInputError", "message": "Batch input expired"},
+        })
+        return {"job_id": job_id, "status": "failed"}
+
+    logger.info(
+        "batch_started",
+        extra={
+            "event": "batch_started",
+            "job_id": job_id,
+            "files": len(files),
+            "component": "celery_worker",
+        },
+    )
+    task_start = time.time()
+    update_job(job_id, {
+        "status": "running",
+        "started_at": int(task_start * 1000),
+        "progress": {"done": 0, "total": len(files)},
+    })
+
+    try:
+        result = run_batch(
+            [tuple(f) for f in files],
+            processes=settings.batch_processes,
+            pipeline_options=PIPELINE_OPTIONS,
+            on_progress=lambda done, total: update_job(
+                job_id, {"progress": {"done": done, "total": total}}
+            ),
+        )
     except Exception as e:
         logger.exception(
-            "task_failed",
-            extra={
-                "event": "task_failed",
-                "job_id": job_id,
-                "component": "celery_worker",
-            },
+            "batch_failed",
+            extra={"event": "batch_failed", "job_id": job_id, "component": "celery_worker"},
         )
+        update_job(job_id, {
+            "status": "failed",
+            "error": {"type": type(e).__name__, "message": str(e)},
+        })
+        return {"job_id": job_id, "status": "failed"}
 
-        update(
-                "failed",
-                {
-                    "error": {
-                        "type": type(e).__name__,
-                        "message": str(e),
-                    }
-                },
-            )
-
-    job_payload = {
-        "job_id": job_id,
-        "status": "finished",
-        "job_duration_ms": job_duration_ms,
-        "cached": False,
-    }
-
-    return job_payload
+    finished_at = time.time()
+    job_duration_ms = int((finished_at - task_start) * 1000)
+    update_job(
+        job_id,
+        {
+            "status": "finished",
+            "finished_at": int(finished_at * 1000),
+            "job_duration_ms": job_duration_ms,
+        },
+        artifacts=result,
+    )
+    redis_client.delete(input_key)
 
+    logger.info(
+        "batch_finished",
+        extra={
+            "event": "batch_finished",
+            "job_id": job_id,
+            "duration_ms": job_duration_ms,
+            "files_per_sec": result["summary"]["files_per_sec"],
+            "component": "celery_worker",
+        },
+    )
+    return {"job_id": job_id, "status": "finished", "job_duration_ms": job_duration_ms}
@@ -1,6 +1,7 @@
+import json
+
 import streamlit as st
 import requests
-import time
 
 BACKEND_BASE = "http://backend:8000"  # internal when running in docker-compose
 
@@ -8,6 +9,101 @@ st.title("PySpark Code Explainer (LLM)")
 
 code = st.text_area("PySpark code")
 
+
+def fetch_artifact(job_id, artifacts, name):
+    """
+    One artifact of a job, downloaded once per session: artifacts never
+    change, and a cached copy is revalidated with its ETag.
+    """
+    if name not in artifacts:
+        return None
+    cache = st.session_state.setdefault("artifacts", {})
+    cached = cache.get((job_id, name))
+    headers = {"If-None-Match": cached[0]} if cached else {}
+
+    resp = requests.get(f"{BACKEND_BASE}{artifacts[name]['url']}", headers=headers, timeout=10)
+    if resp.status_code == 304:
+        return cached[1]
+    if resp.status_code != 200:
+        return None
+    value = resp.json()
+    cache[(job_id, name)] = (resp.headers.get("ETag"), value)
+    return value
+
+
+def job_events(job_id):
+    """
+    (event, data) of a job, pushed by the backend as Server-Sent Events
+    until the job ends; reconnects when the server closes a long stream,
+    resuming after the last event id received.
+    Status events are named after the status and carry the /status body;
+    "explanation" events carry the LLM explanation as it is generated.
+    """
+    last_event_id = None
+    while True:
+        with requests.get(
+            f"{BACKEND_BASE}/jobs/{job_id}/events",
+            headers={"Last-Event-ID": last_event_id} if last_event_id else {},
+            stream=True,
+            timeout=(10, 60),  # keepalives arrive every 15 s
+        ) as resp:
+            resp.raise_for_status()
+            event, data = "message", []
+            for line in resp.iter_lines(decode_unicode=True):
+                if line.startswith("id:"):
+                    last_event_id = line[len("id:"):].strip()
+                elif line.startswith("event:"):
+                    event = line[len("event:"):].strip()
+                elif line.startswith("data:"):
+                    data.append(line[len("data:"):].strip())
+                elif not line and data:
+                    payload = json.loads("\n".join(data))
+                    yield event, payload
+                    if event in ("finished", "failed", "error"):
+                        return
+                    event, data = "message", []
+
+
+def render_explanation(llm, job):
+    # --- LLM ---
+    st.subheader("Explanation")
+    st.write(llm.get("explanation"))
+
+    st.caption(
+        f"Tokens: {llm.get('tokens_used')} | "
+        f"Model latency: {llm.get('latency_ms')} ms | "
+        f"Job duration: {job.get('job_duration_ms')} ms"
+    )
+
+
+def render_analysis(analysis):
+    # --- DAG ---
+    st.subheader("Operation DAG")
+    if "dag_dot" in analysis:
+        st.graphviz_chart(analysis["dag_dot"])
+
+    # --- Lineage ---
+    st.subheader("Data Lineage")
+    if "lineage_dot" in analysis:
+        st.graphviz_chart(analysis["lineage_dot"])
+
+    # --- Stage Summary ---
+    st.subheader("Stage Summary")
+    stage_summary = analysis.get("stage_summary")
+    if stage_summary:
+        st.markdown(stage_summary.get("markdown", ""))
+    else:
+        st.info("No stage summary available.")
+
+    # --- Anti-patterns ---
+    st.subheader("Anti-Patterns")
+    antipatterns = analysis.get("antipatterns")
+    if antipatterns:
+        st.markdown(antipatterns.get("markdown", ""))
+    else:
+        st.info("No anti-patterns detected.")
+
+
 if st.button("Explain"):
     # 1. Submit job
     r = requests.post(
@@ -29,74 +125,57 @@ if st.button("Explain"):
 
     st.info(f"Job queued: {job_id}")
 
-    # 2. Poll status
+    # The explanation goes above the analysis, which usually arrives first;
+    # its partial text is replaced as more arrives
+    explanation_area = st.empty()
+
+    # Small scripts are analyzed by the API: the analysis comes right away
+    analysis = data.get("analysis")
+    if analysis:
+        render_analysis(analysis)
+
+    # 2. Follow status updates as the worker publishes them
     with st.spinner("Waiting for result..."):
-        while True:
-            resp = requests.get(
-                f"{BACKEND_BASE}/status/{job_id}",
-                timeout=10,
-            )
-            try:
-                j = resp.json()
-            except Exception:
-                st.error(f"Backend error ({resp.status_code}): {resp.text}")
-                break
-
-            status = j.get("status")
-
-            if status in ("finished", "failed"):
-                result = j.get("result")
-
-                if not result:
-                    st.error("No result returned.")
+        partial = ""
+        try:
+            for event, j in job_events(job_id):
+                # The explanation, shown as it is generated
+                if event == "explanation":
+                    partial = "" if j.get("reset") else partial + j.get("text", "")
+                    with explanation_area.container():
+                        st.subheader("Explanation")
+                        st.markdown(partial)
+                    continue
+
+                if event == "error":
+                    st.error(f"Job unavailable: {j.get('detail')}")
                     break
 
-                llm = result.get("llm", {})
-                analysis = result.get("analysis", {})
-
-                # --- LLM ---
-                st.subheader("Explanation")
-                st.write(llm.get("explanation"))
-
-                st.caption(
-                    f"Tokens: {llm.get('tokens_used')} | "
-                    f"Model latency: {llm.get('latency_ms')} ms | "
-                    f"Job duration: {j.get('job_duration_ms')} ms"
-                )
-
-                # --- DAG ---
-                st.subheader("Operation DAG")
-                if "dag_dot" in analysis:
-                    st.graphviz_chart(analysis["dag_dot"])
-
-                # --- Lineage ---
-                st.subheader("Data Lineage")
-                if "lineage_dot" in analysis:
-                    st.graphviz_chart(analysis["lineage_dot"])
-
-                # --- Stage Summary ---
-                st.subheader("Stage Summary")
-                stage_summary = analysis.get("stage_summary")
-                if stage_summary:
-                    st.markdown(stage_summary.get("markdown", ""))
-                else:
-                    st.info("No stage summary available.")
-
-
-                # --- Anti-patterns ---
-                st.subheader("Anti-Patterns")
-                antipatterns = analysis.get("antipatterns")
-                if antipatterns:
-                    st.markdown(antipatterns.get("markdown", ""))
-                else:
-                    st.info("No anti-patterns detected.")
-
-                st.write(
-                    f"Tokens: {llm.get('tokens_used')}, "
-                    f"Total duration: {j.get('job_duration_ms')} ms, "
-                    f"Model (Gemini) latency: {llm.get('latency_ms')} ms "
-                )
-
-                break 
-
-            time.sleep(1)
\ No newline at end of file
+                status = j.get("status")
+
+                if status == "failed":
+                    error = (j.get("result") or {}).get("error")
+                    st.error(f"Job failed: {error}")
+                    break
+
+                # Status is slim: download only the artifacts shown
+                artifacts = j.get("artifacts") or {}
+                if not analysis and status in ("analysis_complete", "finished"):
+                    analysis = {
+                        name: value
+                        for name in ("dag_dot", "lineage_dot", "stage_summary", "antipatterns")
+                        if (value := fetch_artifact(job_id, artifacts, name)) is not None
+                    }
+                    render_analysis(analysis)
+
+                if status == "finished":
+                    if not artifacts:
+                        st.error("No result returned.")
+                        break
+
+                    llm = fetch_artifact(job_id, artifacts, "llm") or {}
+                    with explanation_area.container():
+                        render_explanation(llm, j)
+                    break
+        except requests.RequestException as e:
+            st.error(f"Backend error: {e}")